@@ -11,6 +11,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.core.database import Base
 from app.models.user import User
 from app.models.file import File
+from app.models.processing_run import ProcessingRun
+from app.models.storage_usage import UserStorageUsage
+from app.models.blob_deletion import BlobDeletion
+from app.models.blob import Blob
+from app.models.upload_session import UploadSession, UploadSessionPart
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
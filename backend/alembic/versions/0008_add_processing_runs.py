@@ -0,0 +1,52 @@
+"""Add processing_runs table for ingest run reports
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('processing_runs',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('action', sa.String(length=50), nullable=False),
+    sa.Column('tenant', sa.String(length=255), nullable=True),
+    sa.Column('source_file_id', sa.String(length=64), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('message', sa.String(length=255), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('files_processed', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('files_skipped', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('files_failed', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('rows', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('groups_published', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('groups_skipped', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('groups_failed', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('bytes_sent', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('rows_per_second', sa.Float(), nullable=True),
+    sa.Column('wall_time_ms', sa.Integer(), nullable=True),
+    sa.Column('stages', sa.String(), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_processing_runs_user_started', 'processing_runs', ['user_id', 'started_at'], unique=False)
+    op.create_index('ix_processing_runs_tenant_action_started', 'processing_runs', ['tenant', 'action', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_processing_runs_tenant_action_started', table_name='processing_runs')
+    op.drop_index('ix_processing_runs_user_started', table_name='processing_runs')
+    op.drop_table('processing_runs')
@@ -0,0 +1,22 @@
+"""Add users.files_version to version cached file trees
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('files_version', sa.BigInteger(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'files_version')
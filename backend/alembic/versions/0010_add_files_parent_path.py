@@ -0,0 +1,39 @@
+"""Add files.parent_path for one-level folder listings
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('parent_path', sa.String(length=1000), nullable=True))
+    # Files are listed in their folder_path; folders in the parent of their own path
+    op.execute(
+        """
+        UPDATE files SET parent_path = CASE
+            WHEN is_folder THEN COALESCE(
+                NULLIF(regexp_replace(rtrim(folder_path, '/'), '/[^/]*$', ''), ''), '/')
+            ELSE COALESCE(NULLIF('/' || trim(both '/' from folder_path), '/'), '/')
+        END
+        """
+    )
+    op.create_index(
+        'ix_files_user_parent_listing',
+        'files',
+        ['user_id', 'parent_path', sa.text('is_folder DESC'), sa.text('lower(original_filename)')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_files_user_parent_listing', table_name='files')
+    op.drop_column('files', 'parent_path')
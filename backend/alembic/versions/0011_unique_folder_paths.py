@@ -0,0 +1,46 @@
+"""Make folder rows unique per (user_id, folder_path)
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+_DUPLICATES = """
+    SELECT id, keep_id FROM (
+        SELECT id, first_value(id) OVER (
+            PARTITION BY user_id, folder_path ORDER BY uploaded_at, id
+        ) AS keep_id
+        FROM files WHERE is_folder
+    ) ranked WHERE id <> keep_id
+"""
+
+
+def upgrade() -> None:
+    # Collapse duplicate folder rows (create_folder never checked for existing
+    # ones) onto the oldest, re-pointing any parent_id references first
+    op.execute(
+        f"""
+        UPDATE files SET parent_id = dup.keep_id
+        FROM ({_DUPLICATES}) dup WHERE files.parent_id = dup.id
+        """
+    )
+    op.execute(f"DELETE FROM files WHERE id IN (SELECT id FROM ({_DUPLICATES}) dup)")
+    op.create_index(
+        'uq_files_user_folder',
+        'files',
+        ['user_id', 'folder_path'],
+        unique=True,
+        postgresql_where=sa.text('is_folder'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_files_user_folder', table_name='files')
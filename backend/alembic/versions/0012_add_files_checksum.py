@@ -0,0 +1,22 @@
+"""Add files.checksum (SHA-256 computed while streaming uploads)
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('checksum', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'checksum')
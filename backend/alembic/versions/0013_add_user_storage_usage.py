@@ -0,0 +1,48 @@
+"""Add user_storage_usage counters
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_storage_usage',
+    sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('total_size', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('file_count', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('images_count', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('pdf_count', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('csv_count', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Start from the current files; later changes are applied as deltas
+    op.execute(
+        """
+        INSERT INTO user_storage_usage (user_id, total_size, file_count, images_count, pdf_count, csv_count)
+        SELECT user_id,
+               COALESCE(SUM(file_size), 0),
+               COUNT(*),
+               COUNT(*) FILTER (WHERE mime_type LIKE 'image/%'),
+               COUNT(*) FILTER (WHERE mime_type = 'application/pdf'),
+               COUNT(*) FILTER (WHERE mime_type IN ('text/csv', 'application/vnd.ms-excel'))
+        FROM files
+        WHERE is_folder = false
+        GROUP BY user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_storage_usage')
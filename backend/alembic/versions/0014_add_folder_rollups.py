@@ -0,0 +1,42 @@
+"""Add recursive size/file-count rollups to folder rows
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('total_size', sa.BigInteger(), nullable=False, server_default='0'))
+    op.add_column('files', sa.Column('total_files', sa.BigInteger(), nullable=False, server_default='0'))
+    # A file counts towards every folder whose path is its folder_path or a prefix of it
+    op.execute(
+        """
+        UPDATE files SET total_size = rollup.size, total_files = rollup.files
+        FROM (
+            SELECT folder.id, COALESCE(SUM(f.file_size), 0) AS size, COUNT(f.id) AS files
+            FROM files folder
+            JOIN files f
+              ON f.user_id = folder.user_id
+             AND f.is_folder = false
+             AND (rtrim(f.folder_path, '/') = folder.folder_path
+                  OR left(f.folder_path, length(folder.folder_path) + 1) = folder.folder_path || '/')
+            WHERE folder.is_folder
+            GROUP BY folder.id
+        ) rollup
+        WHERE files.id = rollup.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'total_files')
+    op.drop_column('files', 'total_size')
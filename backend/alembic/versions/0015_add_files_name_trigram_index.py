@@ -0,0 +1,29 @@
+"""Trigram index for searching file names
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.create_index(
+        'ix_files_user_name_trgm',
+        'files',
+        ['user_id', 'original_filename'],
+        postgresql_using='gin',
+        postgresql_ops={'original_filename': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_files_user_name_trgm', table_name='files')
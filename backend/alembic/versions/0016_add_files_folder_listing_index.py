@@ -0,0 +1,37 @@
+"""Composite/prefix index for folder listings and subtree matches
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (user_id, folder_path) equality returns rows already in listing order;
+    # text_pattern_ops lets folder_path LIKE '/a/%' use the index in any collation.
+    # Folder lookups on (user_id, is_folder, folder_path) are served index-only by
+    # the partial uq_files_user_folder from 0011.
+    op.create_index(
+        'ix_files_user_folder_listing',
+        'files',
+        [
+            'user_id',
+            'folder_path',
+            sa.text('coalesce(is_folder, false) DESC'),
+            'original_filename',
+            'id',
+        ],
+        postgresql_ops={'folder_path': 'text_pattern_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_files_user_folder_listing', table_name='files')
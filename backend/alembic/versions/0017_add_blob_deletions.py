@@ -0,0 +1,28 @@
+"""Queue of storage objects to delete after their files rows are gone
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('blob_deletions',
+    sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('file_path', sa.String(length=1000), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('blob_deletions')
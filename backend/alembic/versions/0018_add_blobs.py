@@ -0,0 +1,30 @@
+"""Reference-counted content-addressed blobs
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0018'
+down_revision = '0017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('blobs',
+    sa.Column('checksum', sa.String(length=64), nullable=False),
+    sa.Column('file_path', sa.String(length=1000), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.BigInteger(), nullable=False, server_default='0'),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('checksum'),
+    sa.UniqueConstraint('file_path')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('blobs')
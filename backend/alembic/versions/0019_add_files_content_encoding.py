@@ -0,0 +1,22 @@
+"""Add files.content_encoding (codec of content compressed at rest)
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0019'
+down_revision = '0018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('content_encoding', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'content_encoding')
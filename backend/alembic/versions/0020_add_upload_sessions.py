@@ -0,0 +1,47 @@
+"""Resumable chunked upload sessions and their received parts
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-20 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '0020'
+down_revision = '0019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('upload_sessions',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('original_filename', sa.String(length=500), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=True),
+    sa.Column('folder_path', sa.String(length=1000), nullable=False),
+    sa.Column('file_path', sa.String(length=1000), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('chunk_size', sa.BigInteger(), nullable=False),
+    sa.Column('storage_upload_id', sa.String(length=1024), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_sessions_user_id'), 'upload_sessions', ['user_id'], unique=False)
+    op.create_table('upload_session_parts',
+    sa.Column('session_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('part_number', sa.Integer(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('etag', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['upload_sessions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('session_id', 'part_number')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('upload_session_parts')
+    op.drop_index(op.f('ix_upload_sessions_user_id'), table_name='upload_sessions')
+    op.drop_table('upload_sessions')
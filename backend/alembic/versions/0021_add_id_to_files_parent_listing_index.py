@@ -0,0 +1,41 @@
+"""Keyset order (is_folder DESC, original_filename, id) for one-level folder listings
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-20 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0021'
+down_revision = '0020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # /files/children pages by the same keyset as /files/list, so the index from
+    # 0010 gets the id tie-breaker and the plain (not lowercased) name order.
+    op.drop_index('ix_files_user_parent_listing', table_name='files')
+    op.create_index(
+        'ix_files_user_parent_listing',
+        'files',
+        [
+            'user_id',
+            'parent_path',
+            sa.text('coalesce(is_folder, false) DESC'),
+            'original_filename',
+            'id',
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_files_user_parent_listing', table_name='files')
+    op.create_index(
+        'ix_files_user_parent_listing',
+        'files',
+        ['user_id', 'parent_path', sa.text('is_folder DESC'), sa.text('lower(original_filename)')],
+        unique=False,
+    )
@@ -1,18 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, status, Form, Header, Request, Response
+from fastapi.responses import FileResponse as StarletteFileResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
 from app.core.auth import get_current_user
-from app.services.storage_service import storage_service
+from app.services.storage_service import storage_service, FileTooLargeError, StoredObject, content_disposition
 from app.services.file_service import FileService
-from app.schemas.file import FileResponse, FileCreate, FolderCreate, FileTreeNode
+from app.services.upload_session_service import UploadSessionService
+from app.services.blob_gc import collect_deleted_blobs
+from app.services.file_tree_cache import file_tree_cache, tree_etag, etag_matches
+from app.schemas.file import (
+    FileResponse, FileCreate, FolderCreate, FileTreeNode, FolderChildNode,
+    DirectUploadRequest, DirectUploadTarget, DirectUploadFinalize, ResumableUploadCreate, ResumableUploadStatus,
+)
 from app.models.user import User
+from app.core.config import settings
+from app.utils.http import RangeNotSatisfiable, http_date, is_not_modified, parse_byte_range
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import os
+import tempfile
 
 router = APIRouter()
 
+_tree_adapter = TypeAdapter(List[FileTreeNode])
+
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB per file
 
+def _target_folder(folder_path: str, relative_path: Optional[str]) -> str:
+    """Folder for an uploaded file, preserving the client's hierarchy when provided"""
+    target_folder = folder_path
+    if relative_path:
+        # Drop the filename from the relative path and join with base folder_path
+        rp_dir = os.path.dirname(relative_path).replace('\\', '/')
+        if rp_dir and rp_dir != '.':
+            # Normalize to "/parent/..."
+            rp_dir_norm = '/' + rp_dir.strip('/')
+            base_norm = '/' + (folder_path or '/').strip('/') if folder_path != '/' else '/'
+            target_folder = base_norm if rp_dir_norm == '/' else (base_norm.rstrip('/') + rp_dir_norm)
+    return target_folder
+
 @router.post("/upload", response_model=List[FileResponse])
 async def upload_files(
     files: List[UploadFile] = File(...),
@@ -24,8 +52,7 @@ async def upload_files(
     """Upload one or multiple files"""
     
     file_service = FileService(db)
-    uploaded_files = []
-    
+
     # Parse optional relative paths from the browser (webkitRelativePath)
     rel_paths_list: Optional[List[str]] = None
     if relative_paths:
@@ -37,61 +64,414 @@ async def upload_files(
         except Exception:
             rel_paths_list = None
 
-    for index, file in enumerate(files):
-        # Validate file size
-        file_content = await file.read()
-        if len(file_content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"File {file.filename} is too large. Maximum size: 100MB"
-            )
-        
-        # Determine target folder path (preserve client hierarchy if provided)
-        target_folder = folder_path
-        if rel_paths_list and index < len(rel_paths_list):
-            rp = rel_paths_list[index]
-            # Drop the filename from the relative path and join with base folder_path
-            rp_dir = os.path.dirname(rp).replace('\\', '/')
-            if rp_dir and rp_dir != '.':
-                # Normalize to "/parent/..."
-                rp_dir_norm = '/' + rp_dir.strip('/')
-                base_norm = '/' + (folder_path or '/').strip('/') if folder_path != '/' else '/'
-                target_folder = base_norm if rp_dir_norm == '/' else (base_norm.rstrip('/') + rp_dir_norm)
-
-        # Ensure folder hierarchy records exist in DB
-        FileService(db).ensure_folder_hierarchy(str(current_user.id), target_folder)
-
-        # Upload file to storage
-        file_path = storage_service.upload_file(
-            file_content=file_content,
+    # Resolve every target folder first so the hierarchy is created once per request
+    target_folders = [
+        _target_folder(folder_path, rel_paths_list[index] if rel_paths_list and index < len(rel_paths_list) else None)
+        for index in range(len(files))
+    ]
+
+    # The upload is all-or-nothing: stored objects are removed again if any
+    # file fails or the records cannot be committed
+    stored_paths: List[str] = []
+    user_id = str(current_user.id)
+
+    quota = settings.USER_STORAGE_QUOTA_BYTES
+    used = file_service.get_storage_total_size(user_id) if quota is not None else 0
+    if quota is not None and used >= quota:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Storage quota exceeded"
+        )
+
+    # Content-addressed mode only stages uploads here; blobs that are not
+    # stored yet are written once their references are claimed below
+    dedup = settings.STORAGE_DEDUP
+    staged: List[StoredObject] = []
+
+    def store(file: UploadFile) -> Optional[StoredObject]:
+        if dedup:
+            stored = storage_service.stage_upload_stream(file.file, max_size=MAX_FILE_SIZE)
+            if stored:
+                staged.append(stored)
+            return stored
+        # Stream to storage in fixed-size chunks; size and checksum are computed on the way
+        stored = storage_service.upload_file_stream(
+            file.file,
             filename=file.filename or "unnamed",
             content_type=file.content_type or "application/octet-stream",
-            user_id=str(current_user.id)
+            user_id=user_id,
+            max_size=MAX_FILE_SIZE,
         )
-        
-        if not file_path:
+        if stored:
+            # Recorded from the worker thread so cleanup also sees writes that
+            # finished while the request was being cancelled
+            stored_paths.append(stored.path)
+        return stored
+
+    def store_blob(stored: StoredObject, content_type: str) -> bool:
+        ok = storage_service.store_staged(stored, content_type)
+        if ok:
+            stored_paths.append(stored.path)
+        return ok
+
+    async def store_blob_limited(stored: StoredObject, content_type: str) -> None:
+        async with limit:
+            if not await run_in_threadpool(store_blob, stored, content_type):
+                raise RuntimeError(f"could not store blob {stored.checksum}")
+
+    # Storage writes run concurrently (bounded), so large folder uploads are
+    # limited by bandwidth rather than one storage round-trip per file
+    limit = asyncio.Semaphore(max(1, settings.UPLOAD_CONCURRENCY))
+
+    async def store_limited(file: UploadFile) -> StoredObject:
+        async with limit:
+            try:
+                stored = await run_in_threadpool(store, file)
+            except FileTooLargeError:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"File {file.filename} is too large. Maximum size: 100MB"
+                )
+        if not stored:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to upload file {file.filename}"
             )
-        
-        # Create file record
-        file_data = FileCreate(
-            filename=os.path.basename(file_path),
-            original_filename=file.filename or "unnamed",
-            file_path=file_path,
-            file_size=len(file_content),
+        return stored
+
+    tasks = [asyncio.ensure_future(store_limited(file)) for file in files]
+    try:
+        try:
+            stored_objects = await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop queued writes and let running ones finish before cleaning up
+            for task in tasks:
+                task.cancel()
+            await asyncio.shield(asyncio.wait(tasks))
+            for task in tasks:
+                if not task.cancelled():
+                    task.exception()  # mark as retrieved; the first error is re-raised below
+            raise
+
+        if quota is not None and used + sum(stored.size for stored in stored_objects) > quota:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Storage quota exceeded"
+            )
+
+        files_data = [
+            FileCreate(
+                filename=os.path.basename(stored.path),
+                original_filename=file.filename or "unnamed",
+                file_path=stored.path,
+                file_size=stored.size,
+                checksum=stored.checksum,
+                content_encoding=stored.encoding,
+                mime_type=file.content_type,
+                folder_path=target_folder or "/",
+                user_id=user_id,
+                is_folder=False
+            )
+            for file, target_folder, stored in zip(files, target_folders, stored_objects)
+        ]
+
+        # Folders, blob references and file records in one transaction
+        try:
+            file_service.ensure_folder_hierarchies(user_id, target_folders, commit=False)
+            if dedup:
+                # Duplicates of stored content skip the storage write entirely
+                missing = file_service.claim_blobs(stored_objects)
+                first = {}
+                for file, stored in zip(files, stored_objects):
+                    if stored.checksum in missing:
+                        first.setdefault(stored.checksum, (stored, file.content_type or "application/octet-stream"))
+                # Let every write finish before raising, so cleanup sees all stored blobs
+                results = await asyncio.gather(
+                    *(store_blob_limited(*args) for args in first.values()), return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, BaseException):
+                        raise result
+            uploaded_files = file_service.create_files(files_data, commit=False)
+            file_service.commit_keep_loaded()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to save uploaded files: {e}"
+            )
+    except BaseException:
+        if dedup:
+            db.rollback()
+            # Another upload may have claimed the same content meanwhile; the collector checks
+            file_service.queue_blob_deletions(stored_paths)
+        else:
+            for stored_path in stored_paths:
+                storage_service.delete_file(stored_path)
+        raise
+    finally:
+        for stored in staged:
+            storage_service.discard_staged(stored.staged)
+
+    return uploaded_files
+
+def _require_direct_uploads() -> None:
+    if not (storage_service.storage_type == "s3" and storage_service.s3_client):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Direct uploads need S3 storage; use /files/upload"
+        )
+
+def _check_quota(file_service: FileService, user_id: str, adding: int) -> None:
+    quota = settings.USER_STORAGE_QUOTA_BYTES
+    if quota is not None and file_service.get_storage_total_size(user_id) + adding > quota:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Storage quota exceeded"
+        )
+
+@router.post("/uploads/presign", response_model=List[DirectUploadTarget])
+async def presign_uploads(
+    upload: DirectUploadRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Presigned S3 targets for uploading files straight from the client.
+
+    Small files get one PUT URL, larger ones a multipart upload with a URL per
+    part. Nothing is recorded until the client calls ``/uploads/finalize``.
+    """
+    _require_direct_uploads()
+    user_id = str(current_user.id)
+    for file in upload.files:
+        if file.size > settings.S3_DIRECT_UPLOAD_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File {file.filename} is too large. Maximum size: {settings.S3_DIRECT_UPLOAD_MAX_BYTES} bytes"
+            )
+    _check_quota(FileService(db), user_id, sum(file.size for file in upload.files))
+
+    limit = asyncio.Semaphore(max(1, settings.UPLOAD_CONCURRENCY))
+
+    async def presign(file) -> dict:
+        async with limit:
+            return await run_in_threadpool(
+                storage_service.presign_upload,
+                storage_service.user_upload_key(file.filename, user_id),
+                file.content_type,
+                file.size,
+                settings.S3_UPLOAD_EXPIRES_SECONDS,
+            )
+
+    return await asyncio.gather(*(presign(file) for file in upload.files))
+
+@router.post("/uploads/finalize", response_model=List[FileResponse])
+async def finalize_uploads(
+    upload: DirectUploadFinalize,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Record files uploaded through ``/uploads/presign``.
+
+    Completes multipart uploads, checks that every object exists with the
+    announced size, then inserts all file rows in one transaction.
+    """
+    _require_direct_uploads()
+    file_service = FileService(db)
+    user_id = str(current_user.id)
+    prefix = f"files/{user_id}/"
+    keys = [file.key for file in upload.files]
+    if len(set(keys)) != len(keys) or any(
+        not key.startswith(prefix) or "/" in key[len(prefix):] for key in keys
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown upload key"
+        )
+    if file_service.existing_file_paths(user_id, keys):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload already finalized"
+        )
+
+    limit = asyncio.Semaphore(max(1, settings.UPLOAD_CONCURRENCY))
+
+    async def verify(file) -> Optional[int]:
+        async with limit:
+            if file.upload_id:
+                parts = [{"PartNumber": part.part_number, "ETag": part.etag} for part in file.parts]
+                try:
+                    await run_in_threadpool(storage_service.complete_multipart_upload, file.key, file.upload_id, parts)
+                except Exception:
+                    pass  # e.g. completed by an earlier, interrupted finalize; the size check decides
+            return await run_in_threadpool(storage_service.stored_size, file.key)
+
+    sizes = await asyncio.gather(*(verify(file) for file in upload.files))
+    incomplete = [file.filename for file, size in zip(upload.files, sizes) if size != file.size]
+    if incomplete:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Uploads missing or incomplete: {', '.join(incomplete)}"
+        )
+    _check_quota(file_service, user_id, sum(sizes))
+
+    target_folders = [_target_folder(upload.folder_path, file.relative_path) for file in upload.files]
+    files_data = [
+        FileCreate(
+            filename=os.path.basename(file.key),
+            original_filename=file.filename,
+            file_path=file.key,
+            file_size=file.size,
             mime_type=file.content_type,
             folder_path=target_folder or "/",
-            user_id=str(current_user.id),
+            user_id=user_id,
             is_folder=False
         )
-        
-        db_file = file_service.create_file(file_data)
-        uploaded_files.append(db_file)
-    
+        for file, target_folder in zip(upload.files, target_folders)
+    ]
+    try:
+        file_service.ensure_folder_hierarchies(user_id, target_folders, commit=False)
+        uploaded_files = file_service.create_files(files_data, commit=False)
+        file_service.commit_keep_loaded()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save uploaded files: {e}"
+        )
     return uploaded_files
 
+def _get_upload_session(service: UploadSessionService, upload_id: str, user: User):
+    session = service.get(upload_id, str(user.id))
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found"
+        )
+    return session
+
+@router.post("/uploads/resumable", response_model=ResumableUploadStatus, status_code=status.HTTP_201_CREATED)
+async def create_resumable_upload(
+    upload: ResumableUploadCreate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Start a resumable upload of one (possibly multi-GB) file.
+
+    Send the chunks with ``PUT /uploads/resumable/{id}?offset=``, in any order
+    and in parallel; after a dropped connection ``GET`` the upload to see
+    what is missing. ``POST .../complete`` creates the file.
+    """
+    if upload.size > settings.RESUMABLE_UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File {upload.filename} is too large. Maximum size: {settings.RESUMABLE_UPLOAD_MAX_BYTES} bytes"
+        )
+    user_id = str(current_user.id)
+    service = UploadSessionService(db)
+    # Open sessions count too, so parallel uploads cannot overshoot the quota together
+    _check_quota(FileService(db), user_id, service.bytes_reserved(user_id) + upload.size)
+    session = await run_in_threadpool(
+        service.create,
+        user_id,
+        upload.filename,
+        upload.size,
+        upload.content_type,
+        _target_folder(upload.folder_path, upload.relative_path) or "/",
+    )
+    return service.status(session)
+
+@router.get("/uploads/resumable/{upload_id}", response_model=ResumableUploadStatus)
+async def get_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Progress of a resumable upload: where to resume and which chunks are missing"""
+    service = UploadSessionService(db)
+    return service.status(_get_upload_session(service, upload_id, current_user))
+
+@router.put("/uploads/resumable/{upload_id}", response_model=ResumableUploadStatus)
+async def put_resumable_chunk(
+    upload_id: str,
+    offset: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Store the chunk starting at ``offset`` (the raw request body); sending it again replaces it"""
+    service = UploadSessionService(db)
+    session = _get_upload_session(service, upload_id, current_user)
+    try:
+        part_number, length = service.part_for_offset(session, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Spooled to disk past one upload step, so a chunk never sits in memory whole
+    with tempfile.SpooledTemporaryFile(max_size=settings.UPLOAD_CHUNK_SIZE) as chunk:
+        received = 0
+        async for data in request.stream():
+            received += len(data)
+            if received > length:
+                break
+            chunk.write(data)
+        if received != length:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Chunk at offset {offset} must be {length} bytes"
+            )
+        chunk.seek(0)
+        try:
+            etag = await run_in_threadpool(
+                storage_service.write_upload_part, session.file_path, session.storage_upload_id,
+                part_number, chunk, length,
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to store chunk: {e}"
+            )
+    service.record_part(session, part_number, length, etag)
+    return service.status(session)
+
+@router.post("/uploads/resumable/{upload_id}/complete", response_model=FileResponse)
+async def complete_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Assemble a fully received upload into a file (409 while chunks are missing)"""
+    service = UploadSessionService(db)
+    session = _get_upload_session(service, upload_id, current_user)
+    if not service.status(session)["complete"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload is missing chunks"
+        )
+    try:
+        return await run_in_threadpool(service.complete, session)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save uploaded file, start the upload again: {e}"
+        )
+
+@router.delete("/uploads/resumable/{upload_id}")
+async def abort_resumable_upload(
+    upload_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Abandon a resumable upload and drop its chunks"""
+    service = UploadSessionService(db)
+    await run_in_threadpool(service.abort, _get_upload_session(service, upload_id, current_user))
+    return {"message": "Upload aborted"}
+
 @router.post("/folder", response_model=FileResponse)
 async def create_folder(
     folder_data: FolderCreate,
@@ -105,34 +485,103 @@ async def create_folder(
 
 @router.get("/list", response_model=List[FileResponse])
 async def list_files(
+    response: Response,
     folder_path: str = "/",
+    limit: int = 200,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """List all files in a specific folder"""
+    """List the files in a specific folder, folders first (keyset pages of at most 1000).
+
+    The cursor of the next page, if any, is returned in ``X-Next-Cursor``.
+    """
+    limit = max(1, min(limit, 1000))
     file_service = FileService(db)
-    files = file_service.get_user_files(str(current_user.id), folder_path)
+    try:
+        files, next_cursor = file_service.get_user_files_page(str(current_user.id), folder_path, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return files
 
 @router.get("/tree", response_model=List[FileTreeNode])
 async def get_file_tree(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    fast: Optional[bool] = None,
+):
+    """Get the complete file tree structure.
+
+    Versioned by ``users.files_version`` (loaded with the current user), so an
+    unchanged tree costs no query beyond authentication: 304 when the client's
+    ETag matches, otherwise the body cached for that version. ``fast`` (default
+    ``FILE_TREE_FAST_JSON``) renders misses without pydantic; both paths produce
+    the same JSON, so they share the cache and ETag.
+    """
+    user_id = str(current_user.id)
+    version = current_user.files_version or 0
+    etag = tree_etag(user_id, version)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = file_tree_cache.get(user_id, version)
+    if body is None:
+        file_service = FileService(db)
+        if settings.FILE_TREE_FAST_JSON if fast is None else fast:
+            body = file_service.get_file_tree_json(user_id)
+        else:
+            body = _tree_adapter.dump_json(file_service.get_file_tree(user_id))
+        file_tree_cache.put(user_id, version, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.get("/children", response_model=List[FolderChildNode])
+async def get_folder_children(
+    response: Response,
+    path: str = "/",
+    limit: int = 200,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get the complete file tree structure"""
+    """List one level of a folder (lazy tree expansion), folders first (keyset pages of at most 1000).
+
+    The cursor of the next page, if any, is returned in ``X-Next-Cursor``.
+    """
+    limit = max(1, min(limit, 1000))
     file_service = FileService(db)
-    tree = file_service.get_file_tree(str(current_user.id))
-    return tree
+    try:
+        items, next_cursor = file_service.get_folder_children(str(current_user.id), path, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 @router.get("/search", response_model=List[FileResponse])
 async def search_files(
     q: str,
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Search files by name"""
+    """Search files by name, best match first (keyset pages of at most 200).
+
+    The cursor of the next page, if any, is returned in ``X-Next-Cursor``.
+    """
+    limit = max(1, min(limit, 200))
     file_service = FileService(db)
-    files = file_service.search_files(str(current_user.id), q)
+    try:
+        files, next_cursor = file_service.search_files(str(current_user.id), q, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return files
 
 @router.get("/storage")
@@ -148,10 +597,11 @@ async def get_storage_usage(
 @router.delete("/{file_id}")
 async def delete_file(
     file_id: str,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a file or folder"""
+    """Delete a file or folder; its blobs are removed from storage after the response"""
     file_service = FileService(db)
     success = file_service.delete_file(file_id, str(current_user.id))
     
@@ -161,8 +611,90 @@ async def delete_file(
             detail="File not found"
         )
     
+    background_tasks.add_task(collect_deleted_blobs)
     return {"message": "File deleted successfully"}
 
+@router.get("/{file_id}/content")
+async def download_file(
+    file_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Download a file's content, streamed from storage in chunks.
+
+    Honours single ``Range`` requests (206/416) and conditional requests; the
+    ETag is the content checksum. With S3 and ``S3_PRESIGNED_DOWNLOADS`` the
+    client is redirected to a short-lived presigned URL instead, unless the
+    content is stored compressed: that is decompressed here as it streams.
+    """
+    file_service = FileService(db)
+    file = file_service.get_file_by_id(file_id, str(current_user.id))
+    if not file or file.is_folder:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+
+    etag = f'"{file.checksum}"' if file.checksum else f'W/"{file.id}-{file.file_size}"'
+    last_modified = file.updated_at or file.uploaded_at
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+    }
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    filename = file.original_filename or os.path.basename(file.file_path)
+    media_type = file.mime_type or "application/octet-stream"
+    encoding = file.content_encoding
+    if settings.S3_PRESIGNED_DOWNLOADS and not encoding:
+        url = storage_service.presigned_download_url(
+            file.file_path, filename, file.mime_type, settings.S3_PRESIGN_EXPIRES_SECONDS
+        )
+        if url:
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers={"Cache-Control": "no-store"})
+
+    local_path = None if encoding else storage_service.local_file(file.file_path)
+    if local_path is not None:
+        # Starlette serves Range / If-Range from disk itself, reusing our validators
+        return StarletteFileResponse(local_path, media_type=media_type, filename=filename, headers=headers)
+    if not encoding and not storage_service.s3_client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File content not found"
+        )
+
+    try:
+        byte_range = parse_byte_range(request.headers, file.file_size, etag, last_modified)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{file.file_size}"},
+        )
+    headers["Content-Disposition"] = content_disposition(filename)
+    start, end = byte_range if byte_range else (None, None)
+    try:
+        if encoding:
+            chunks = await run_in_threadpool(storage_service.open_decoded, file.file_path, encoding, start, end)
+        else:
+            chunks = await run_in_threadpool(storage_service.open_s3_object, file.file_path, start, end)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File content not found"
+        )
+    if byte_range is None:
+        headers["Content-Length"] = str(file.file_size)
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
+    headers["Content-Range"] = f"bytes {start}-{end}/{file.file_size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        chunks, status_code=status.HTTP_206_PARTIAL_CONTENT, media_type=media_type, headers=headers
+    )
+
 @router.get("/{file_id}", response_model=FileResponse)
 async def get_file(
     file_id: str,
@@ -1,15 +1,27 @@
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Form
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import List, Optional
 
 from app.core.database import get_db
 from app.core.processing import processing_service
 from app.core.auth import get_current_user
 from app.models.user import User
+from app.models.processing_run import ProcessingRun
+from app.schemas.processing import ProcessingRunResponse
 
 router = APIRouter()
 
 
+def release_db(db: Session) -> None:
+    """Return the request session's connection to the pool before a long ETX run.
+
+    Processing flows open their own short transactions, so the session used to
+    authenticate the caller must not stay checked out while they wait on ETX.
+    """
+    db.close()
+
+
 @router.post("/createorg")
 async def create_org(
     data_file: str = Form(...),
@@ -17,11 +29,11 @@ async def create_org(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    release_db(db)
     try:
-        msg = processing_service.createorg(
+        msg = await processing_service.createorg(
             data_file=data_file,
             tenant_name=tenant_name,
-            db=db,
             user=current_user,
         )
         return {"message": msg}
@@ -37,9 +49,10 @@ async def ingest_es(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    release_db(db)
     try:
-        msg = processing_service.ingestes(data_file=data_file, offset=offset, nrows=nrows, db=db, user=current_user)
-        return {"message": msg}
+        report = await processing_service.ingestes(data_file=data_file, offset=offset, nrows=nrows, user=current_user)
+        return {"message": report.message, "report": report.as_dict()}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -50,9 +63,10 @@ async def ingest_bar(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    release_db(db)
     try:
-        msg = processing_service.ingestbar(data_file=data_file, db=db, user=current_user)
-        return {"message": msg}
+        report = await processing_service.ingestbar(data_file=data_file, user=current_user)
+        return {"message": report.message, "report": report.as_dict()}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -62,10 +76,33 @@ async def generate_scheme_org(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    release_db(db)
     try:
-        msg = processing_service.generateschemeorg(db=db, user=current_user)
+        msg = await processing_service.generateschemeorg(user=current_user)
         return {"message": msg}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.get("/runs", response_model=List[ProcessingRunResponse])
+async def list_runs(
+    action: Optional[str] = None,
+    tenant: Optional[str] = None,
+    before: Optional[datetime] = None,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Recent ingest run reports of the current user, newest first.
+
+    Page with ``before`` set to the last ``started_at`` of the previous page.
+    """
+    query = db.query(ProcessingRun).filter(ProcessingRun.user_id == current_user.id)
+    if action:
+        query = query.filter(ProcessingRun.action == action)
+    if tenant:
+        query = query.filter(ProcessingRun.tenant == tenant)
+    if before:
+        query = query.filter(ProcessingRun.started_at < before)
+    limit = max(1, min(limit, 200))
+    return query.order_by(ProcessingRun.started_at.desc()).limit(limit).all()
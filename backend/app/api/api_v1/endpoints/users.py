@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.schemas.user import UserResponse, UserUpdate
 from app.services.user_service import UserService
 from app.core.auth import get_current_user
-from typing import List
+from typing import List, Optional
 from app.models.user import User
 import json
 
@@ -60,14 +60,27 @@ async def set_my_config(
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get list of users (public)"""
-    
+    """Get list of users (public), oldest first, at most 200 per page.
+
+    Pages are keyset-paginated: pass the ``X-Next-Cursor`` header of one page
+    as ``cursor`` to get the next. ``skip`` is still honoured without a cursor.
+    """
+    limit = max(1, min(limit, 200))
     user_service = UserService(db)
-    users = user_service.get_users(skip=skip, limit=limit)
+    if skip and not cursor:
+        return user_service.get_users(skip=skip, limit=limit)
+    try:
+        users, next_cursor = user_service.get_users_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return users
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -1,9 +1,18 @@
+from contextlib import contextmanager
+from typing import Iterator
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(
+    settings.DATABASE_URL,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -14,3 +23,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Short-lived session for work outside the request-scoped one.
+
+    Commits on success, rolls back on error and always returns the connection
+    to the pool, so long-running flows only hold a connection while they
+    actually talk to the database.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,327 @@
+"""
+Node-wide, memory-mapped snapshot of the ETX emission source (ES) catalog.
+
+One worker downloads ``GetAllESs`` and publishes it as a read-only file; every
+uvicorn/gunicorn worker on the node maps the same file, so the catalog lives
+once in the page cache instead of once per process. Publishing writes a new
+file and ``os.replace``s it over the old one, so readers swap atomically and
+readers still holding the old mapping keep a consistent view.
+
+File layout (little-endian)::
+
+    header        struct _HEADER
+    name_offsets  uint32[rows + 1]   offsets into the names blob
+    id_offsets    uint32[rows + 1]   offsets into the ids blob
+    slot_hashes   uint64[slots]      64-bit key hash, 0 = empty slot
+    slot_rows     uint32[slots]      row index of the key
+    slot_starts   uint32[slots]      byte offset of the key inside the row name
+    names         utf-8, one NUL after every name
+    ids           utf-8
+
+Keys are the full ``EsFullName`` and each of its ``" / "``-delimited suffixes,
+so ``"Org / ES"`` resolves to ``"Tenant / Org / ES"`` with one probe.
+"""
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import time
+from bisect import bisect_right
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms publish without a lock
+    fcntl = None
+
+from app.core.config import settings
+
+logger = logging.getLogger("processing")
+
+_MAGIC = b"ESCAT001"
+_HEADER = struct.Struct("<8sIIId")  # magic, rows, slots, data_size, published_at
+_SEPARATOR = " / "
+
+
+def _key_hash(key: bytes) -> int:
+    # Stable across processes (unlike hash()); 0 is reserved for empty slots
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little") or 1
+
+
+def _suffix_starts(name: bytes) -> List[int]:
+    sep = _SEPARATOR.encode()
+    starts = [0]
+    pos = name.find(sep)
+    while pos != -1:
+        starts.append(pos + len(sep))
+        pos = name.find(sep, pos + 1)
+    return starts
+
+
+def build_catalog_bytes(rows: Iterable[Tuple[str, str]]) -> bytes:
+    """Serialize ``(es_full_name, es_sid)`` pairs into the catalog layout."""
+    names = bytearray()
+    ids = bytearray()
+    name_offsets = [0]
+    id_offsets = [0]
+    keys: List[Tuple[int, int, int]] = []  # (hash, row, start)
+    seen = set()
+    for row, (name, sid) in enumerate(rows):
+        encoded = str(name).encode("utf-8")
+        base = len(names)
+        for start in _suffix_starts(encoded):
+            key = encoded[start:]
+            if key in seen:
+                continue  # first row wins, like iloc[0] on a filtered frame
+            seen.add(key)
+            keys.append((_key_hash(key), row, base + start))
+        names += encoded + b"\0"
+        ids += str(sid).encode("utf-8")
+        name_offsets.append(len(names))
+        id_offsets.append(len(ids))
+
+    row_count = len(name_offsets) - 1
+    slots = 1
+    while slots < max(len(keys) * 3 // 2 + 1, 8):
+        slots <<= 1
+    slot_hashes = [0] * slots
+    slot_rows = [0] * slots
+    slot_starts = [0] * slots
+    mask = slots - 1
+    for h, row, start in keys:
+        i = h & mask
+        while slot_hashes[i]:
+            i = (i + 1) & mask
+        slot_hashes[i] = h
+        slot_rows[i] = row
+        slot_starts[i] = start
+
+    body = b"".join(
+        [
+            struct.pack(f"<{row_count + 1}I", *name_offsets),
+            struct.pack(f"<{row_count + 1}I", *id_offsets),
+            struct.pack(f"<{slots}Q", *slot_hashes),
+            struct.pack(f"<{slots}I", *slot_rows),
+            struct.pack(f"<{slots}I", *slot_starts),
+            bytes(names),
+            bytes(ids),
+        ]
+    )
+    header = _HEADER.pack(_MAGIC, row_count, slots, len(body), time.time())
+    return header + body
+
+
+class EsCatalog:
+    """Read-only view over a mapped catalog file. Lookups never copy the table."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+        magic, rows, slots, data_size, published_at = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or _HEADER.size + data_size != len(self._mm):
+            self._mm.close()
+            raise ValueError(f"Corrupt ES catalog: {path}")
+        self.rows = rows
+        self.published_at = published_at
+        self._mask = slots - 1
+
+        view = memoryview(self._mm)
+        pos = _HEADER.size
+        self._name_offsets = view[pos : pos + 4 * (rows + 1)].cast("I")
+        pos += 4 * (rows + 1)
+        self._id_offsets = view[pos : pos + 4 * (rows + 1)].cast("I")
+        pos += 4 * (rows + 1)
+        self._slot_hashes = view[pos : pos + 8 * slots].cast("Q")
+        pos += 8 * slots
+        self._slot_rows = view[pos : pos + 4 * slots].cast("I")
+        pos += 4 * slots
+        self._slot_starts = view[pos : pos + 4 * slots].cast("I")
+        pos += 4 * slots
+        self._names_pos = pos
+        self._ids_pos = pos + self._name_offsets[rows]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.published_at
+
+    def name(self, row: int) -> str:
+        a, b = self._name_offsets[row], self._name_offsets[row + 1] - 1
+        return self._mm[self._names_pos + a : self._names_pos + b].decode("utf-8")
+
+    def es_id(self, row: int) -> str:
+        a, b = self._id_offsets[row], self._id_offsets[row + 1]
+        return self._mm[self._ids_pos + a : self._ids_pos + b].decode("utf-8")
+
+    def _probe(self, key: bytes) -> Optional[int]:
+        h = _key_hash(key)
+        i = h & self._mask
+        while True:
+            slot_hash = self._slot_hashes[i]
+            if not slot_hash:
+                return None
+            if slot_hash == h:
+                row = self._slot_rows[i]
+                start = self._names_pos + self._slot_starts[i]
+                end = self._names_pos + self._name_offsets[row + 1] - 1
+                if self._mm[start:end] == key:
+                    return row
+            i = (i + 1) & self._mask
+
+    def find_row(self, es_full_name: str) -> Optional[int]:
+        """Row whose name is or ends with ``es_full_name``; otherwise the first
+        row containing it as a substring (the previous DataFrame semantics)."""
+        key = es_full_name.encode("utf-8")
+        if not key:
+            return None
+        row = self._probe(key)
+        if row is not None:
+            return row
+        names_end = self._names_pos + self._name_offsets[self.rows]
+        pos = self._mm.find(key, self._names_pos, names_end)
+        if pos == -1:
+            return None
+        return bisect_right(self._name_offsets, pos - self._names_pos) - 1
+
+    def find_es_id(self, es_full_name: str) -> Optional[str]:
+        row = self.find_row(es_full_name)
+        return self.es_id(row) if row is not None else None
+
+    def close(self) -> None:
+        for view in (self._name_offsets, self._id_offsets, self._slot_hashes, self._slot_rows, self._slot_starts):
+            view.release()
+        self._mm.close()
+
+
+def ensure_private_dir(directory: str, setting: str = "ES_CATALOG_DIR") -> None:
+    """Create ``directory`` as 0700 and refuse to use it unless this user owns it
+    and nobody else can write to it. Snapshots feed ES ids straight into
+    PublishBARData, so they must not be replaceable by other local users."""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode):
+        raise PermissionError(f"{setting} is not a real directory: {directory}")
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        raise PermissionError(
+            f"Directory {directory} is owned by another user; set {setting}"
+        )
+    if st.st_mode & 0o022:
+        raise PermissionError(
+            f"Directory {directory} is writable by other users; set {setting}"
+        )
+
+
+def publish_catalog(path: str, rows: Iterable[Tuple[str, str]]) -> None:
+    """Write a new snapshot next to ``path`` and atomically swap it in."""
+    ensure_private_dir(os.path.dirname(path) or ".")
+    directory = os.path.dirname(path) or "."
+    data = build_catalog_bytes(rows)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".escat-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class EsCatalogStore:
+    """Per-process handle cache; attaches to the node-wide snapshot per ETX server."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.ES_CATALOG_DIR or os.path.join(
+            tempfile.gettempdir(), "etxprocessor-es-catalog"
+        )
+        self._attached: Dict[str, EsCatalog] = {}
+        self._refreshing: Dict[str, asyncio.Lock] = {}
+        self._dir_checked = False
+
+    def _check_dir(self) -> None:
+        if not self._dir_checked:
+            ensure_private_dir(self.directory)
+            self._dir_checked = True
+
+    def path_for(self, source_key: str) -> str:
+        digest = hashlib.sha1(source_key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"es-catalog-{digest}.bin")
+
+    def attach(self, source_key: str) -> Optional[EsCatalog]:
+        """Current snapshot for ``source_key``, re-mapping if another worker swapped it."""
+        self._check_dir()
+        path = self.path_for(source_key)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        current = self._attached.get(path)
+        if current is not None and current.identity == (st.st_ino, st.st_mtime_ns):
+            return current
+        if hasattr(os, "getuid") and st.st_uid != os.getuid():
+            raise PermissionError(f"ES catalog {path} is owned by another user")
+        catalog = EsCatalog(path)
+        # Old handles are dropped, not closed: in-flight lookups may still use them
+        self._attached[path] = catalog
+        return catalog
+
+    async def get(
+        self,
+        source_key: str,
+        loader: Callable[[], Awaitable[Iterable[Tuple[str, str]]]],
+        max_age: Optional[float] = None,
+    ) -> EsCatalog:
+        """Return a snapshot younger than ``max_age``, refreshing it via ``loader`` if needed.
+
+        Only one worker on the node runs ``loader`` at a time (file lock); the
+        others wait and attach to what it published.
+        """
+        max_age = settings.ES_CATALOG_TTL_SECONDS if max_age is None else max_age
+        catalog = self.attach(source_key)
+        if catalog is not None and catalog.age <= max_age:
+            return catalog
+
+        path = self.path_for(source_key)
+        lock = self._refreshing.setdefault(path, asyncio.Lock())
+        async with lock:
+            with open(path + ".lock", "a+") as lock_file:
+                await self._flock(lock_file)
+                try:
+                    catalog = self.attach(source_key)
+                    if catalog is not None and catalog.age <= max_age:
+                        return catalog
+                    rows = list(await loader())
+                    await asyncio.to_thread(publish_catalog, path, rows)
+                    logger.info(f"Published ES catalog with {len(rows)} rows to {path}")
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        return self.attach(source_key)
+
+    @staticmethod
+    async def _flock(lock_file) -> None:
+        if fcntl is None:
+            return
+        while True:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                await asyncio.sleep(0.05)
+
+
+es_catalog_store = EsCatalogStore()
@@ -0,0 +1,251 @@
+"""
+Asyncio client for the ETX HTTP API and WebSocket command protocol
+"""
+import asyncio
+import json
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Union
+
+import httpx
+from websockets.asyncio.client import ClientConnection, connect as ws_connect
+
+from app.core.config import settings
+
+
+class ETXError(RuntimeError):
+    """Raised when the ETX server rejects a call or the session breaks."""
+
+
+def build_set_org_script(mid: Optional[str] = None, time_zone: str = "Asia/Bangkok") -> str:
+    """Script form of SetOrg that selects the first org the account can see."""
+    lines = [
+        "#",
+        "$org = GetOrgs().Orgs.getFirst()",
+        f"$args.mid = '{mid}'",
+        "$args.id = useof $org.owner defto $org.id",
+        f"$args.timeZone = '{time_zone}'",
+        "SetOrg($args)\n",
+    ]
+    return "\n".join(lines)
+
+
+class ETXSession:
+    """
+    An authenticated WebSocket session.
+
+    The ETX protocol answers commands in order without correlation ids, so
+    commands on one session are serialized. A timeout or cancellation while a
+    command is in flight leaves the reply stream out of sync, so the session is
+    closed and must not be reused.
+    """
+
+    def __init__(self, ws: ClientConnection, timeout: float, logger: logging.Logger):
+        self._ws = ws
+        self._timeout = timeout
+        self._lock = asyncio.Lock()
+        self._broken = False
+        self.logger = logger
+
+    async def send(
+        self, payload: Union[str, Dict[str, Any]], timeout: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Send one command and wait for its reply. Returns None if the reply is not JSON."""
+        if self._broken:
+            raise ETXError("ETX session is closed")
+        text = payload if isinstance(payload, str) else json.dumps(payload)
+        limit = self._timeout if timeout is None else timeout
+        async with self._lock:
+            try:
+                await asyncio.wait_for(self._ws.send(text), limit)
+                raw = await asyncio.wait_for(self._ws.recv(), limit)
+            except asyncio.TimeoutError:
+                await self._abort()
+                raise ETXError(f"ETX command timed out after {limit}s")
+            except asyncio.CancelledError:
+                await self._abort()
+                raise
+            except Exception as e:
+                await self._abort()
+                raise ETXError(f"ETX WebSocket failure: {e}") from e
+        try:
+            return json.loads(raw)
+        except Exception:
+            self.logger.info("Cannot parse json from API response")
+            return None
+
+    async def _abort(self) -> None:
+        self._broken = True
+        try:
+            await self._ws.close()
+        except Exception:
+            pass
+
+    async def close(self) -> None:
+        self._broken = True
+        await self._ws.close()
+
+    # ------------------------------ commands ----------------------------------
+    async def set_org(self, mid: Optional[str] = None, org_id: Optional[str] = None, **kw) -> Optional[Dict[str, Any]]:
+        """Select an org by id, or the account's first org when no id is given."""
+        if org_id is None:
+            return await self.send(build_set_org_script(mid=mid or str(uuid.uuid4())), **kw)
+        return await self.send({"SetOrg": {"mid": mid or str(uuid.uuid4()), "id": org_id}}, **kw)
+
+    async def get_orgs(self, mid: Optional[str] = None, **kw) -> Dict[str, Any]:
+        """Return the id -> org mapping visible to the session."""
+        resp = await self.send({"GetOrgs": {"mid": mid or str(uuid.uuid4())}}, **kw) or {}
+        return (resp.get("GetOrgs", {}) or {}).get("Orgs", {}) or {}
+
+    async def upload_base64(
+        self, file_name: str, content: str, mid: Optional[str] = None, **kw
+    ) -> Optional[Dict[str, Any]]:
+        return await self.send(
+            {"UploadBase64Imp": {"mid": mid or str(uuid.uuid4()), "fileName": file_name, "content": content}},
+            **kw,
+        )
+
+    async def py_request(self, app: str, input: Dict[str, Any], **kw) -> Optional[Dict[str, Any]]:
+        return await self.send({"PyRequest": {"app": app, "value": {"Input": input}}}, **kw)
+
+    async def create_tenant_account(
+        self, name: Optional[str], auto_create_database: bool = True, **kw
+    ) -> Optional[Dict[str, Any]]:
+        return await self.send(
+            {"CreateTenantAccount": {"Name": name, "AutoCreateDatabase": auto_create_database}}, **kw
+        )
+
+    async def create_org_structure_from_csv(
+        self, data: str, mid: Optional[str] = None, **kw
+    ) -> Optional[Dict[str, Any]]:
+        return await self.send({"CreateOrgStructureFromCsv": {"mid": mid or str(uuid.uuid4()), "data": data}}, **kw)
+
+    async def set_version(
+        self,
+        version: Optional[str],
+        release_date: Optional[str] = None,
+        description: str = "dev server",
+        mid: Optional[str] = None,
+        **kw,
+    ) -> Optional[Dict[str, Any]]:
+        return await self.send(
+            {
+                "SetVersion": {
+                    "mid": mid or str(uuid.uuid4()),
+                    "etxVersion": version,
+                    "releaseDate": release_date or datetime.now().strftime("%d-%m-%Y"),
+                    "description": description,
+                }
+            },
+            **kw,
+        )
+
+
+class ETXClient:
+    """
+    Non-blocking client for one ETX server configuration.
+
+    HTTP calls share a pooled ``httpx.AsyncClient``; every call accepts its own
+    timeout and can be cancelled by cancelling the awaiting task.
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        ws_timeout: Optional[float] = None,
+        logger: Optional[logging.Logger] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.config = config
+        self.http_uri = config.get("HTTPURI", "")
+        self.ws_uri = config.get("WSURI", "")
+        self.api_key = config.get("API_KEY", "")
+        self.api_version = config.get("API_VERSION", "ctx/v1")
+        self.timeout = timeout or settings.ETX_REQUEST_TIMEOUT
+        self.connect_timeout = connect_timeout or settings.ETX_CONNECT_TIMEOUT
+        self.ws_timeout = ws_timeout or settings.ETX_WS_TIMEOUT
+        self.logger = logger or logging.getLogger("processing")
+        self._active = 0  # in-flight logins, requests and open sessions
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.ETX_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ETX_MAX_CONNECTIONS,
+            ),
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "ETXClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def aclose_when_idle(self, poll_interval: float = 0.5) -> None:
+        """Close once in-flight calls and sessions have finished (used when a client is replaced)."""
+        while self._active:
+            await asyncio.sleep(poll_interval)
+        await self.aclose()
+
+    async def login(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Authenticate with the configured account and return the login payload (contains ``fid``)."""
+        payload = {"login": {"email": self.config["email"], "password": self.config["password"]}}
+        self._active += 1
+        try:
+            resp = await self._http.post(
+                f"{self.http_uri}/fid-auth", json=payload, timeout=timeout or self.connect_timeout
+            )
+        finally:
+            self._active -= 1
+        if resp.status_code != 200:
+            raise ETXError("Failed to log in")
+        return resp.json().get("login", {})
+
+    async def request(
+        self,
+        method: str,
+        api_name: str,
+        headers: Optional[Dict[str, str]] = None,
+        data: Any = None,
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        """Call an ETX HTTP verb (``{HTTPURI}/{API_VERSION}/{api_name}``) with the API key header."""
+        url = f"{self.http_uri}/{self.api_version}/{api_name}"
+        headers = headers.copy() if headers else {}
+        headers.update({"DTX-DS-KEY": self.api_key})
+        self._active += 1
+        try:
+            return await self._http.request(
+                method, url, headers=headers, content=data, timeout=timeout or self.timeout
+            )
+        finally:
+            self._active -= 1
+
+    @asynccontextmanager
+    async def session(
+        self, set_org: bool = True, mid: Optional[str] = None, timeout: Optional[float] = None
+    ) -> AsyncIterator[ETXSession]:
+        """Log in, open a WebSocket session and (by default) select the first org."""
+        self._active += 1
+        try:
+            login_payload = await self.login()
+            fid = login_payload["fid"]
+            ws = await ws_connect(
+                f"{self.ws_uri}/fid-{fid}", max_size=None, open_timeout=self.connect_timeout
+            )
+            session = ETXSession(ws, timeout or self.ws_timeout, self.logger)
+            try:
+                if set_org:
+                    await session.set_org(mid=mid)
+                yield session
+            finally:
+                await session.close()
+        finally:
+            self._active -= 1
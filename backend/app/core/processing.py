@@ -3,19 +3,26 @@ import json
 import csv
 import base64
 import uuid
+import asyncio
+import inspect
 import logging
 import traceback
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 import time
 from urllib3 import response
-from app.services.file_service import FileService
+from app.services.file_service import FileService, FileSnapshot
+from app.services.storage_service import storage_service
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from app.models.user import User
+from app.core.config import settings
+from app.core.database import session_scope
+from app.core.etx_client import ETXClient
+from app.core.es_catalog import EsCatalog, es_catalog_store
+from app.core.run_report import RunReport
 import pandas as pd
 import requests
-import websocket
 import io
 
 
@@ -42,49 +49,69 @@ def _redact_mapping(m: Dict[str, Any]) -> Dict[str, Any]:
     return redacted
 
 
+def _summarize_result(result: Any) -> str:
+    # Summarize result without dumping huge payloads
+    if isinstance(result, (str, bytes)):
+        return f"{type(result).__name__}[len={len(result)}]"
+    if hasattr(result, "shape"):
+        return f"{type(result).__name__}[shape={getattr(result, 'shape', None)}]"
+    if isinstance(result, (list, tuple, dict)):
+        return f"{type(result).__name__}[len={len(result)}]"
+    return type(result).__name__
+
+
 def log_call(fn):
-    """Decorator to log entry/exit, args, duration and exceptions for processing methods."""
+    """Decorator to log entry/exit, args, duration and exceptions for processing methods.
+    Works for both plain and ``async def`` methods.
+    """
 
-    def wrapper(*args, **kwargs):
-        # Resolve logger: prefer instance logger if first arg looks like self with .logger
+    def resolve_logger(args: Tuple[Any, ...]) -> logging.Logger:
+        # Prefer instance logger if first arg looks like self with .logger
         logger = None
         if args:
             maybe_self = args[0]
             logger = getattr(maybe_self, "logger", None)
-        if logger is None:
-            logger = logging.getLogger("processing")
-
-        # Prepare a readable, redacted args/kwargs representation
-        def arg_summaries(a_tuple: Tuple[Any, ...], kw: Dict[str, Any]) -> str:
-            parts: List[str] = []
-            for i, a in enumerate(a_tuple):
-                if i == 0 and hasattr(a, fn.__name__):  # skip self in print
-                    parts.append("self")
-                else:
-                    parts.append(_safe_repr(a))
-            if kw:
-                red_kw = _redact_mapping(kw)
-                parts.append("kwargs=" + _safe_repr(red_kw))
-            return ", ".join(parts)
+        return logger or logging.getLogger("processing")
+
+    # Prepare a readable, redacted args/kwargs representation
+    def arg_summaries(a_tuple: Tuple[Any, ...], kw: Dict[str, Any]) -> str:
+        parts: List[str] = []
+        for i, a in enumerate(a_tuple):
+            if i == 0 and hasattr(a, fn.__name__):  # skip self in print
+                parts.append("self")
+            else:
+                parts.append(_safe_repr(a))
+        if kw:
+            red_kw = _redact_mapping(kw)
+            parts.append("kwargs=" + _safe_repr(red_kw))
+        return ", ".join(parts)
+
+    if inspect.iscoroutinefunction(fn):
+
+        async def async_wrapper(*args, **kwargs):
+            logger = resolve_logger(args)
+            start = time.perf_counter()
+            logger.info(f"CALL {fn.__name__}({arg_summaries(args, kwargs)})")
+            try:
+                result = await fn(*args, **kwargs)
+            except BaseException:
+                elapsed_ms = int((time.perf_counter() - start) * 1000)
+                logger.exception(f"EXCEPTION in {fn.__name__} after {elapsed_ms} ms")
+                raise
+            elapsed_ms = int((time.perf_counter() - start) * 1000)
+            logger.info(f"RETURN {fn.__name__} -> {_summarize_result(result)} in {elapsed_ms} ms")
+            return result
+
+        return async_wrapper
 
+    def wrapper(*args, **kwargs):
+        logger = resolve_logger(args)
         start = time.perf_counter()
         logger.info(f"CALL {fn.__name__}({arg_summaries(args, kwargs)})")
         try:
             result = fn(*args, **kwargs)
             elapsed_ms = int((time.perf_counter() - start) * 1000)
-            # Summarize result without dumping huge payloads
-            summary = None
-            if isinstance(result, (str, bytes)):
-                summary = f"{type(result).__name__}[len={len(result)}]"
-            elif hasattr(result, "shape"):
-                summary = (
-                    f"{type(result).__name__}[shape={getattr(result, 'shape', None)}]"
-                )
-            elif isinstance(result, (list, tuple, dict)):
-                summary = f"{type(result).__name__}[len={len(result)}]"
-            else:
-                summary = type(result).__name__
-            logger.info(f"RETURN {fn.__name__} -> {summary} in {elapsed_ms} ms")
+            logger.info(f"RETURN {fn.__name__} -> {_summarize_result(result)} in {elapsed_ms} ms")
             return result
         except Exception:
             elapsed_ms = int((time.perf_counter() - start) * 1000)
@@ -97,7 +124,8 @@ def log_call(fn):
 class ProcessingService:
     """Refactored ETX batch utilities integrated with the project code style.
     All previous helpers in etxbatch.py are converted into instance methods.
-    I/O is routed through the logger, and network calls use timeouts.
+    I/O is routed through the logger, and ETX calls go through the asyncio
+    ``ETXClient`` so flows never block the event loop on the network.
     """
 
     def __init__(self, logger: Optional[logging.Logger] = None) -> None:
@@ -112,10 +140,10 @@ class ProcessingService:
             self.logger.addHandler(handler)
         self.logger.setLevel(logging.INFO)
 
-        # state used by some batch flows
-        self.es_error_count = 0
-        self.es_success_count = 0
-        self.ess_df: Optional[pd.DataFrame] = None
+        # one pooled ETX client per server/account, shared by all flows
+        self._clients: Dict[Tuple[str, str, str], ETXClient] = {}
+        # replaced clients still draining in-flight calls
+        self._retiring: Set[asyncio.Task] = set()
 
     # ----------------------------- basic utilities -----------------------------
     @log_call
@@ -170,60 +198,50 @@ class ProcessingService:
         with open(config_path) as f:
             return json.load(f)
 
-    @log_call
-    def login(self, http_uri: str, email: str, password: str) -> Dict[str, Any]:
-        url = f"{http_uri}/fid-auth"
-        payload = {"login": {"email": email, "password": password}}
-        resp = requests.post(url, json=payload, timeout=30)
-        if resp.status_code != 200:
-            raise RuntimeError("Failed to log in")
-        return resp.json().get("login", {})
-
-    @log_call
-    def connect_websocket(self, ws_uri: str) -> websocket.WebSocket:
-        ws = websocket.create_connection(ws_uri, timeout=30)
-        return ws
-
-    @log_call
-    def wait_for_response(self, ws: websocket.WebSocket) -> Optional[Dict[str, Any]]:
+    def etx_client(self, config: Dict[str, Any]) -> ETXClient:
+        """Return the shared ETX client for the server/account in ``config``."""
+        key = (config.get("HTTPURI", ""), config.get("WSURI", ""), config.get("email", ""))
+        client = self._clients.get(key)
+        if client is None or client.config != config:
+            if client is not None:
+                self._retire(client)
+            client = ETXClient(config, logger=self.logger)
+            self._clients[key] = client
+        return client
+
+    def _retire(self, client: ETXClient) -> None:
+        """Close a replaced client once flows still using it are done."""
         try:
-            return json.loads(ws.recv())
-        except Exception:
-            self.logger.info("Cannot parse json from API response")
-            traceback.print_exc()
-            return None
-
-    # ----------------------------- high level flows ----------------------------
-    @log_call
-    def ws_init(self, config: Dict[str, Any]) -> websocket.WebSocket:
-        http_uri = config["HTTPURI"]
-        ws_uri = config["WSURI"]
-        email = config["email"]
-        password = config["password"]
-
-        login_payload = self.login(http_uri, email, password)
-        fid = login_payload["fid"]
-
-        ws_url = f"{ws_uri}/fid-{fid}"
-        ws = self.connect_websocket(ws_url)
-
-        # set org
-        mid = str(uuid.uuid4())
-        ws.send(self.build_set_org(mid=mid))
-        _ = self.wait_for_response(ws)
-        return ws
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(client.aclose())
+            return
+        task = loop.create_task(client.aclose_when_idle())
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    async def aload_config(self) -> Dict[str, Any]:
+        """``load_config`` off the event loop (it may hit the remote config API)."""
+        return await asyncio.to_thread(self.load_config)
 
     @staticmethod
-    @log_call
-    def build_set_org(mid: Optional[str] = None) -> str:
-        lines: List[str] = []
-        lines.append("#")
-        lines.append("$org = GetOrgs().Orgs.getFirst()")
-        lines.append(f"$args.mid = '{mid}'")
-        lines.append("$args.id = useof $org.owner defto $org.id")
-        lines.append("$args.timeZone = 'Asia/Bangkok'")
-        lines.append("SetOrg($args)\n")
-        return "\n".join(lines)
+    async def read_file_bytes(file: FileSnapshot) -> Optional[bytes]:
+        """Read a snapshot's content from storage off the event loop (no DB access)."""
+        if file.is_folder:
+            return None
+        return await asyncio.to_thread(
+            storage_service.read_file_bytes, file.file_path, file.content_version, file.content_encoding
+        )
+
+    async def aclose(self) -> None:
+        """Close pooled ETX connections (called from the app lifespan on shutdown)."""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
+        retiring = list(self._retiring)
+        for task in retiring:
+            task.cancel()
+        await asyncio.gather(*retiring, return_exceptions=True)
 
     # ----------------------------- csv utilities ------------------------------
     @log_call
@@ -240,6 +258,13 @@ class ProcessingService:
                 raise ValueError("CSV format is incorrect: inconsistent columns")
             return rows
 
+    @staticmethod
+    def count_csv_rows(file_bytes: bytes) -> int:
+        """Data records of a CSV with a header row; quoted fields may span lines, blank lines are skipped."""
+        text = file_bytes.decode("utf-8", errors="replace")
+        records = sum(1 for record in csv.reader(io.StringIO(text, newline="")) if record)
+        return max(records - 1, 0)
+
     @log_call
     def create_temp_folder(self) -> str:
         tmp = "etxtemp"
@@ -264,38 +289,55 @@ class ProcessingService:
 
     # ------------------------------- http utils -------------------------------
     @log_call
-    def ext_request(
+    async def ext_request(
         self,
         method: str,
         api_name: str,
         headers: Optional[Dict[str, str]] = None,
         data: Any = None,
-    ) -> requests.Response:
-        config = self.load_config()
-        uri = config.get("HTTPURI", "")
-        api_key = config.get("API_KEY", "")
-        api_version = config.get("API_VERSION", "ctx/v1")
-        url = f"{uri}/{api_version}/{api_name}"
-
-        headers = headers.copy() if headers else {}
-        headers.update({"DTX-DS-KEY": api_key})
-        return requests.request(method, url, headers=headers, data=data, timeout=60)
+        config: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ):
+        config = config or await self.aload_config()
+        return await self.etx_client(config).request(
+            method, api_name, headers=headers, data=data, timeout=timeout
+        )
 
     @log_call
-    def get_all_es(self) -> pd.DataFrame:
-        response = self.ext_request(method="GET", api_name="GetAllESs", data="")
+    async def get_all_es(self, config: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        response = await self.ext_request(
+            method="GET", api_name="GetAllESs", data="", config=config
+        )
         es_json = response.json()
         df = pd.DataFrame(es_json["GetAllESs"]["Results"]["EmissionSources"])
         self.logger.info(df)
         return df
 
     @log_call
-    def publish_bar_data(
+    async def get_es_catalog(
+        self, config: Dict[str, Any], max_age: Optional[float] = None
+    ) -> EsCatalog:
+        """Node-wide ES catalog snapshot for the ETX server in ``config``."""
+
+        async def load():
+            df = await self.get_all_es(config=config)
+            return zip(df["EsFullName"].astype(str), df["EsSID"].astype(str))
+
+        source_key = "|".join(
+            [config.get("HTTPURI", ""), config.get("API_VERSION", "ctx/v1"), config.get("API_KEY", "")]
+        )
+        return await es_catalog_store.get(source_key, load, max_age=max_age)
+
+    @log_call
+    async def publish_bar_data(
         self,
         es_id: str,
         bar_name: str,
         csv_data: str,
+        config: Optional[Dict[str, Any]] = None,
+        report: Optional[RunReport] = None,
     ) -> bool:
+        report = report if report is not None else RunReport("publish_bar_data", "")
 
         self.logger.info(
             f"Publishing BAR data for ES ID: {es_id} and Bar Name: {bar_name}"
@@ -307,68 +349,77 @@ class ProcessingService:
         self.logger.info("--------------------------------")
         self.logger.info("Publishing BAR data")
         self.logger.info(f"Payload: {payload}")
+        report.bytes_sent += len(payload)
 
         try:
-            response = self.ext_request(
-                method="POST", api_name="PublishBARData", data=payload
+            response = await self.ext_request(
+                method="POST", api_name="PublishBARData", data=payload, config=config
             )
             resp_json = response.json()
         except Exception:
+            report.groups_failed += 1
             self.logger.error("PublishBARData returned non-JSON response")
             return False
 
         node = resp_json.get("PublishBARData") or {}
         status_code = node.get("statusCode")
         if status_code != 200:
-            self.es_error_count += 1
+            report.groups_failed += 1
             self.logger.info(f"Can't Publish: {es_id}")
-            self.logger.info(f"Es error count: {self.es_error_count}")
+            self.logger.info(f"Es error count: {report.groups_failed}")
             return False
 
-        self.es_success_count += 1
-        self.logger.info(f"Es success count: {self.es_success_count}")
+        report.groups_published += 1
+        self.logger.info(f"Es success count: {report.groups_published}")
         return True
 
     # ------------------------------ processing --------------------------------
     @log_call
-    def process_csv_file(
+    async def process_csv_file(
         self,
-        data_file: Optional[str] = None,
+        file: Optional[FileSnapshot] = None,
         file_path: Optional[str] = None,
-        db: Session = None,
-        user: User = None,
-    ) -> None:
+        config: Optional[Dict[str, Any]] = None,
+        catalog: Optional[EsCatalog] = None,
+        report: Optional[RunReport] = None,
+    ) -> bool:
+        """Publish one CSV's ES groups. Returns False if the file lacks the ES columns."""
 
-        self.logger.info(f"Processing file: {data_file} or {file_path}")
+        self.logger.info(f"Processing file: {file.id if file else None} or {file_path}")
+        report = report if report is not None else RunReport("process_csv_file", "")
 
-        if self.ess_df is None:
-            raise RuntimeError("ESS dataframe not loaded")
+        if catalog is None:
+            raise RuntimeError("ES catalog not loaded")
 
-        self.logger.info("ESS dataframe loaded")
+        self.logger.info(f"ES catalog loaded ({len(catalog)} rows)")
 
         csv_data_df = None
         bar_name = None
+        csv_string = None
 
-        if data_file:
-            file_service = FileService(db)
-            file_obj = file_service.get_file_by_id(data_file, str(user.id))
-
-            if not file_obj or file_obj.is_folder or file_obj.mime_type != "text/csv":
+        if file:
+            if file.is_folder or file.mime_type != "text/csv":
                 raise RuntimeError("Invalid file")
 
-            file_bytes = file_service.get_file_content(data_file, str(user.id))
-            csv_string = file_bytes.decode("utf-8", errors="replace")
-            csv_string = csv_string.replace("\r\n", "\n")
-            csv_data_df = pd.read_csv(io.StringIO(csv_string))
-            bar_name = file_obj.original_filename.split(".")[0].split("/")[-1]
+            with report.stage("read"):
+                file_bytes = await self.read_file_bytes(file)
+            if file_bytes is None:
+                raise RuntimeError("Invalid file")
+            with report.stage("parse"):
+                csv_string = file_bytes.decode("utf-8", errors="replace")
+                csv_string = csv_string.replace("\r\n", "\n")
+                csv_data_df = pd.read_csv(io.StringIO(csv_string))
+            bar_name = file.original_filename.split(".")[0].split("/")[-1]
             if not bar_name:
-                bar_name = file_obj.original_filename.split(".")[0]
+                bar_name = file.original_filename.split(".")[0]
         else:
-            csv_data_df = pd.read_csv(file_path)
+            with report.stage("parse"):
+                csv_data_df = pd.read_csv(file_path)
             bar_name = os.path.splitext(os.path.basename(file_path))[0]
 
         if csv_data_df is None:
             raise RuntimeError("CSV data dataframe not loaded")
+        report.rows += len(csv_data_df)
 
         # Process CSV data
         self.logger.info("--------------------------------")
@@ -390,6 +441,16 @@ class ProcessingService:
             )
             grouped = csv_data_df.groupby([full_es_column])
 
+            # Publish groups concurrently; the semaphore bounds in-flight calls
+            semaphore = asyncio.Semaphore(max(1, settings.ETX_PUBLISH_CONCURRENCY))
+
+            async def publish(es_id: str, csv_payload: str) -> bool:
+                async with semaphore:
+                    return await self.publish_bar_data(
+                        es_id, bar_name, csv_payload, config=config, report=report
+                    )
+
+            publishes = []
             for _, group_df in grouped:
                 es_fullname = (
                     group_df[full_es_column].iloc[0]
@@ -402,165 +463,209 @@ class ProcessingService:
 
                 es_id = ""
                 if es_fullname:
-                    filtered_df = self.ess_df[
-                        self.ess_df[full_es_column].str.contains(
-                            es_fullname.replace(":", "/"), regex=False
-                        )
-                    ]
-                    if not filtered_df.empty:
-                        es_id = str(filtered_df["EsSID"].iloc[0])
+                    es_id = catalog.find_es_id(es_fullname.replace(":", "/")) or ""
 
                 csv_payload = group_df.to_csv(index=False)
                 if es_id and bar_name:
-                    self.publish_bar_data(es_id, bar_name, csv_payload)
+                    publishes.append(publish(es_id, csv_payload))
                 else:
+                    report.groups_skipped += 1
                     self.logger.error(
                         f"Can't Find Emission Source ID for: {es_fullname}"
                     )
+            if publishes:
+                with report.stage("publish"):
+                    await asyncio.gather(*publishes)
         else:
             self.logger.info("File is invalid")
+            return False
+        return True
 
     @log_call
-    def process_folder(self, data_folder: str) -> bool:
+    async def process_folder(self, data_folder: str) -> bool:
+        config = await self.aload_config()
+        catalog = await self.get_es_catalog(config)
         for root, _dirs, files in os.walk(data_folder):
             for file in files:
                 if file.endswith(".csv"):
-                    self.process_csv_file(file_path=os.path.join(root, file))
+                    await self.process_csv_file(
+                        file_path=os.path.join(root, file), config=config, catalog=catalog
+                    )
         return True
 
+    def save_report(self, report: RunReport) -> None:
+        """Persist a finished run; a failure here must not hide the run's own outcome."""
+        report.finish()
+        try:
+            with session_scope() as db:
+                db.add(report.to_model())
+        except Exception as e:
+            self.logger.error(f"Cannot save run report for {report.action}: {e}")
+
+    @staticmethod
+    def run_tenant(config: Dict[str, Any]) -> Optional[str]:
+        tenant = config.get("tenant")
+        if tenant:
+            return tenant
+        if config.get("email") and config.get("HTTPURI"):
+            return f"{config['email']}@{config['HTTPURI']}"
+        return None
+
     # ------------------------------- public APIs -------------------------------
     @log_call
-    def ingestes(
+    async def ingestes(
         self,
         data_file: Optional[str] = None,
         offset: int = 0,
         nrows: int = 100000,
-        db: Session = None,
         user: User = None,
         delOnComplete: bool = False,
         mid: Optional[str] = str(uuid.uuid4()),
-    ) -> str:
+    ) -> RunReport:
 
-        config = self.load_config()
-        ws = self.ws_init(config)
+        report = RunReport(action="ingestes", user_id=str(user.id), source_file_id=data_file)
+        try:
+            await self._ingestes(report, data_file, offset, nrows, user, mid)
+        except Exception as e:
+            report.fail("error", e)
+            raise
+        finally:
+            self.save_report(report)
+        return report
+
+    async def _ingestes(
+        self,
+        report: RunReport,
+        data_file: Optional[str],
+        offset: int,
+        nrows: int,
+        user: User,
+        mid: Optional[str],
+    ) -> None:
+        config = await self.aload_config()
+        report.tenant = self.run_tenant(config)
         folder = config.get("ServerFileFolder", "")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        file_service = FileService(db)
-        file_bytes = file_service.get_file_content(data_file, str(user.id))
-        file_name, file_extension = file_service.get_file_name_and_extension(
-            data_file, str(user.id)
-        )
-        if not file_bytes or not file_name or not file_extension:
-            ws.close()
-            return "error"
+        # Resolve metadata in a short transaction; the ETX run below holds no DB connection
+        with report.stage("resolve"), session_scope() as db:
+            file = FileService(db).snapshot_file(data_file, str(user.id))
+        if not file or file.is_folder or not file.filename:
+            report.fail("error")
+            return
+        file_name = file.filename
+        file_extension = os.path.splitext(os.path.basename(file.filename))[1] or None
+        with report.stage("read"):
+            file_bytes = await self.read_file_bytes(file)
+        if not file_bytes or not file_extension:
+            report.files_failed += 1
+            report.fail("error")
+            return
+        with report.stage("parse"):
+            report.rows = self.count_csv_rows(file_bytes)
 
         file_full_name = f"{file_name}_{timestamp}{file_extension}"
 
         try:
-            base64_string = base64.b64encode(file_bytes).decode("utf-8")
+            with report.stage("encode"):
+                base64_string = base64.b64encode(file_bytes).decode("utf-8")
         except Exception as e:
             traceback.print_exc()
             self.logger.error(f"An error occurred: {e}")
-            ws.close()
-            return "error"
-
-        print("file_full_name: ", file_full_name)
-        print("base64_string: ", base64_string)
-
-        payload = json.dumps(
-            {
-                "UploadBase64Imp": {
-                    "mid": mid,
-                    "fileName": file_full_name,
-                    "content": base64_string,
-                }
-            }
-        )
-        self.logger.info("Uploading base64 file")
-        print("[ingestes] payload: ", payload)
-        ws.send(payload)
-        response1 = self.wait_for_response(ws) or {}
-        status1 = response1.get("status", "error") or "error"
-        print("[ingestes] response: ", response1)
-        print("[ingestes] status: ", status1)
-
-        try:
-            uploaded_file_path = (
-                response1.get("UploadBase64Imp", {}).get("Message", {}).get("FilePath")
-            )
-        except Exception:
-            traceback.print_exc()
-            self.logger.error("Cannot upload data file!")
-
-        if not uploaded_file_path:
-            ws.close()
-            return "error"
-
-        ingest_payload = json.dumps(
-            {
-                "PyRequest": {
-                    "app": "etx_batch",
-                    "value": {
-                        "Input": {
-                            "action": "es_data_importer",
-                            "data_file_path": os.path.join(folder, uploaded_file_path),
-                            "offset": offset,
-                            "nrows": nrows,
-                            "tracking": True,
-                        }
-                    },
-                }
+            report.files_failed += 1
+            report.fail("error", e)
+            return
+
+        self.logger.info(f"[ingestes] file_full_name: {file_full_name}")
+
+        async with self.etx_client(config).session() as ws:
+            self.logger.info("Uploading base64 file")
+            with report.stage("upload"):
+                response1 = await ws.upload_base64(file_full_name, base64_string, mid=mid) or {}
+            report.bytes_sent += len(base64_string)
+            status1 = response1.get("status", "error") or "error"
+            self.logger.info(f"[ingestes] response: {response1}")
+            self.logger.info(f"[ingestes] status: {status1}")
+
+            uploaded_file_path = None
+            try:
+                uploaded_file_path = (
+                    response1.get("UploadBase64Imp", {}).get("Message", {}).get("FilePath")
+                )
+            except Exception:
+                traceback.print_exc()
+                self.logger.error("Cannot upload data file!")
+
+            if not uploaded_file_path:
+                report.files_failed += 1
+                report.fail("error")
+                return
+
+            ingest_input = {
+                "action": "es_data_importer",
+                "data_file_path": os.path.join(folder, uploaded_file_path),
+                "offset": offset,
+                "nrows": nrows,
+                "tracking": True,
             }
-        )
+            self.logger.info(f"[ingestes] ingest_input: {ingest_input}")
+            with report.stage("import"):
+                response2 = await ws.py_request("etx_batch", ingest_input) or {}
+            status2 = response2.get("status", "error") or "error"
+            self.logger.info(f"[ingestes] status: {status2}")
+            self.logger.info(f"[ingestes] response: {response2}")
 
-        print("[ingestes] ingest_payload: ", ingest_payload)
-        ws.send(ingest_payload)
-        response2 = self.wait_for_response(ws)
-        status2 = response2.get("status", "error") or "error"
-        print("[ingestes] status: ", status2)
-        print("[ingestes] response: ", response2)
-
-        ws.close()
-        return "Successfully!"
+        report.files_processed += 1
+        report.message = "Successfully!"
 
     @log_call
-    def ingestbar(
+    async def ingestbar(
         self,
         data_file: Optional[str] = None,
-        db: Session = None,
         user: User = None,
         delOnComplete: bool = False,
         mid: Optional[str] = str(uuid.uuid4()),
-    ) -> str:
+    ) -> RunReport:
+
+        report = RunReport(action="ingestbar", user_id=str(user.id), source_file_id=data_file)
+        try:
+            await self._ingestbar(report, data_file, user)
+        except Exception as e:
+            report.fail("error", e)
+            raise
+        finally:
+            self.save_report(report)
+        return report
 
-        file_service = FileService(db)
-        data_folder = file_service.get_folder_path(data_file, str(user.id))
+    async def _ingestbar(self, report: RunReport, data_file: Optional[str], user: User) -> None:
+        # Resolve the folder and its listing up front, then release the connection
+        with report.stage("resolve"), session_scope() as db:
+            file_service = FileService(db)
+            data_folder = file_service.get_folder_path(data_file, str(user.id))
+            files = (
+                file_service.snapshot_folder_files(str(user.id), data_folder)
+                if data_folder
+                else []
+            )
         if not data_folder:
-            return "error file not found"
+            report.fail("error file not found")
+            return
         self.logger.info(f"[ingestbar] input data_folder: {data_folder}")
 
-        self.es_error_count = 0
-        self.es_success_count = 0
-        self.ess_df = self.get_all_es()
-
-        start_time = datetime.now()
-        self.logger.info(f"Start Time: {start_time}")
-
-        # self.process_folder(data_folder=os.path.join(folder, data_folder or ""))
+        config = await self.aload_config()
+        report.tenant = self.run_tenant(config)
+        with report.stage("catalog"):
+            catalog = await self.get_es_catalog(config)
 
+        self.logger.info(f"Start Time: {report.started_at}")
         self.logger.info(f"Checking files in folder: {data_folder} for user: {user.id}")
 
-        files = file_service.get_user_files(
-            user_id=str(user.id), folder_path=data_folder
-        )
-        # files = file_service.get_all_user_files(str(user.id))
-
         for file in files:
             if file.is_folder or file.mime_type != "text/csv":
                 self.logger.info(
                     f"Skipping file: {file.original_filename} because it is a folder or not a CSV file"
                 )
+                report.files_skipped += 1
                 continue
 
             self.logger.info("--------------------------------")
@@ -571,145 +676,102 @@ class ProcessingService:
             self.logger.info(f"File MIME Type: {file.mime_type}")
             self.logger.info(f"File Folder Path: {file.folder_path}")
             self.logger.info(f"File Is Folder: {file.is_folder}")
-            self.logger.info(f"File Parent ID: {file.parent_id}")
             self.logger.info(f"File Uploaded At: {file.uploaded_at}")
             self.logger.info(f"File Updated At: {file.updated_at}")
 
-            self.process_csv_file(
-                data_file=file.id, file_path=file.file_path, db=db, user=user
-            )
-
-        end_time = datetime.now()
-        self.logger.info(f"End Time: {end_time}")
-        return "Successfully!!"
+            try:
+                processed = await self.process_csv_file(
+                    file=file, config=config, catalog=catalog, report=report
+                )
+            except Exception:
+                report.files_failed += 1
+                raise
+            if processed:
+                report.files_processed += 1
+            else:
+                report.files_skipped += 1
 
-    @log_call
-    def addtenant(self, tenant_name: Optional[str] = None) -> str:
-        config = self.load_config()
-        ws = self.ws_init(config)
-        payload = json.dumps(
-            {"CreateTenantAccount": {"Name": tenant_name, "AutoCreateDatabase": True}}
+        report.finish()
+        self.logger.info(f"End Time: {report.finished_at}")
+        self.logger.info(
+            f"[ingestbar] published: {report.groups_published}, failed: {report.groups_failed}, "
+            f"skipped: {report.groups_skipped}, wall: {report.wall_time_ms} ms"
         )
+        report.message = "Successfully!!"
 
-        self.logger.info(f"[addtenant] payload: {payload}")
-        ws.send(payload)
-        response = self.wait_for_response(ws)
+    @log_call
+    async def addtenant(self, tenant_name: Optional[str] = None) -> str:
+        config = await self.aload_config()
+        async with self.etx_client(config).session() as ws:
+            response = await ws.create_tenant_account(tenant_name) or {}
         status = response.get("status", "error") or "error"
         self.logger.info(f"[addtenant] status: {status}")
         self.logger.info(f"[addtenant] response: {response}")
-
-        ws.close()
         return "Successfully!"
 
     @log_call
-    def createorg(
+    async def createorg(
         self,
         data_file: Optional[str] = None,
         tenant_name: Optional[str] = None,
-        db: Session = None,
         user: User = None,
         delOnComplete: bool = False,
         mid: Optional[str] = str(uuid.uuid4()),
     ) -> str:
 
-        config = self.load_config()
-        ws = self.ws_init(config)
-        file_service = FileService(db)
-        file_bytes = file_service.get_file_content(data_file, str(user.id))
+        config = await self.aload_config()
+        with session_scope() as db:
+            file = FileService(db).snapshot_file(data_file, str(user.id))
+        file_bytes = await self.read_file_bytes(file) if file else None
         if not file_bytes:
-            ws.close()
             return "error"
         csv_string = file_bytes.decode("utf-8", errors="replace")
-        # Escape for embedding inside single-quoted payload: escape backslashes, single quotes, and newlines
         csv_string = csv_string.replace("\r\n", "\n")
 
-        if tenant_name:
-            payload = json.dumps({"GetOrgs": {"mid": mid}})
-            self.logger.info(f"[createorg] payload: {payload}")
-            ws.send(payload)
-            resp = self.wait_for_response(ws) or {}
-            dict_org = (resp.get("GetOrgs", {}) or {}).get("Orgs", {})
-            org_id = ""
-            for key, value in dict_org.items():
-                if value.get("name") == tenant_name:
-                    org_id = key
-            setorg = json.dumps({"SetOrg": {"mid": mid, "id": org_id}})
-            self.logger.info(f"[createorg] setorg: {setorg}")
-            ws.send(setorg)
-            _ = self.wait_for_response(ws)
-
-        payload = json.dumps(
-            {"CreateOrgStructureFromCsv": {"mid": mid, "data": csv_string}}
-        )
-
-        self.logger.info(f"[createorg] payload: {payload}")
-        ws.send(payload)
-        response = self.wait_for_response(ws)
+        async with self.etx_client(config).session() as ws:
+            if tenant_name:
+                dict_org = await ws.get_orgs(mid=mid)
+                org_id = ""
+                for key, value in dict_org.items():
+                    if value.get("name") == tenant_name:
+                        org_id = key
+                self.logger.info(f"[createorg] setorg: {org_id}")
+                await ws.set_org(mid=mid, org_id=org_id)
+
+            self.logger.info(f"[createorg] CreateOrgStructureFromCsv: {len(csv_string)} chars")
+            response = await ws.create_org_structure_from_csv(csv_string, mid=mid) or {}
         status = response.get("status", "error") or "error"
         self.logger.info(f"[createorg] status: {status}")
         self.logger.info(f"[createorg] response: {response}")
-
-        ws.close()
         return "Successfully!"
 
     @log_call
-    def updateversion(
+    async def updateversion(
         self, version: Optional[str] = None, mid: Optional[str] = str(uuid.uuid4())
     ) -> str:
-        config = self.load_config()
-        ws = self.ws_init(config)
-        formatted_date = datetime.now().strftime("%d-%m-%Y")
-        payload = json.dumps(
-            {
-                "SetVersion": {
-                    "mid": mid,
-                    "etxVersion": version,
-                    "releaseDate": formatted_date,
-                    "description": "dev server",
-                }
-            }
-        )
-
-        self.logger.info(f"[updateversion] payload: {payload}")
-        ws.send(payload)
-        response = self.wait_for_response(ws)
+        config = await self.aload_config()
+        async with self.etx_client(config).session() as ws:
+            response = await ws.set_version(version, description="dev server", mid=mid) or {}
         status = response.get("status", "error") or "error"
         self.logger.info(f"[updateversion] status: {status}")
         self.logger.info(f"[updateversion] response: {response}")
-
-        ws.close()
         return "Successfully!"
 
     @log_call
-    def generateschemeorg(
+    async def generateschemeorg(
         self,
-        db: Session = None,
         user: User = None,
         mid: Optional[str] = str(uuid.uuid4()),
     ) -> str:
-        config = self.load_config()
-        ws = self.ws_init(config)
-        payload = json.dumps(
-            {
-                "PyRequest": {
-                    "app": "genie_scheme_coordinator_app",
-                    "value": {
-                        "Input": {
-                            "mid": mid,
-                            "action": "scheme_up_organization",
-                        },
-                    },
-                }
-            }
-        )
-        print("[generateschemeorg] payload: ", payload)
-        ws.send(payload)
-        response = self.wait_for_response(ws)
+        config = await self.aload_config()
+        async with self.etx_client(config).session() as ws:
+            response = await ws.py_request(
+                "genie_scheme_coordinator_app",
+                {"mid": mid, "action": "scheme_up_organization"},
+            ) or {}
         status = response.get("status", "error") or "error"
-        print("[generateschemeorg] status: ", status)
-        print("[generateschemeorg] response: ", response)
-
-        ws.close()
+        self.logger.info(f"[generateschemeorg] status: {status}")
+        self.logger.info(f"[generateschemeorg] response: {response}")
         return "Success!"
 
 
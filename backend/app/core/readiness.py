@@ -0,0 +1,163 @@
+"""
+Startup warm-up of processing dependencies and the readiness report behind /ready
+"""
+import asyncio
+import importlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import engine
+
+logger = logging.getLogger("processing")
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class Readiness:
+    """Tracks the warm-up state and latency of each dependency."""
+
+    def __init__(self) -> None:
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.checks: Dict[str, Dict[str, Any]] = {}
+        self.steps: Dict[str, Callable[[], Awaitable[Any]]] = {}  # re-run while a required one fails
+
+    def register(self, name: str) -> None:
+        self.checks[name] = {"status": PENDING, "latency_ms": None, "error": None}
+
+    async def run(self, name: str, step: Callable[[], Awaitable[Any]]) -> bool:
+        self.steps[name] = step
+        start = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            self.checks[name].update(
+                status=FAILED,
+                latency_ms=int((time.perf_counter() - start) * 1000),
+                error=str(e) or type(e).__name__,
+            )
+            logger.warning(f"Warm-up step {name} failed: {e}")
+            return False
+        self.checks[name].update(
+            status=READY, latency_ms=int((time.perf_counter() - start) * 1000)
+        )
+        return True
+
+    @property
+    def is_ready(self) -> bool:
+        if not settings.WARMUP_ON_STARTUP:
+            return True
+        if self.finished_at is None:
+            return False
+        return all(
+            self.checks.get(name, {}).get("status") == READY
+            for name in settings.WARMUP_REQUIRED
+        )
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.is_ready else "warming_up" if self.finished_at is None else "unavailable",
+            "warmup_enabled": settings.WARMUP_ON_STARTUP,
+            "warmup_ms": (
+                int((self.finished_at - self.started_at) * 1000)
+                if self.started_at is not None and self.finished_at is not None
+                else None
+            ),
+            "dependencies": self.checks,
+        }
+
+    def _failed_required(self) -> list:
+        return [
+            name for name in self.checks
+            if name in settings.WARMUP_REQUIRED and self.checks[name]["status"] != READY
+        ]
+
+    async def retry_required(self) -> None:
+        """Re-run failed required steps with exponential backoff until all are ready.
+
+        A dependency that is briefly down at startup (Postgres coming up a
+        second later) must not keep /ready at 503 for the life of the process.
+        Steps are retried in registration order, so the config comes back
+        before the ETX steps that were skipped for lack of it.
+        """
+        delay = settings.WARMUP_RETRY_INITIAL_SECONDS
+        while failed := self._failed_required():
+            await asyncio.sleep(delay)
+            for name in failed:
+                step = self.steps.get(name)
+                if step is not None:
+                    await self.run(name, step)
+            delay = min(delay * 2, settings.WARMUP_RETRY_MAX_SECONDS)
+        logger.info(f"Required warm-up steps recovered: {self.report()}")
+
+    async def warm_up(self) -> None:
+        """Prime config, ETX login, ES catalog, DB pool and pandas.
+
+        Independent steps run concurrently; the ETX steps wait for the config.
+        Failed required steps are then retried in the background of this task.
+        """
+        # Imported here: processing pulls in pandas and the file services
+        from app.core.processing import processing_service
+
+        for name in ("pandas", "database", "config", "etx_login", "es_catalog"):
+            self.register(name)
+        self.started_at = time.perf_counter()
+        config: Dict[str, Any] = {}
+
+        async def load_pandas() -> None:
+            await asyncio.to_thread(importlib.import_module, "pandas")
+
+        async def fill_pool() -> None:
+            await asyncio.to_thread(_fill_db_pool, settings.DB_POOL_SIZE)
+
+        async def load_config() -> None:
+            config.update(await processing_service.aload_config())
+
+        async def etx_login() -> None:
+            await processing_service.etx_client(config).login()
+
+        async def es_catalog() -> None:
+            await processing_service.get_es_catalog(config)
+
+        async def etx_chain() -> None:
+            if not await self.run("config", load_config):
+                for name, step in (("etx_login", etx_login), ("es_catalog", es_catalog)):
+                    self.checks[name].update(status=SKIPPED, error="config unavailable")
+                    self.steps[name] = step
+                return
+            await asyncio.gather(self.run("etx_login", etx_login), self.run("es_catalog", es_catalog))
+
+        try:
+            await asyncio.gather(
+                self.run("pandas", load_pandas),
+                self.run("database", fill_pool),
+                etx_chain(),
+            )
+        finally:
+            self.finished_at = time.perf_counter()
+            logger.info(f"Warm-up finished: {self.report()}")
+        if self._failed_required():
+            await self.retry_required()
+
+
+def _fill_db_pool(size: int) -> None:
+    """Open ``size`` pooled connections up front so first requests don't pay for them."""
+    connections = []
+    try:
+        for _ in range(max(1, size)):
+            conn = engine.connect()
+            connections.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in connections:
+            conn.close()
+
+
+readiness = Readiness()
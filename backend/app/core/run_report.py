@@ -0,0 +1,121 @@
+"""
+Structured report of one processing run (throughput, error counts, stage timings)
+"""
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from app.models.processing_run import ProcessingRun
+
+
+@dataclass
+class RunReport:
+    """Counters and timings collected while a run executes.
+
+    Each run owns its own instance, so concurrent runs never share counters.
+    """
+    action: str
+    user_id: str
+    tenant: Optional[str] = None
+    source_file_id: Optional[str] = None
+    status: str = "success"
+    message: Optional[str] = None
+    error: Optional[str] = None
+    files_processed: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    rows: int = 0
+    groups_published: int = 0
+    groups_skipped: int = 0
+    groups_failed: int = 0
+    bytes_sent: int = 0
+    stages_ms: Dict[str, int] = field(default_factory=dict)
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+    _end: Optional[float] = field(default=None, repr=False)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Accumulate wall time spent in ``name`` (a stage may be entered many times)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = int((time.perf_counter() - start) * 1000)
+            self.stages_ms[name] = self.stages_ms.get(name, 0) + elapsed
+
+    def fail(self, message: str, error: Optional[BaseException] = None) -> None:
+        """Mark the run as ended early (``error``) or aborted by an exception (``failed``)."""
+        self.status = "failed" if error is not None else "error"
+        self.message = message
+        if error is not None:
+            self.error = str(error) or type(error).__name__
+
+    def finish(self) -> None:
+        if self._end is None:
+            self._end = time.perf_counter()
+            self.finished_at = datetime.now(timezone.utc)
+
+    @property
+    def wall_time_ms(self) -> int:
+        end = self._end if self._end is not None else time.perf_counter()
+        return int((end - self._start) * 1000)
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        seconds = self.wall_time_ms / 1000
+        if not self.rows or seconds <= 0:
+            return None
+        return round(self.rows / seconds, 2)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "action": self.action,
+            "tenant": self.tenant,
+            "source_file_id": self.source_file_id,
+            "status": self.status,
+            "message": self.message,
+            "error": self.error,
+            "files_processed": self.files_processed,
+            "files_skipped": self.files_skipped,
+            "files_failed": self.files_failed,
+            "rows": self.rows,
+            "groups_published": self.groups_published,
+            "groups_skipped": self.groups_skipped,
+            "groups_failed": self.groups_failed,
+            "bytes_sent": self.bytes_sent,
+            "rows_per_second": self.rows_per_second,
+            "wall_time_ms": self.wall_time_ms,
+            "stages_ms": dict(self.stages_ms),
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def to_model(self) -> ProcessingRun:
+        return ProcessingRun(
+            user_id=uuid.UUID(str(self.user_id)),
+            action=self.action,
+            tenant=self.tenant,
+            source_file_id=self.source_file_id,
+            status=self.status,
+            message=(self.message or "")[:255] or None,
+            error=self.error,
+            files_processed=self.files_processed,
+            files_skipped=self.files_skipped,
+            files_failed=self.files_failed,
+            rows=self.rows,
+            groups_published=self.groups_published,
+            groups_skipped=self.groups_skipped,
+            groups_failed=self.groups_failed,
+            bytes_sent=self.bytes_sent,
+            rows_per_second=self.rows_per_second,
+            wall_time_ms=self.wall_time_ms,
+            stages=json.dumps(self.stages_ms),
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+        )
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, DateTime, BigInteger
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class Blob(Base):
+    """Content-addressed stored object shared by every files row with the same content.
+
+    ``ref_count`` is the number of files rows pointing at ``file_path``;
+    FileService.claim_blobs raises it in the upload transaction and
+    delete_file lowers it, queueing the blob for the collector at zero.
+    """
+    __tablename__ = "blobs"
+
+    checksum = Column(String(64), primary_key=True)  # SHA-256 hex of the content
+    file_path = Column(String(1000), nullable=False, unique=True)  # Path in S3 or local storage
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(BigInteger, nullable=False, default=0, server_default='0')
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<Blob {self.checksum} x{self.ref_count}>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Integer, DateTime, BigInteger
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class BlobDeletion(Base):
+    """Storage object whose files row is gone, waiting for the blob collector.
+
+    Queued in the same transaction as the row delete, so a blob is only
+    removed once the delete has committed and is never forgotten if it fails.
+    """
+    __tablename__ = "blob_deletions"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    file_path = Column(String(1000), nullable=False)  # Path in S3 or local storage
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<BlobDeletion {self.file_path}>"
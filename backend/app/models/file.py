@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, BigInteger
+from sqlalchemy import Column, String, Integer, DateTime, Boolean, ForeignKey, BigInteger, Index, DDL, event, false
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -15,8 +15,15 @@ class File(Base):
     original_filename = Column(String(500), nullable=False)
     file_path = Column(String(1000), nullable=False)  # Path in S3 or local storage
     file_size = Column(BigInteger, nullable=False)  # Size in bytes
+    checksum = Column(String(64), nullable=True)  # SHA-256 hex of the content, computed while uploading
+    content_encoding = Column(String(16), nullable=True)  # Codec of the stored bytes ("gzip", "zstd"); NULL = as uploaded
+    # Folders only: size and number of all files below the folder, kept current by FileService
+    total_size = Column(BigInteger, nullable=False, default=0, server_default='0')
+    total_files = Column(BigInteger, nullable=False, default=0, server_default='0')
     mime_type = Column(String(100), nullable=True)
     folder_path = Column(String(1000), default="/")  # Virtual folder path
+    # Path of the folder that lists this entry (a folder's own path is in folder_path)
+    parent_path = Column(String(1000), nullable=True)
     is_folder = Column(Boolean, default=False)
     parent_id = Column(UUID(as_uuid=True), ForeignKey("files.id"), nullable=True)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -26,6 +33,56 @@ class File(Base):
     user = relationship("User", backref="files")
     parent = relationship("File", remote_side=[id], backref="children")
 
+    __table_args__ = (
+        # One index range scan per folder expansion page, already in keyset order
+        Index(
+            "ix_files_user_parent_listing",
+            "user_id",
+            "parent_path",
+            func.coalesce(is_folder, false()).desc(),
+            "original_filename",
+            "id",
+        ),
+        # Folder listings (equality on folder_path, already in page order) and subtree
+        # prefix matches (folder_path LIKE '/a/%'; text_pattern_ops works in any collation)
+        Index(
+            "ix_files_user_folder_listing",
+            "user_id",
+            "folder_path",
+            func.coalesce(is_folder, false()).desc(),
+            "original_filename",
+            "id",
+            postgresql_ops={"folder_path": "text_pattern_ops"},
+        ),
+        # One row per folder path, so concurrent uploads can create folders with ON CONFLICT DO NOTHING
+        Index(
+            "uq_files_user_folder",
+            "user_id",
+            "folder_path",
+            unique=True,
+            postgresql_where=(is_folder == True),
+            sqlite_where=(is_folder == True),
+        ),
+        # Substring / similarity search on names (pg_trgm); btree_gin lets user_id share the index
+        Index(
+            "ix_files_user_name_trgm",
+            "user_id",
+            "original_filename",
+            postgresql_using="gin",
+            postgresql_ops={"original_filename": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     def __repr__(self):
         return f"<File {self.original_filename}>"
 
+
+
+# Extensions used by ix_files_user_name_trgm, for databases created without Alembic (AUTO_CREATE_DB)
+event.listen(
+    File.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm; CREATE EXTENSION IF NOT EXISTS btree_gin").execute_if(
+        dialect="postgresql"
+    ),
+)
@@ -0,0 +1,42 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, BigInteger, Float, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+from app.core.database import Base
+
+class ProcessingRun(Base):
+    """Persisted report of one ingest run (ingestbar / ingestes)."""
+    __tablename__ = "processing_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    action = Column(String(50), nullable=False)
+    tenant = Column(String(255), nullable=True)  # ETX account the run published to
+    source_file_id = Column(String(64), nullable=True)
+    status = Column(String(20), nullable=False)  # success | error | failed
+    message = Column(String(255), nullable=True)
+    error = Column(String, nullable=True)
+    files_processed = Column(Integer, nullable=False, default=0)
+    files_skipped = Column(Integer, nullable=False, default=0)
+    files_failed = Column(Integer, nullable=False, default=0)
+    rows = Column(BigInteger, nullable=False, default=0)
+    groups_published = Column(Integer, nullable=False, default=0)
+    groups_skipped = Column(Integer, nullable=False, default=0)
+    groups_failed = Column(Integer, nullable=False, default=0)
+    bytes_sent = Column(BigInteger, nullable=False, default=0)
+    rows_per_second = Column(Float, nullable=True)
+    wall_time_ms = Column(Integer, nullable=True)
+    # JSON string: stage name -> wall time in ms
+    stages = Column(String, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_processing_runs_user_started", "user_id", "started_at"),
+        Index("ix_processing_runs_tenant_action_started", "tenant", "action", "started_at"),
+    )
+
+    def __repr__(self):
+        return f"<ProcessingRun {self.action} {self.status}>"
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, ForeignKey, BigInteger
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class UserStorageUsage(Base):
+    """Per-user storage counters, kept in step with files by FileService.
+
+    Adjusted in the same transaction as every file insert/delete and rebuilt
+    from the files table by FileService.rebuild_storage_usage.
+    """
+    __tablename__ = "user_storage_usage"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    total_size = Column(BigInteger, nullable=False, default=0)
+    file_count = Column(BigInteger, nullable=False, default=0)
+    images_count = Column(BigInteger, nullable=False, default=0)
+    pdf_count = Column(BigInteger, nullable=False, default=0)
+    csv_count = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<UserStorageUsage {self.user_id} {self.total_size}>"
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, String, Integer, DateTime, BigInteger, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+from app.core.database import Base
+
+class UploadSession(Base):
+    """Resumable upload in progress: the file announced by the client, sent in
+    ``chunk_size`` chunks (the last one may be shorter) at any order.
+
+    Chunks go to an S3 multipart upload (``storage_upload_id``) or to local
+    part files; the files row is created when the client completes it.
+    """
+    __tablename__ = "upload_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    original_filename = Column(String(500), nullable=False)
+    mime_type = Column(String(100), nullable=True)
+    folder_path = Column(String(1000), nullable=False, default="/")
+    file_path = Column(String(1000), nullable=False)  # Final path in S3 or local storage
+    size = Column(BigInteger, nullable=False)
+    chunk_size = Column(BigInteger, nullable=False)
+    storage_upload_id = Column(String(1024), nullable=True)  # S3 multipart UploadId
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<UploadSession {self.id} {self.original_filename}>"
+
+class UploadSessionPart(Base):
+    """One received chunk of an upload session (part_number = offset // chunk_size + 1)."""
+    __tablename__ = "upload_session_parts"
+
+    session_id = Column(UUID(as_uuid=True), ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True)
+    part_number = Column(Integer, primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    etag = Column(String(255), nullable=True)  # S3 part ETag
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime
+from sqlalchemy import Column, String, Integer, Float, Boolean, DateTime, BigInteger
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -23,3 +23,5 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     # JSON string holding per-user ETX batch configuration
     etx_config = Column(String, nullable=True)
+    # Bumped by every file/folder mutation; versions the cached file tree (ETag)
+    files_version = Column(BigInteger, nullable=False, default=0, server_default='0')
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, field_validator
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, Optional, List
 from datetime import datetime
 import uuid
 
@@ -15,6 +15,8 @@ class FileCreate(FileBase):
     file_path: str
     user_id: str
     parent_id: Optional[str] = None
+    checksum: Optional[str] = None
+    content_encoding: Optional[str] = None
 
 class FileResponse(FileBase):
     id: str
@@ -22,6 +24,9 @@ class FileResponse(FileBase):
     file_path: str
     user_id: str
     parent_id: Optional[str] = None
+    checksum: Optional[str] = None
+    total_size: int = 0  # folders: size of everything below
+    total_files: int = 0  # folders: number of files below
     uploaded_at: datetime
     updated_at: Optional[datetime] = None
     children: Optional[List['FileResponse']] = None
@@ -46,11 +51,12 @@ class FileTreeNode(BaseModel):
     id: str
     name: str
     type: str  # 'file' or 'folder'
-    size: Optional[int] = None
+    size: Optional[int] = None  # folders: size of everything below
     mime_type: Optional[str] = None
     path: str
     uploaded_at: datetime
     children: Optional[List['FileTreeNode']] = None
+    file_count: Optional[int] = None  # folders only: number of files below
 
     @field_validator('id', mode='before')
     @classmethod
@@ -61,6 +67,64 @@ class FileTreeNode(BaseModel):
             return str(v)
         return v
 
+class FolderChildNode(BaseModel):
+    id: str
+    name: str
+    type: str  # 'file' or 'folder'
+    size: Optional[int] = None  # folders: size of everything below
+    mime_type: Optional[str] = None
+    path: str
+    uploaded_at: datetime
+    file_count: Optional[int] = None  # folders only: number of files below
+
+class DirectUploadFile(BaseModel):
+    filename: str
+    size: int = Field(ge=0)
+    content_type: str = "application/octet-stream"
+    relative_path: Optional[str] = None  # webkitRelativePath, as for /upload
+
+class DirectUploadRequest(BaseModel):
+    folder_path: str = "/"
+    files: List[DirectUploadFile] = Field(min_length=1, max_length=1000)
+
+class DirectUploadTarget(BaseModel):
+    key: str
+    url: Optional[str] = None  # single PUT (send ``headers`` with it)
+    headers: Dict[str, str] = {}
+    upload_id: Optional[str] = None  # multipart: PUT part i to part_urls[i - 1], then finalize with the ETags
+    part_size: Optional[int] = None
+    part_urls: List[str] = []
+
+class UploadedPart(BaseModel):
+    part_number: int = Field(ge=1, le=10000)
+    etag: str
+
+class DirectUploadedFile(DirectUploadFile):
+    key: str
+    upload_id: Optional[str] = None
+    parts: List[UploadedPart] = []
+
+class DirectUploadFinalize(BaseModel):
+    folder_path: str = "/"
+    files: List[DirectUploadedFile] = Field(min_length=1, max_length=1000)
+
+class ResumableUploadCreate(BaseModel):
+    filename: str
+    size: int = Field(ge=0)
+    content_type: Optional[str] = None
+    folder_path: str = "/"
+    relative_path: Optional[str] = None  # webkitRelativePath, as for /upload
+
+class ResumableUploadStatus(BaseModel):
+    id: str
+    filename: str
+    size: int
+    chunk_size: int  # PUT chunks of exactly this size (the last one may be shorter) at ?offset=k*chunk_size
+    offset: int  # bytes received without a gap from the start
+    received_bytes: int
+    missing_parts: List[int]  # chunk k starts at offset (k - 1) * chunk_size
+    complete: bool
+
 # Enable forward references
 FileResponse.model_rebuild()
 FileTreeNode.model_rebuild()
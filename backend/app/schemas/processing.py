@@ -0,0 +1,47 @@
+from pydantic import BaseModel, field_validator
+from typing import Optional, Dict
+from datetime import datetime
+import json
+import uuid
+
+class ProcessingRunResponse(BaseModel):
+    id: str
+    user_id: str
+    action: str
+    tenant: Optional[str] = None
+    source_file_id: Optional[str] = None
+    status: str
+    message: Optional[str] = None
+    error: Optional[str] = None
+    files_processed: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    rows: int = 0
+    groups_published: int = 0
+    groups_skipped: int = 0
+    groups_failed: int = 0
+    bytes_sent: int = 0
+    rows_per_second: Optional[float] = None
+    wall_time_ms: Optional[int] = None
+    stages: Dict[str, int] = {}
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    @field_validator('id', 'user_id', mode='before')
+    @classmethod
+    def convert_uuid_to_str(cls, v):
+        if isinstance(v, uuid.UUID):
+            return str(v)
+        return v
+
+    @field_validator('stages', mode='before')
+    @classmethod
+    def parse_stages(cls, v):
+        if not v:
+            return {}
+        if isinstance(v, str):
+            return json.loads(v)
+        return v
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,142 @@
+"""
+Node-local, size-bounded read-through cache of S3 objects for processing reads.
+
+Entries are files named by a hash of the storage path and a validator (the
+content checksum, the row's updated_at or the S3 ETag), so a changed object
+is simply a miss and the stale entry ages out. Every worker on the node
+shares the directory: writes are atomic renames, hits refresh the entry's
+mtime, and eviction removes the least recently used files of the whole
+directory until it is back under the byte limit.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.es_catalog import ensure_private_dir
+
+logger = logging.getLogger("blob_cache")
+
+
+class BlobCache:
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or settings.S3_READ_CACHE_DIR or os.path.join(
+            tempfile.gettempdir(), "etxprocessor-blob-cache"
+        )
+        self.max_bytes = settings.S3_READ_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._dir_checked = False
+        self._approx_bytes: Optional[int] = None  # refreshed from disk on every eviction pass
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path_for(self, file_path: str, validator: str) -> str:
+        digest = hashlib.sha256(f"{file_path}\0{validator}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.blob")
+
+    def _check_dir(self) -> None:
+        if not self._dir_checked:
+            # Cached objects are user files: keep them private to this service account
+            ensure_private_dir(self.directory, "S3_READ_CACHE_DIR")
+            self._dir_checked = True
+
+    def get(self, file_path: str, validator: str) -> Optional[bytes]:
+        self._check_dir()
+        path = self._path_for(file_path, validator)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # LRU order across workers is the files' mtime
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, file_path: str, validator: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return  # would evict everything else and still not fit
+        self._check_dir()
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".fill-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path_for(file_path, validator))
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            if self._approx_bytes is not None:
+                self._approx_bytes += len(data)
+            if self._approx_bytes is None or self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def get_or_load(self, file_path: str, validator: str, load: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """Cached content of ``file_path`` at ``validator``, loading and caching it on a miss."""
+        data = self.get(file_path, validator)
+        if data is not None:
+            return data
+        data = load()
+        if data is not None:
+            try:
+                self.put(file_path, validator, data)
+            except OSError as e:
+                logger.warning(f"Could not cache {file_path}: {e}")
+        return data
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the directory fits (caller holds the lock)."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".blob"):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # evicted by another worker
+            else:
+                self.evictions += 1
+                self.evicted_bytes += size
+            total -= size
+        self._approx_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "evicted_bytes": self.evicted_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+blob_cache = BlobCache()
@@ -0,0 +1,108 @@
+"""
+Collector for the blobs of deleted files.
+
+FileService.delete_file queues the storage paths of removed rows in
+blob_deletions; this deletes them from storage in batches (S3 DeleteObjects
+or parallel local unlinks) and drops them from the queue. Content-addressed
+blobs (STORAGE_DEDUP) are only deleted while no files row references them.
+Paths that fail stay queued and are retried on the next pass. Runs after
+every delete request, every BLOB_GC_INTERVAL_SECONDS in the API workers, or
+from cron (``python -m app.services.blob_gc``). The periodic pass also drops
+abandoned resumable uploads and their chunks.
+"""
+import asyncio
+import logging
+from typing import List, Optional, Set
+
+from sqlalchemy import delete, update
+
+from app.core.config import settings
+from app.core.database import session_scope
+from app.models.blob import Blob
+from app.models.blob_deletion import BlobDeletion
+from app.services.file_service import lock_blob_paths
+from app.services.storage_service import storage_service
+from app.services.upload_session_service import UploadSessionService
+
+logger = logging.getLogger("blob_gc")
+
+
+def _referenced_blobs(db, paths: List[str]) -> Set[str]:
+    """Content-addressed paths among ``paths`` that files rows point at again.
+
+    Unreferenced blob rows are removed; the blob locks stay held until the
+    batch commits, after the storage deletes, so a concurrent upload either
+    claims the blob first or finds it gone and writes it again.
+    """
+    shared = [path for path in paths if path.startswith("blobs/")]
+    if not shared:
+        return set()
+    lock_blob_paths(db, shared)
+    referenced = {
+        path for (path,) in db.query(Blob.file_path).filter(Blob.file_path.in_(shared), Blob.ref_count > 0)
+    }
+    db.execute(delete(Blob).where(Blob.file_path.in_(shared), Blob.ref_count <= 0))
+    return referenced
+
+
+def collect_deleted_blobs(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> int:
+    """Delete queued blobs until the queue is empty (or ``max_batches`` ran); returns blobs deleted."""
+    batch_size = batch_size or settings.BLOB_GC_BATCH_SIZE
+    collected = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batches += 1
+        with session_scope() as db:
+            # Concurrent collectors (other workers, cron) skip the rows this one holds
+            rows = (
+                db.query(BlobDeletion.id, BlobDeletion.file_path)
+                .order_by(BlobDeletion.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not rows:
+                break
+            referenced = _referenced_blobs(db, [path for _, path in rows])
+            deleted = set(storage_service.delete_files([path for _, path in rows if path not in referenced]))
+            # Claimed again by a new upload: nothing to delete
+            done = [row_id for row_id, path in rows if path in deleted or path in referenced]
+            failed = [row_id for row_id, path in rows if path not in deleted and path not in referenced]
+            if done:
+                db.execute(delete(BlobDeletion).where(BlobDeletion.id.in_(done)))
+            if failed:
+                db.execute(
+                    update(BlobDeletion)
+                    .where(BlobDeletion.id.in_(failed))
+                    .values(attempts=BlobDeletion.attempts + 1)
+                )
+        collected += len(deleted)
+        if failed or len(rows) < batch_size:
+            break  # retry failures on the next pass rather than spinning on them
+    return collected
+
+
+def expire_upload_sessions() -> int:
+    """Drop resumable uploads nobody completed within RESUMABLE_UPLOAD_EXPIRE_HOURS."""
+    with session_scope() as db:
+        return UploadSessionService(db).expire_stale()
+
+
+async def collect_periodically(interval: Optional[float] = None) -> None:
+    interval = interval or settings.BLOB_GC_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            collected = await asyncio.to_thread(collect_deleted_blobs)
+            if collected:
+                logger.info(f"Deleted {collected} blobs of removed files")
+            expired = await asyncio.to_thread(expire_upload_sessions)
+            if expired:
+                logger.info(f"Dropped {expired} abandoned resumable uploads")
+        except Exception as e:
+            logger.warning(f"Blob collection failed: {e}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Deleted {collect_deleted_blobs()} blobs of removed files")
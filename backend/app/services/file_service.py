@@ -1,15 +1,194 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
-from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, or_, func, update, select, case, insert, delete, bindparam, cast, literal, false, text, REAL
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from dataclasses import dataclass
+from datetime import datetime
 from app.models.file import File
-from app.schemas.file import FileCreate, FolderCreate, FileTreeNode
+from app.models.user import User
+from app.models.storage_usage import UserStorageUsage
+from app.models.blob_deletion import BlobDeletion
+from app.models.blob import Blob
+from app.schemas.file import FileCreate, FolderCreate, FileTreeNode, FolderChildNode
+import json
 import uuid
 import os
-from app.services.storage_service import storage_service
+from app.services.storage_service import storage_service, blob_path
+from app.utils.cursor import decode_cursor, encode_cursor
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+
+@dataclass(frozen=True)
+class FileSnapshot:
+    """Detached, plain copy of a File row.
+
+    Long-running flows resolve the metadata they need into snapshots inside a
+    short transaction and keep working after the session is closed.
+    """
+    id: str
+    user_id: str
+    filename: str
+    original_filename: str
+    file_path: str
+    file_size: int
+    mime_type: Optional[str]
+    folder_path: str
+    is_folder: bool
+    uploaded_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    checksum: Optional[str] = None
+    content_encoding: Optional[str] = None
+
+    @property
+    def content_version(self) -> Optional[str]:
+        """Validator for caches of the stored content; changes whenever the content may have."""
+        if self.checksum:
+            return self.checksum
+        stamp = self.updated_at or self.uploaded_at
+        return stamp.isoformat() if stamp else None
+
+    @classmethod
+    def from_model(cls, f: File) -> "FileSnapshot":
+        return cls(
+            id=str(f.id),
+            user_id=str(f.user_id),
+            filename=f.filename,
+            original_filename=f.original_filename,
+            file_path=f.file_path,
+            file_size=f.file_size,
+            mime_type=f.mime_type,
+            folder_path=f.folder_path,
+            is_folder=bool(f.is_folder),
+            uploaded_at=f.uploaded_at,
+            updated_at=f.updated_at,
+            checksum=f.checksum,
+            content_encoding=f.content_encoding,
+        )
+
+
+def normalize_folder_path(path: Optional[str]) -> str:
+    """``"docs/2024/"`` -> ``"/docs/2024"``; empty -> ``"/"``."""
+    stripped = (path or "").strip("/")
+    return f"/{stripped}" if stripped else "/"
+
+
+def parent_folder_path(path: Optional[str]) -> str:
+    """Folder that lists the folder at ``path`` (``"/docs/2024"`` -> ``"/docs"``)."""
+    normalized = normalize_folder_path(path)
+    return normalized.rsplit("/", 1)[0] or "/"
+
+
+# Rows per IN-list / multi-row INSERT, well under PostgreSQL's bind parameter limit
+_BATCH_SIZE = 1000
+
+_USAGE_COUNTERS = ("total_size", "file_count", "images_count", "pdf_count", "csv_count")
+_CSV_MIME_TYPES = ('text/csv', 'application/vnd.ms-excel')
+
+
+def usage_delta(files: Iterable[Tuple[Any, int, Optional[str]]], sign: int = 1) -> Dict[str, int]:
+    """Counter changes for ``(is_folder, file_size, mime_type)`` rows added (sign=1) or removed (-1)."""
+    # Folders (and legacy NULL rows) are not counted, as before
+    return grouped_usage_delta(
+        ((mime_type, 1, file_size) for is_folder, file_size, mime_type in files if is_folder is False), sign
+    )
+
+
+def grouped_usage_delta(groups: Iterable[Tuple[Optional[str], int, Optional[int]]], sign: int = 1) -> Dict[str, int]:
+    """Counter changes for ``(mime_type, file_count, total_size)`` aggregates of files."""
+    delta = dict.fromkeys(_USAGE_COUNTERS, 0)
+    for mime_type, count, size in groups:
+        delta["total_size"] += sign * (size or 0)
+        delta["file_count"] += sign * count
+        if mime_type and mime_type.startswith('image/'):
+            delta["images_count"] += sign * count
+        elif mime_type == 'application/pdf':
+            delta["pdf_count"] += sign * count
+        elif mime_type in _CSV_MIME_TYPES:
+            delta["csv_count"] += sign * count
+    return delta
+
+
+def folder_ancestors(folder_path: Optional[str]) -> List[str]:
+    """``"/a/b"`` -> ``["/a/b", "/a"]``: every folder whose rollups include a file in ``folder_path``."""
+    path = normalize_folder_path(folder_path)
+    ancestors = []
+    while path != "/":
+        ancestors.append(path)
+        path = parent_folder_path(path)
+    return ancestors
+
+
+def like_escape(value: str) -> str:
+    """Escape LIKE wildcards in ``value``, with backslash as the escape character."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def lock_blob_paths(db: Session, paths: Iterable[str]) -> None:
+    """Serialize claiming and collecting the same content-addressed blobs.
+
+    Transaction-scoped advisory locks on PostgreSQL, taken in path order so
+    concurrent callers cannot deadlock; no-op elsewhere.
+    """
+    ordered = sorted(set(paths))
+    if not ordered or db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(
+        text(
+            "SELECT pg_advisory_xact_lock(hashtext(p)) "
+            "FROM (SELECT unnest(CAST(:paths AS text[])) AS p ORDER BY 1) locked"
+        ),
+        {"paths": ordered},
+    )
+
+
+def _dialect_insert(db: Session):
+    """INSERT construct with ON CONFLICT support for the session's database."""
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        # Same form pydantic emits: UTC as "Z"
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dump_json(value: Any) -> bytes:
+    """Compact JSON bytes, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+def _by_name(node: Dict[str, Any]) -> str:
+    return node["name"].lower()
+
+
+def _files_first_last(node: Dict[str, Any]) -> Tuple[bool, str]:
+    return (node["type"] == "file", node["name"].lower())
+
 
 class FileService:
+    """File operations on one session.
+
+    Create one per request or job: rows looked up by id are kept for the
+    service's lifetime, so resolving a file's path, name and content in one
+    operation queries it once.
+    """
+
     def __init__(self, db: Session):
         self.db = db
+        self._loaded: Dict[uuid.UUID, File] = {}  # File rows by id, already fetched by this service
 
     def _as_uuid(self, value) -> Optional[uuid.UUID]:
         """Safely parse a UUID from a string or return None if invalid."""
@@ -20,6 +199,26 @@ class FileService:
         except Exception:
             return None
 
+    def _bump_files_version(self, user_uuid: uuid.UUID) -> None:
+        """Invalidate cached trees of the user; runs inside the mutating transaction."""
+        self.db.execute(
+            update(User)
+            .where(User.id == user_uuid)
+            # Keep updated_at for profile changes only
+            .values(files_version=User.files_version + 1, updated_at=User.updated_at)
+        )
+
+    def _bump_files_versions(self, user_uuids: Iterable[uuid.UUID]) -> None:
+        """``_bump_files_version`` for many users in one statement."""
+        user_uuids = list(user_uuids)
+        if user_uuids:
+            self.db.execute(
+                update(User)
+                .where(User.id.in_(user_uuids))
+                .values(files_version=User.files_version + 1, updated_at=User.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+
     def create_file(self, file_data: FileCreate) -> File:
         """Create a new file record"""
         user_uuid = self._as_uuid(file_data.user_id)
@@ -33,23 +232,108 @@ class FileService:
             original_filename=file_data.original_filename,
             file_path=file_data.file_path,
             file_size=file_data.file_size,
+            checksum=file_data.checksum,
+            content_encoding=file_data.content_encoding,
             mime_type=file_data.mime_type,
             folder_path=file_data.folder_path,
             is_folder=file_data.is_folder,
-            parent_id=parent_uuid
+            parent_id=parent_uuid,
+            parent_path=(
+                parent_folder_path(file_data.folder_path)
+                if file_data.is_folder
+                else normalize_folder_path(file_data.folder_path)
+            ),
         )
         self.db.add(db_file)
+        self._bump_files_version(user_uuid)
+        self._apply_usage_delta(
+            user_uuid, usage_delta([(bool(db_file.is_folder), db_file.file_size, db_file.mime_type)])
+        )
+        if not db_file.is_folder:
+            self._apply_folder_rollups(user_uuid, [(db_file.folder_path, db_file.file_size)])
         self.db.commit()
         self.db.refresh(db_file)
         return db_file
 
+    def create_files(self, files_data: List[FileCreate], commit: bool = True) -> List[File]:
+        """Insert many file records with one ``INSERT ... RETURNING`` in one transaction.
+
+        Rows come back in input order, fully loaded, so callers can serialize
+        them without a refresh per row. With ``commit=False`` the caller owns
+        the transaction (and the rollback).
+        """
+        if not files_data:
+            return []
+        rows = []
+        user_uuids = set()
+        for file_data in files_data:
+            user_uuid = self._as_uuid(file_data.user_id)
+            if not user_uuid:
+                raise ValueError("Invalid user_id for file create")
+            user_uuids.add(user_uuid)
+            rows.append({
+                "id": uuid.uuid4(),
+                "user_id": user_uuid,
+                "filename": file_data.filename,
+                "original_filename": file_data.original_filename,
+                "file_path": file_data.file_path,
+                "file_size": file_data.file_size,
+                "checksum": file_data.checksum,
+                "content_encoding": file_data.content_encoding,
+                "mime_type": file_data.mime_type,
+                "folder_path": file_data.folder_path,
+                "is_folder": file_data.is_folder,
+                "parent_id": self._as_uuid(file_data.parent_id) if file_data.parent_id else None,
+                "parent_path": (
+                    parent_folder_path(file_data.folder_path)
+                    if file_data.is_folder
+                    else normalize_folder_path(file_data.folder_path)
+                ),
+            })
+
+        created = list(self.db.scalars(
+            insert(File).returning(File, sort_by_parameter_order=True), rows
+        ))
+        for db_file in created:
+            # New rows have no children; avoid a lazy load per row when serialized
+            set_committed_value(db_file, "children", [])
+        for user_uuid in user_uuids:
+            self._bump_files_version(user_uuid)
+            self._apply_usage_delta(user_uuid, usage_delta(
+                (bool(row["is_folder"]), row["file_size"], row["mime_type"])
+                for row in rows
+                if row["user_id"] == user_uuid
+            ))
+            self._apply_folder_rollups(user_uuid, [
+                (row["folder_path"], row["file_size"])
+                for row in rows
+                if row["user_id"] == user_uuid and not row["is_folder"]
+            ])
+        if commit:
+            self.commit_keep_loaded()
+        return created
+
+    def commit_keep_loaded(self) -> None:
+        """Commit without expiring loaded rows (saves one SELECT per row on serialization)."""
+        expire_on_commit = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        try:
+            self.db.commit()
+        finally:
+            self.db.expire_on_commit = expire_on_commit
+
     def create_folder(self, user_id: str, folder_data: FolderCreate) -> File:
         """Create a new folder"""
         user_uuid = self._as_uuid(user_id)
         if not user_uuid:
             raise ValueError("Invalid user_id for create_folder")
         folder_path = f"{folder_data.parent_path.rstrip('/')}/{folder_data.folder_name}"
-        
+
+        # Folders are unique per path; creating an existing one returns it
+        existing = self._get_folder(user_uuid, folder_path)
+        if existing:
+            return existing
+
         db_folder = File(
             id=uuid.uuid4(),
             user_id=user_uuid,
@@ -59,13 +343,32 @@ class FileService:
             file_size=0,
             mime_type=None,
             folder_path=folder_path,
-            is_folder=True
+            is_folder=True,
+            parent_path=normalize_folder_path(folder_data.parent_path),
         )
         self.db.add(db_folder)
-        self.db.commit()
+        self._bump_files_version(user_uuid)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Created concurrently by another request
+            self.db.rollback()
+            existing = self._get_folder(user_uuid, folder_path)
+            if existing:
+                return existing
+            raise
         self.db.refresh(db_folder)
         return db_folder
 
+    def _get_folder(self, user_uuid: uuid.UUID, folder_path: str) -> Optional[File]:
+        return self.db.query(File).filter(
+            and_(
+                File.user_id == user_uuid,
+                File.is_folder == True,
+                File.folder_path == folder_path
+            )
+        ).first()
+
     def get_user_files(self, user_id: str, folder_path: str = "/") -> List[File]:
         """Get all files in a specific folder for a user"""
         user_uuid = self._as_uuid(user_id)
@@ -76,36 +379,139 @@ class FileService:
                 File.user_id == user_uuid,
                 File.folder_path == folder_path
             )
-        ).order_by(File.is_folder.desc(), File.original_filename).all()
+        ).order_by(func.coalesce(File.is_folder, false()).desc(), File.original_filename, File.id).all()
+
+    def get_user_files_page(
+        self,
+        user_id: str,
+        folder_path: Optional[str] = "/",
+        limit: int = 200,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[File], Optional[str]]:
+        """One page of a folder's entries (``folder_path=None``: all of the user's entries).
 
-    def get_all_user_files(self, user_id: str) -> List[File]:
-        """Get all files for a user regardless of folder"""
+        Keyset-paginated on (is_folder DESC, original_filename, id), so a page
+        costs the same at any depth and entries added or removed meanwhile do
+        not shift later pages. Returns the page and the cursor of the next one
+        (``None`` on the last page). Raises ``ValueError`` for a malformed cursor.
+        """
         user_uuid = self._as_uuid(user_id)
+        after = decode_cursor(cursor, 3)
         if not user_uuid:
-            return []
-        return self.db.query(File).filter(
-            File.user_id == user_uuid
-        ).order_by(File.is_folder.desc(), File.original_filename).all()
-        
+            return [], None
+        q = self.db.query(File).filter(File.user_id == user_uuid)
+        if folder_path is not None:
+            q = q.filter(File.folder_path == folder_path)
+        rows = self._listing_page(q, after).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([bool(last.is_folder), last.original_filename, str(last.id)])
+        return rows, next_cursor
+
+    def _listing_page(self, q, after: Optional[List[Any]]):
+        """Order ``q`` folders first, then by (original_filename, id), starting after a decoded cursor."""
+        is_folder = func.coalesce(File.is_folder, false())  # legacy NULLs sort as files
+        if after is not None:
+            last_folder, last_name, last_id = after
+            last_uuid = self._as_uuid(last_id)
+            if not isinstance(last_folder, bool) or not isinstance(last_name, str) or last_uuid is None:
+                raise ValueError("Invalid cursor")
+            same_kind_after = and_(
+                is_folder == last_folder,
+                or_(
+                    File.original_filename > last_name,
+                    and_(File.original_filename == last_name, File.id > last_uuid),
+                ),
+            )
+            # Folders sort first: after a folder come the remaining folders and every file
+            q = q.filter(or_(same_kind_after, is_folder == False) if last_folder else same_kind_after)
+        return q.order_by(is_folder.desc(), File.original_filename, File.id)
+
+    def get_all_user_files(self, user_id: str) -> Iterator[File]:
+        """Every file and folder of a user, read in keyset pages of ``_BATCH_SIZE`` rows"""
+        cursor = None
+        while True:
+            page, cursor = self.get_user_files_page(user_id, None, _BATCH_SIZE, cursor)
+            yield from page
+            if cursor is None:
+                return
+
     def get_file_by_id(self, file_id: str, user_id: str) -> Optional[File]:
         """Get a specific file by ID"""
         user_uuid = self._as_uuid(user_id)
         file_uuid = self._as_uuid(file_id)
         if not user_uuid or not file_uuid:
             return None
-        return self.db.query(File).filter(
-            and_(
-                File.id == file_uuid,
-                File.user_id == user_uuid
+        f = self._loaded.get(file_uuid)
+        if f is None:
+            f = self.db.query(File).filter(File.id == file_uuid).first()
+            if f is None:
+                return None
+            self._loaded[file_uuid] = f
+        return f if f.user_id == user_uuid else None
+
+    def get_files_by_ids(self, file_ids: Iterable[str], user_id: str) -> Dict[str, File]:
+        """A user's files among ``file_ids``, keyed by id; unknown or foreign ids are left out."""
+        user_uuid = self._as_uuid(user_id)
+        if not user_uuid:
+            return {}
+        wanted = {}
+        for file_id in file_ids:
+            file_uuid = self._as_uuid(file_id)
+            if file_uuid:
+                wanted[str(file_id)] = file_uuid
+        missing = list({u for u in wanted.values() if u not in self._loaded})
+        for start in range(0, len(missing), _BATCH_SIZE):
+            rows = self.db.query(File).filter(File.id.in_(missing[start:start + _BATCH_SIZE])).all()
+            self._loaded.update((f.id, f) for f in rows)
+        found = {}
+        for file_id, file_uuid in wanted.items():
+            f = self._loaded.get(file_uuid)
+            if f is not None and f.user_id == user_uuid:
+                found[file_id] = f
+        return found
+
+    def existing_file_paths(self, user_id: str, file_paths: Iterable[str]) -> set:
+        """The storage paths among ``file_paths`` that a file row of the user already uses."""
+        user_uuid = self._as_uuid(user_id)
+        paths = list(set(file_paths))
+        if not user_uuid or not paths:
+            return set()
+        found = set()
+        for start in range(0, len(paths), _BATCH_SIZE):
+            found.update(
+                path for (path,) in self.db.query(File.file_path).filter(
+                    File.user_id == user_uuid, File.file_path.in_(paths[start:start + _BATCH_SIZE])
+                )
             )
-        ).first()
+        return found
+
+    def snapshot_file(self, file_id: str, user_id: str) -> Optional[FileSnapshot]:
+        """Get a detached snapshot of a user's file or folder."""
+        f = self.get_file_by_id(file_id, user_id)
+        return FileSnapshot.from_model(f) if f else None
+
+    def snapshot_files(self, file_ids: Iterable[str], user_id: str) -> Dict[str, FileSnapshot]:
+        """Detached snapshots of a user's files among ``file_ids``, fetched in batches."""
+        return {
+            file_id: FileSnapshot.from_model(f)
+            for file_id, f in self.get_files_by_ids(file_ids, user_id).items()
+        }
+
+    def snapshot_folder_files(self, user_id: str, folder_path: str = "/") -> List[FileSnapshot]:
+        """Detached snapshots of the entries in a folder, in listing order."""
+        return [FileSnapshot.from_model(f) for f in self.get_user_files(user_id, folder_path)]
 
     def get_file_content(self, file_id: str, user_id: str) -> Optional[bytes]:
         """Return file content as bytes for a user's file_id. None if not found or is a folder."""
         f = self.get_file_by_id(file_id, user_id)
         if not f or f.is_folder:
             return None
-        return storage_service.read_file_bytes(f.file_path)
+        snapshot = FileSnapshot.from_model(f)
+        return storage_service.read_file_bytes(f.file_path, snapshot.content_version, f.content_encoding)
 
     def get_file_path(self, file_id: str, user_id: str) -> Optional[str]:
         """Return file path for a user's file_id. None if not found or is a folder."""
@@ -145,74 +551,229 @@ class FileService:
 
     def ensure_folder_hierarchy(self, user_id: str, folder_path: str) -> None:
         """Ensure that all folders in the given folder_path exist for the user."""
+        self.ensure_folder_hierarchies(user_id, [folder_path])
+
+    def ensure_folder_hierarchies(
+        self, user_id: str, folder_paths: Iterable[str], commit: bool = True
+    ) -> int:
+        """Ensure every folder (and ancestor) in ``folder_paths`` exists for the user.
+
+        All paths of a request are resolved with one SELECT and the missing
+        folders inserted with one ``INSERT ... ON CONFLICT DO NOTHING`` in a
+        single transaction (batched for very large sets). The unique index on
+        (user_id, folder_path) for folders makes concurrent uploads of the same
+        tree safe. Returns the number of folders created. With ``commit=False``
+        the caller owns the transaction.
+        """
         user_uuid = self._as_uuid(user_id)
         if not user_uuid:
-            return
-        if not folder_path or folder_path == '/':
-            return
-
-        # Normalize path (no trailing slash, always starts with '/')
-        normalized = '/' + folder_path.strip('/')
-        parts = [p for p in normalized.split('/') if p]
+            return 0
 
-        current_path = ''
-        for idx, part in enumerate(parts):
-            current_path = f"{current_path}/{part}" if current_path else f"/{part}"
+        wanted = set()
+        for folder_path in folder_paths:
+            normalized = normalize_folder_path(folder_path)
+            while normalized != '/':
+                if normalized in wanted:
+                    break  # its ancestors are already collected
+                wanted.add(normalized)
+                normalized = parent_folder_path(normalized)
+        if not wanted:
+            return 0
 
-            # Does this folder exist?
-            existing = self.db.query(File).filter(
-                and_(
+        existing = set()
+        ordered = sorted(wanted)
+        for i in range(0, len(ordered), _BATCH_SIZE):
+            existing.update(
+                path for (path,) in self.db.query(File.folder_path).filter(
                     File.user_id == user_uuid,
                     File.is_folder == True,
-                    File.folder_path == current_path
+                    File.folder_path.in_(ordered[i:i + _BATCH_SIZE]),
                 )
-            ).first()
-
-            if not existing:
-                folder = File(
-                    id=uuid.uuid4(),
-                    user_id=user_uuid,
-                    filename=part,
-                    original_filename=part,
-                    file_path=current_path,
-                    file_size=0,
-                    mime_type=None,
-                    folder_path=current_path,
-                    is_folder=True,
-                    parent_id=None
-                )
-                self.db.add(folder)
+            )
+        missing = [path for path in ordered if path not in existing]
+        if not missing:
+            return 0
+
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_uuid,
+                "filename": path.rsplit('/', 1)[1],
+                "original_filename": path.rsplit('/', 1)[1],
+                "file_path": path,
+                "file_size": 0,
+                "mime_type": None,
+                "folder_path": path,
+                "is_folder": True,
+                "parent_id": None,
+                "parent_path": parent_folder_path(path),
+            }
+            for path in missing
+        ]
+        try:
+            for i in range(0, len(rows), _BATCH_SIZE):
+                self.db.execute(self._insert_folders_if_absent(rows[i:i + _BATCH_SIZE]))
+            self._bump_files_version(user_uuid)
+            if commit:
                 self.db.commit()
-                self.db.refresh(folder)
+        except Exception:
+            if commit:
+                self.db.rollback()
+            raise
+        return len(missing)
+
+    def _insert_folders_if_absent(self, rows: List[Dict[str, Any]]):
+        return _dialect_insert(self.db)(File).values(rows).on_conflict_do_nothing(
+            index_elements=[File.user_id, File.folder_path],
+            index_where=File.is_folder == True,
+        )
 
     def delete_file(self, file_id: str, user_id: str) -> bool:
-        """Delete a file or folder (and all its contents)"""
+        """Delete a file or folder (and all its contents).
+
+        A folder's subtree goes in one set-based DELETE; counters and ancestor
+        rollups are adjusted from one aggregate query. Stored blobs are queued
+        in blob_deletions in the same transaction and removed afterwards by
+        the blob collector (app.services.blob_gc).
+        """
         file = self.get_file_by_id(file_id, user_id)
         if not file:
             return False
 
         if file.is_folder:
-            # Delete all files in this folder recursively
             self._delete_folder_contents(file.folder_path, user_id)
-
-        self.db.delete(file)
+        else:
+            if file.checksum and file.file_path == blob_path(file.checksum):
+                self._release_blobs({file.checksum: 1})
+            else:
+                self.db.add(BlobDeletion(file_path=file.file_path))
+            self.db.delete(file)
+            self._loaded.pop(file.id, None)
+            self._apply_usage_delta(
+                file.user_id, usage_delta([(file.is_folder, file.file_size, file.mime_type)], sign=-1)
+            )
+            self._apply_folder_rollups(file.user_id, [(file.folder_path, file.file_size)], sign=-1)
+        self._bump_files_version(file.user_id)
         self.db.commit()
         return True
 
-    def _delete_folder_contents(self, folder_path: str, user_id: str):
-        """Recursively delete all contents of a folder"""
+    def _subtree_filter(self, user_uuid: uuid.UUID, folder_path: str):
+        """The folder itself and paths below it, not siblings sharing the prefix ("/a" vs "/ab")"""
+        escaped = like_escape(folder_path.rstrip("/"))
+        return and_(
+            File.user_id == user_uuid,
+            or_(
+                File.folder_path == folder_path,
+                File.folder_path.like(f"{escaped}/%", escape="\\"),
+            ),
+        )
+
+    def _delete_folder_contents(self, folder_path: str, user_id: str) -> int:
+        """Delete a folder row and everything below it in the current transaction.
+
+        Queues the blobs, subtracts the subtree from the usage counters and the
+        ancestors' rollups, then deletes; no row is loaded. Returns the number
+        of files and folders deleted.
+        """
         user_uuid = self._as_uuid(user_id)
         if not user_uuid:
+            return 0
+        subtree = self._subtree_filter(user_uuid, folder_path)
+        groups = (
+            self.db.query(File.mime_type, func.count(File.id), func.sum(File.file_size))
+            .filter(subtree, File.is_folder == False)
+            .group_by(File.mime_type)
+            .all()
+        )
+        if groups:
+            shared = File.file_path.like("blobs/%")
+            self.db.execute(
+                insert(BlobDeletion).from_select(
+                    ["file_path"], select(File.file_path).where(subtree, File.is_folder == False, ~shared)
+                )
+            )
+            self._release_blobs(
+                dict(
+                    self.db.query(File.checksum, func.count(File.id))
+                    .filter(subtree, File.is_folder == False, shared)
+                    .group_by(File.checksum)
+                    .all()
+                )
+            )
+            self._apply_usage_delta(user_uuid, grouped_usage_delta(groups, sign=-1))
+            size = sum(total or 0 for _, _, total in groups)
+            files = sum(count for _, count, _ in groups)
+            # Folders inside the subtree go away; only the ancestors outside it change
+            self._apply_rollup_totals(
+                user_uuid, {path: [-size, -files] for path in folder_ancestors(parent_folder_path(folder_path))}
+            )
+        result = self.db.execute(
+            delete(File).where(subtree).execution_options(synchronize_session=False)
+        )
+        self._loaded.clear()  # which loaded rows were in the subtree is not tracked
+        return result.rowcount
+
+    def claim_blobs(self, stored: Iterable[Any]) -> set:
+        """Reference content-addressed blobs for new files rows, in the current transaction.
+
+        ``stored`` holds one StoredObject (checksum, path, size) per new row.
+        Returns the checksums whose blob is not in storage yet; the caller must
+        write those before committing. The blob locks are held until then, so
+        the collector cannot remove a blob that is being claimed.
+        """
+        counts: Dict[str, int] = {}
+        rows: Dict[str, Dict[str, Any]] = {}
+        for obj in stored:
+            counts[obj.checksum] = counts.get(obj.checksum, 0) + 1
+            rows[obj.checksum] = {"checksum": obj.checksum, "file_path": obj.path, "size": obj.size}
+        if not rows:
+            return set()
+        lock_blob_paths(self.db, (row["file_path"] for row in rows.values()))
+
+        insert_ = _dialect_insert(self.db)
+        ordered = sorted(rows)
+        missing = set()
+        for i in range(0, len(ordered), _BATCH_SIZE):
+            stmt = insert_(Blob).values(
+                [{**rows[checksum], "ref_count": counts[checksum]} for checksum in ordered[i:i + _BATCH_SIZE]]
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Blob.checksum],
+                set_={"ref_count": Blob.ref_count + stmt.excluded.ref_count},
+            ).returning(Blob.checksum, Blob.ref_count)
+            # New rows (and rows whose blob is queued for deletion) need the content written
+            missing.update(checksum for checksum, ref_count in self.db.execute(stmt) if ref_count == counts[checksum])
+        return missing
+
+    def _release_blobs(self, counts: Dict[str, int]) -> None:
+        """Drop ``checksum -> n`` references; queue blobs nothing points at any more."""
+        counts = {checksum: n for checksum, n in counts.items() if checksum}
+        if not counts:
             return
-        files = self.db.query(File).filter(
-            and_(
-                File.user_id == user_uuid,
-                File.folder_path.like(f"{folder_path}%")
+        blobs = Blob.__table__.c
+        self.db.execute(
+            update(Blob.__table__)
+            .where(blobs.checksum == bindparam("b_checksum"))
+            .values(ref_count=blobs.ref_count - bindparam("b_refs")),
+            [{"b_checksum": checksum, "b_refs": n} for checksum, n in counts.items()],
+        )
+        ordered = sorted(counts)
+        for i in range(0, len(ordered), _BATCH_SIZE):
+            self.db.execute(
+                insert(BlobDeletion).from_select(
+                    ["file_path"],
+                    select(Blob.file_path).where(
+                        Blob.checksum.in_(ordered[i:i + _BATCH_SIZE]), Blob.ref_count <= 0
+                    ),
+                )
             )
-        ).all()
-        
-        for file in files:
-            self.db.delete(file)
+
+    def queue_blob_deletions(self, paths: Iterable[str]) -> None:
+        """Hand stored objects to the blob collector (e.g. blobs written by a failed upload)."""
+        rows = [{"file_path": path} for path in paths]
+        if rows:
+            self.db.execute(insert(BlobDeletion), rows)
+            self.db.commit()
 
     def get_file_tree(self, user_id: str) -> List[FileTreeNode]:
         """Get the complete file tree structure for a user"""
@@ -239,11 +800,12 @@ class FileService:
                 id=str(folder.id),
                 name=folder.original_filename,
                 type="folder",
-                size=None,
+                size=folder.total_size,
                 mime_type=None,
                 path=folder.folder_path,
                 uploaded_at=folder.uploaded_at,
-                children=[]
+                children=[],
+                file_count=folder.total_files
             )
             # Map the full path of this folder for easy lookup
             full_path = folder.folder_path.rstrip('/') if folder.folder_path != '/' else '/'
@@ -329,76 +891,411 @@ class FileService:
         
         return result
 
-    def search_files(self, user_id: str, query: str) -> List[File]:
-        """Search files by name"""
+    def get_folder_children(
+        self, user_id: str, folder_path: str = "/", limit: int = 200, cursor: Optional[str] = None
+    ) -> Tuple[List[FolderChildNode], Optional[str]]:
+        """One level of a folder, folders first, keyset-paginated like ``get_user_files_page``.
+
+        Folder entries carry their recursive size and file count from the
+        maintained rollups. Returns the page and the cursor of the next one
+        (``None`` on the last page). Raises ``ValueError`` for a malformed cursor.
+        """
         user_uuid = self._as_uuid(user_id)
+        after = decode_cursor(cursor, 3)
         if not user_uuid:
-            return []
-        return self.db.query(File).filter(
-            and_(
-                File.user_id == user_uuid,
-                File.original_filename.ilike(f"%{query}%")
+            return [], None
+        path = normalize_folder_path(folder_path)
+
+        q = self.db.query(
+            File.id,
+            File.original_filename,
+            File.is_folder,
+            File.file_size,
+            File.mime_type,
+            File.file_path,
+            File.folder_path,
+            File.uploaded_at,
+            File.total_size,
+            File.total_files,
+        ).filter(File.user_id == user_uuid, File.parent_path == path)
+        rows = self._listing_page(q, after).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([bool(last[2]), last[1], str(last[0])])
+        items = [
+            FolderChildNode(
+                id=str(r[0]),
+                name=r[1],
+                type="folder" if r[2] else "file",
+                size=r[8] if r[2] else r[3],
+                mime_type=None if r[2] else r[4],
+                # Folders are addressed by their virtual path, files by the stored path (as in the tree)
+                path=r[6] if r[2] else r[5],
+                uploaded_at=r[7],
+                file_count=r[9] if r[2] else None,
             )
-        ).all()
+            for r in rows
+        ]
+        return items, next_cursor
 
-    def get_storage_usage(self, user_id: str) -> dict:
-        """Get total storage usage for a user"""
+    def get_file_tree_json(self, user_id: str) -> bytes:
+        """``get_file_tree`` rendered straight to JSON bytes.
+
+        Same nodes, order and JSON as the pydantic path, but built from plain
+        column tuples into dicts: no ORM entities, no per-node models and no
+        response-model revalidation.
+        """
         user_uuid = self._as_uuid(user_id)
         if not user_uuid:
+            return b"[]"
+        rows = self.db.query(
+            File.id,
+            File.original_filename,
+            File.is_folder,
+            File.file_size,
+            File.mime_type,
+            File.file_path,
+            File.folder_path,
+            File.uploaded_at,
+            File.total_size,
+            File.total_files,
+        ).filter(
+            File.user_id == user_uuid
+        ).order_by(File.folder_path, File.is_folder.desc(), File.original_filename).all()
+        return dump_json(build_tree_dicts(rows))
+
+    def search_files(
+        self, user_id: str, query: str, limit: int = 50, cursor: Optional[str] = None
+    ) -> Tuple[List[File], Optional[str]]:
+        """Files and folders whose name contains ``query`` (case-insensitive), best match first.
+
+        On PostgreSQL the ILIKE is served by the pg_trgm index and results are
+        ranked by trigram similarity; other databases keep the match and order
+        by name. Pages are keyset-paginated on (rank, name, id): pass the
+        returned cursor to get the next page (``None`` when there is none).
+        Raises ``ValueError`` for a malformed cursor.
+        """
+        user_uuid = self._as_uuid(user_id)
+        after = decode_cursor(cursor, 3)
+        if not user_uuid or not query:
+            return [], None
+
+        pattern = f"%{like_escape(query)}%"
+        if self.db.get_bind().dialect.name == "postgresql":
+            rank = func.similarity(File.original_filename, query)
+        else:
+            rank = literal(0.0, REAL)
+        q = self.db.query(File, rank).filter(
+            File.user_id == user_uuid,
+            File.original_filename.ilike(pattern, escape="\\"),
+        )
+        if after is not None:
+            last_rank, last_name, last_id = after
+            last_rank = cast(literal(float(last_rank)), REAL)  # compare as REAL, the type similarity() returns
+            last_uuid = self._as_uuid(last_id)
+            if last_uuid is None:
+                raise ValueError("Invalid cursor")
+            q = q.filter(
+                or_(
+                    rank < last_rank,
+                    and_(
+                        rank == last_rank,
+                        or_(
+                            File.original_filename > last_name,
+                            and_(File.original_filename == last_name, File.id > last_uuid),
+                        ),
+                    ),
+                )
+            )
+        rows = q.order_by(rank.desc(), File.original_filename, File.id).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last, last_rank = rows[-1]
+            next_cursor = encode_cursor([float(last_rank), last.original_filename, str(last.id)])
+        return [f for f, _ in rows], next_cursor
+
+    def get_storage_usage(self, user_id: str) -> dict:
+        """Get total storage usage for a user (one primary-key read of the counters)"""
+        user_uuid = self._as_uuid(user_id)
+        usage = self.db.get(UserStorageUsage, user_uuid) if user_uuid else None
+        if not usage:
             return {
                 "total_size": 0,
                 "file_count": 0,
                 "by_type": {"images": 0, "pdf": 0, "csv": 0, "others": 0},
             }
-        total_size = self.db.query(func.sum(File.file_size)).filter(
-            and_(
-                File.user_id == user_uuid,
-                File.is_folder == False
-            )
-        ).scalar() or 0
+        others_count = max(usage.file_count - (usage.images_count + usage.pdf_count + usage.csv_count), 0)
+        return {
+            "total_size": usage.total_size,
+            "file_count": usage.file_count,
+            "by_type": {
+                "images": usage.images_count,
+                "pdf": usage.pdf_count,
+                "csv": usage.csv_count,
+                "others": others_count
+            }
+        }
 
-        file_count = self.db.query(File).filter(
-            and_(
-                File.user_id == user_uuid,
-                File.is_folder == False
-            )
-        ).count()
-        # Category counts
-        images_count = self.db.query(func.count()).filter(
-            and_(
-                File.user_id == user_uuid,
-                File.is_folder == False,
-                File.mime_type.isnot(None),
-                File.mime_type.like('image/%')
-            )
+    def get_storage_total_size(self, user_id: str) -> int:
+        """Bytes stored by the user, for quota checks"""
+        user_uuid = self._as_uuid(user_id)
+        if not user_uuid:
+            return 0
+        return self.db.query(UserStorageUsage.total_size).filter(
+            UserStorageUsage.user_id == user_uuid
         ).scalar() or 0
-        pdf_count = self.db.query(func.count()).filter(
-            and_(
-                File.user_id == user_uuid,
-                File.is_folder == False,
-                File.mime_type == 'application/pdf'
+
+    def _apply_folder_rollups(
+        self, user_uuid: uuid.UUID, files: Iterable[Tuple[Optional[str], int]], sign: int = 1
+    ) -> None:
+        """Add (sign=1) or remove (-1) ``(folder_path, file_size)`` files from the
+        rollups of every ancestor folder, in the current transaction.
+
+        One executemany UPDATE per call, one row per distinct ancestor, each an
+        index lookup on (user_id, folder_path). A move is a removal from the old
+        ancestors plus an addition to the new ones.
+        """
+        totals: Dict[str, List[int]] = {}
+        for folder_path, file_size in files:
+            for ancestor in folder_ancestors(folder_path):
+                entry = totals.setdefault(ancestor, [0, 0])
+                entry[0] += sign * (file_size or 0)
+                entry[1] += sign
+        self._apply_rollup_totals(user_uuid, totals)
+
+    def _apply_rollup_totals(self, user_uuid: uuid.UUID, totals: Dict[str, List[int]]) -> None:
+        """Add ``folder_path -> [size, files]`` to the rollups of those folders."""
+        if not totals:
+            return
+        # Core statement: executemany with per-row WHERE values (not ORM bulk-by-PK)
+        files = File.__table__.c
+        self.db.execute(
+            update(File.__table__)
+            .where(
+                files.user_id == bindparam("b_user_id"),
+                files.is_folder == True,
+                files.folder_path == bindparam("b_folder_path"),
             )
-        ).scalar() or 0
-        csv_count = self.db.query(func.count()).filter(
-            and_(
-                File.user_id == user_uuid,
-                File.is_folder == False,
-                or_(
-                    File.mime_type == 'text/csv',
-                    File.mime_type == 'application/vnd.ms-excel'
+            .values(
+                total_size=files.total_size + bindparam("b_size"),
+                total_files=files.total_files + bindparam("b_files"),
+            ),
+            [
+                {"b_user_id": user_uuid, "b_folder_path": path, "b_size": size, "b_files": count}
+                for path, (size, count) in totals.items()
+            ],
+        )
+
+    def rebuild_folder_rollups(self, user_id: Optional[str] = None) -> int:
+        """Recompute folder rollups from the files table (one user, or everyone).
+
+        Returns the number of folders with a non-zero rollup.
+        """
+        user_uuid = self._as_uuid(user_id) if user_id else None
+        if user_id and not user_uuid:
+            return 0
+        query = self.db.query(
+            File.user_id, File.folder_path, func.coalesce(func.sum(File.file_size), 0), func.count()
+        ).filter(File.is_folder == False)
+        if user_uuid:
+            query = query.filter(File.user_id == user_uuid)
+
+        totals: Dict[Tuple[uuid.UUID, str], List[int]] = {}
+        for uid, folder_path, size, count in query.group_by(File.user_id, File.folder_path):
+            for ancestor in folder_ancestors(folder_path):
+                entry = totals.setdefault((uid, ancestor), [0, 0])
+                entry[0] += int(size)
+                entry[1] += int(count)
+
+        # Users with a folder whose rollup changes get their cached trees invalidated
+        current = self.db.query(File.user_id, File.folder_path, File.total_size, File.total_files).filter(
+            File.is_folder == True
+        )
+        if user_uuid:
+            current = current.filter(File.user_id == user_uuid)
+        changed = {
+            uid
+            for uid, path, size, count in current
+            if [size or 0, count or 0] != totals.get((uid, path), [0, 0])
+        }
+
+        reset = update(File).where(File.is_folder == True).values(total_size=0, total_files=0)
+        if user_uuid:
+            reset = reset.where(File.user_id == user_uuid)
+        self.db.execute(reset.execution_options(synchronize_session=False))
+        if totals:
+            files = File.__table__.c
+            self.db.execute(
+                update(File.__table__)
+                .where(
+                    files.user_id == bindparam("b_user_id"),
+                    files.is_folder == True,
+                    files.folder_path == bindparam("b_folder_path"),
                 )
+                .values(total_size=bindparam("b_size"), total_files=bindparam("b_files")),
+                [
+                    {"b_user_id": uid, "b_folder_path": path, "b_size": size, "b_files": count}
+                    for (uid, path), (size, count) in totals.items()
+                ],
             )
-        ).scalar() or 0
-        others_count = max(file_count - (images_count + pdf_count + csv_count), 0)
+        self._bump_files_versions(changed)
+        self.db.commit()
+        return len(totals)
 
-        return {
-            "total_size": total_size,
-            "file_count": file_count,
-            "by_type": {
-                "images": images_count,
-                "pdf": pdf_count,
-                "csv": csv_count,
-                "others": others_count
-            }
+    def _apply_usage_delta(self, user_uuid: uuid.UUID, delta: Dict[str, int]) -> None:
+        """Add ``delta`` to the user's counters inside the current transaction."""
+        if not any(delta.values()):
+            return
+        stmt = _dialect_insert(self.db)(UserStorageUsage).values(user_id=user_uuid, **delta)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserStorageUsage.user_id],
+            set_={
+                **{
+                    name: getattr(UserStorageUsage, name) + getattr(stmt.excluded, name)
+                    for name in _USAGE_COUNTERS
+                },
+                "updated_at": func.now(),
+            },
+        )
+        self.db.execute(stmt)
+
+    def rebuild_storage_usage(self, user_id: Optional[str] = None) -> int:
+        """Recompute counters from the files table (one user, or everyone).
+
+        Repairs drift from writes that bypassed FileService. Returns the number
+        of users whose counters were rewritten.
+        """
+        user_uuid = self._as_uuid(user_id) if user_id else None
+        if user_id and not user_uuid:
+            return 0
+        query = self.db.query(
+            File.user_id,
+            func.coalesce(func.sum(File.file_size), 0),
+            func.count(),
+            func.sum(case((File.mime_type.like('image/%'), 1), else_=0)),
+            func.sum(case((File.mime_type == 'application/pdf', 1), else_=0)),
+            func.sum(case((File.mime_type.in_(_CSV_MIME_TYPES), 1), else_=0)),
+        ).filter(File.is_folder == False)
+        if user_uuid:
+            query = query.filter(File.user_id == user_uuid)
+        rows = [
+            dict(zip(("user_id",) + _USAGE_COUNTERS, (uid,) + tuple(int(v or 0) for v in values)))
+            for uid, *values in query.group_by(File.user_id)
+        ]
+
+        # Users without files left keep a row, reset to zero
+        stale = self.db.query(UserStorageUsage.user_id)
+        if user_uuid:
+            stale = stale.filter(UserStorageUsage.user_id == user_uuid)
+        counted = {row["user_id"] for row in rows}
+        rows.extend(
+            dict(user_id=uid, **{name: 0 for name in _USAGE_COUNTERS})
+            for (uid,) in stale
+            if uid not in counted
+        )
+
+        # Users whose counters change get their cached trees invalidated
+        existing = self.db.query(
+            UserStorageUsage.user_id, *(getattr(UserStorageUsage, name) for name in _USAGE_COUNTERS)
+        )
+        if user_uuid:
+            existing = existing.filter(UserStorageUsage.user_id == user_uuid)
+        before = {uid: tuple(values) for uid, *values in existing}
+        changed = {
+            row["user_id"]
+            for row in rows
+            if before.get(row["user_id"]) != tuple(row[name] for name in _USAGE_COUNTERS)
         }
 
+        insert_stmt = _dialect_insert(self.db)
+        for i in range(0, len(rows), _BATCH_SIZE):
+            stmt = insert_stmt(UserStorageUsage).values(rows[i:i + _BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[UserStorageUsage.user_id],
+                set_={
+                    **{name: getattr(stmt.excluded, name) for name in _USAGE_COUNTERS},
+                    "updated_at": func.now(),
+                },
+            )
+            self.db.execute(stmt)
+        self._bump_files_versions(changed)
+        self.db.commit()
+        return len(rows)
+
+
+def build_tree_dicts(rows) -> List[Dict[str, Any]]:
+    """Nest ``(id, name, is_folder, size, mime_type, file_path, folder_path, uploaded_at,
+    total_size, total_files)`` rows the way ``FileService.get_file_tree`` does, as plain dicts."""
+    folder_map: Dict[str, Dict[str, Any]] = {}
+    folders = []
+    files = []
+    for row in rows:
+        (folders if row[2] else files).append(row)
+
+    for folder_id, name, _, _, _, _, folder_path, uploaded_at, total_size, total_files in folders:
+        full_path = folder_path.rstrip('/') if folder_path != '/' else '/'
+        folder_map[full_path] = {
+            "id": str(folder_id),
+            "name": name,
+            "type": "folder",
+            "size": total_size,
+            "mime_type": None,
+            "path": folder_path,
+            "uploaded_at": uploaded_at,
+            "children": [],
+            "file_count": total_files,
+        }
+
+    root_folders = []
+    orphaned_folders = []
+    for row in folders:
+        folder_path = row[6]
+        full_path = folder_path.rstrip('/') if folder_path != '/' else '/'
+        node = folder_map[full_path]
+        if folder_path == '/':
+            root_folders.append(node)
+            continue
+        parent_path = '/'.join(folder_path.rstrip('/').split('/')[:-1]) or '/'
+        parent = folder_map.get(parent_path)
+        if parent is not None:
+            parent["children"].append(node)
+        else:
+            orphaned_folders.append(node)
+
+    root_files = []
+    orphaned_files = []
+    for file_id, name, _, size, mime_type, file_path, folder_path, uploaded_at, _, _ in files:
+        node = {
+            "id": str(file_id),
+            "name": name,
+            "type": "file",
+            "size": size,
+            "mime_type": mime_type,
+            "path": file_path,
+            "uploaded_at": uploaded_at,
+            "children": None,
+            "file_count": None,
+        }
+        if folder_path == '/':
+            root_files.append(node)
+            continue
+        parent = folder_map.get(folder_path.rstrip('/'))
+        if parent is not None:
+            parent["children"].append(node)
+        else:
+            orphaned_files.append(node)
+
+    for node in folder_map.values():
+        if node["children"]:
+            node["children"].sort(key=_files_first_last)
+
+    result = []
+    for group in (root_folders, root_files, orphaned_folders, orphaned_files):
+        group.sort(key=_by_name)
+        result.extend(group)
+    return result
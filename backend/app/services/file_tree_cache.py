@@ -0,0 +1,77 @@
+"""
+Per-worker cache of rendered file trees.
+
+Entries are keyed by user and tagged with ``users.files_version``. Every file
+mutation bumps that column in the same transaction, so a worker serves a cached
+tree only while the version it was built for is still current; no cross-worker
+invalidation messages are needed.
+"""
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.core.config import settings
+
+
+def tree_etag(user_id: str, version: int) -> str:
+    return f'W/"tree-{user_id}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison of an ``If-None-Match`` header against ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class FileTreeCache:
+    """Bounded LRU of ``user_id -> (files_version, JSON body)``."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = settings.FILE_TREE_CACHE_SIZE if max_entries is None else max_entries
+        self._entries: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, version: int) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id: str, version: int, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            current = self._entries.get(user_id)
+            # A slower request must not replace a tree built for a newer version
+            if current is not None and current[0] > version:
+                return
+            self._entries[user_id] = (version, body)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+file_tree_cache = FileTreeCache()
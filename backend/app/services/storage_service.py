@@ -1,13 +1,22 @@
 """
 Unified storage service that supports both local file system and AWS S3
 """
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+import hashlib
 import uuid
 import os
 import shutil
+import tempfile
 
 from app.core.config import settings
+from app.services.blob_cache import blob_cache
+from app.utils.compression import (
+    CompressingReader, available_codec, decompress_bytes, decompress_chunks, is_compressible, slice_chunks,
+)
 from typing import Set
 
 # Only import boto3 if S3 is configured
@@ -19,6 +28,56 @@ if settings.STORAGE_TYPE == "s3":
         print("Warning: boto3 not installed. S3 storage will not be available.")
 
 
+# Keys per S3 DeleteObjects call (the API maximum)
+_S3_DELETE_BATCH = 1000
+
+
+class FileTooLargeError(ValueError):
+    """Raised by streaming uploads once a file exceeds the allowed size."""
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    """Result of a streaming upload: storage path plus size and SHA-256 computed on the way.
+
+    Content-addressed uploads are only staged: ``staged`` is the temporary file
+    that ``store_staged`` moves to ``path`` if the blob is not stored yet.
+    ``encoding`` is the codec the stored bytes are compressed with; ``size``
+    and ``checksum`` always describe the original content.
+    """
+    path: str
+    size: int
+    checksum: str
+    staged: Optional[str] = None
+    encoding: Optional[str] = None
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    """Content-Disposition value that survives non-ASCII names (RFC 6266)."""
+    fallback = filename.encode("ascii", "replace").decode("ascii").replace('"', "'").replace("\\", "_")
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+
+def blob_path(checksum: str) -> str:
+    """Storage path of the content-addressed blob with this SHA-256."""
+    return f"blobs/{checksum[:2]}/{checksum}"
+
+
+class _Digest:
+    """Size and SHA-256 of a stream, enforcing ``max_size`` as chunks go by."""
+
+    def __init__(self, max_size: Optional[int]):
+        self.max_size = max_size
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+
+    def update(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            raise FileTooLargeError(f"File exceeds {self.max_size} bytes")
+        self.sha256.update(chunk)
+
+
 class StorageService:
     """
     Unified storage service that can use either local filesystem or AWS S3
@@ -35,7 +94,8 @@ class StorageService:
                     's3',
                     aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
                     aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-                    region_name=settings.AWS_REGION
+                    region_name=settings.AWS_REGION,
+                    endpoint_url=settings.AWS_S3_ENDPOINT_URL,
                 )
             else:
                 print("Warning: S3 credentials not configured. Falling back to local storage.")
@@ -67,6 +127,99 @@ class StorageService:
         else:
             return self._upload_to_local(file_content, filename, f"files/{user_id}")
     
+    def upload_file_stream(
+        self,
+        stream: BinaryIO,
+        filename: str,
+        content_type: str,
+        user_id: str,
+        max_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Optional[StoredObject]:
+        """
+        Upload user file from a binary stream in fixed-size chunks (constant memory)
+        Raises FileTooLargeError past ``max_size``; nothing is left in storage then.
+        Text content is compressed on the way when STORAGE_COMPRESSION is set.
+        Returns: StoredObject, or None if storage failed
+        """
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        codec = available_codec(settings.STORAGE_COMPRESSION) if is_compressible(content_type) else None
+        if codec:
+            # Size limit and checksum apply to the original bytes, not the stored ones
+            raw = _Digest(max_size)
+            stream = CompressingReader(stream, codec, raw.update, chunk_size)
+            max_size = None
+        if self.storage_type == "s3" and self.s3_client:
+            stored = self._stream_to_s3(stream, filename, content_type, f"files/{user_id}", max_size, chunk_size)
+        else:
+            stored = self._stream_to_local(stream, filename, f"files/{user_id}", max_size, chunk_size)
+        if stored and codec:
+            stored = StoredObject(stored.path, raw.size, raw.sha256.hexdigest(), encoding=codec)
+        return stored
+
+    def stage_upload_stream(
+        self, stream: BinaryIO, max_size: Optional[int] = None, chunk_size: Optional[int] = None
+    ) -> Optional[StoredObject]:
+        """
+        Spool an upload to a temporary file while hashing it, for content-addressed storage
+        Raises FileTooLargeError past ``max_size``; the temporary file is removed then.
+        Returns: StoredObject addressed by the content hash, or None if staging failed
+        """
+        chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        if self.storage_type == "s3" and self.s3_client:
+            staging_dir = Path(tempfile.gettempdir())
+        else:
+            # Same filesystem as the blobs, so storing is a rename
+            staging_dir = Path(settings.LOCAL_UPLOAD_DIR) / ".staging"
+        digest = _Digest(max_size)
+        temp_path = None
+        try:
+            staging_dir.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=staging_dir, prefix="upload-")
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+            checksum = digest.sha256.hexdigest()
+            return StoredObject(blob_path(checksum), digest.size, checksum, staged=temp_path)
+
+        except Exception as e:
+            if temp_path:
+                self.discard_staged(temp_path)
+            if isinstance(e, FileTooLargeError):
+                raise
+            print(f"Error staging upload: {e}")
+            return None
+
+    def store_staged(self, stored: StoredObject, content_type: str) -> bool:
+        """Write a staged upload to its blob path (consumes the staged file)"""
+        try:
+            if self.storage_type == "s3" and self.s3_client:
+                with open(stored.staged, 'rb') as f:
+                    return self._stream_to_s3(
+                        f, stored.path, content_type, "", None, settings.UPLOAD_CHUNK_SIZE, key=stored.path
+                    ) is not None
+            target = self._local_path(stored.path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(stored.staged, target)
+            return True
+        except Exception as e:
+            print(f"Error storing blob: {e}")
+            return False
+        finally:
+            self.discard_staged(stored.staged)
+
+    @staticmethod
+    def discard_staged(temp_path: Optional[str]) -> None:
+        if temp_path:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+
     def delete_file(self, file_path: str) -> bool:
         """
         Delete a file from storage
@@ -76,6 +229,16 @@ class StorageService:
         else:
             return self._delete_from_local(file_path)
 
+    def delete_files(self, file_paths: List[str]) -> List[str]:
+        """Delete many stored objects; returns the paths that are gone (including
+        ones that were already missing). S3 uses DeleteObjects with up to 1000 keys
+        per call, local storage unlinks in parallel threads."""
+        if not file_paths:
+            return []
+        if self.storage_type == "s3" and self.s3_client:
+            return self._delete_many_from_s3(file_paths)
+        return self._delete_many_from_local(file_paths)
+
     def is_seeded_default_avatar(self, file_path_or_url: str) -> bool:
         """Determine if the given path/URL points to a seeded default avatar.
 
@@ -113,30 +276,236 @@ class StorageService:
             # For local storage, return the path relative to upload directory
             return f"/uploads/{file_path}"
 
-    def read_file_bytes(self, file_path: str) -> Optional[bytes]:
+    def local_file(self, file_path: str) -> Optional[Path]:
+        """Filesystem path of a locally stored object, or None (missing, or S3 storage)"""
+        if self.storage_type == "s3" and self.s3_client:
+            return None
+        full_path = self._local_path(file_path)
+        return full_path if full_path.is_file() else None
+
+    def presigned_download_url(
+        self, file_path: str, filename: str, content_type: Optional[str], expires_in: int
+    ) -> Optional[str]:
+        """Short-lived S3 GET URL that downloads the object as ``filename``; None for local storage"""
+        if not (self.storage_type == "s3" and self.s3_client):
+            return None
+        params = {
+            "Bucket": settings.AWS_S3_BUCKET,
+            "Key": self._s3_key(file_path),
+            "ResponseContentDisposition": content_disposition(filename),
+        }
+        if content_type:
+            params["ResponseContentType"] = content_type
+        return self.s3_client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires_in)
+
+    def user_upload_key(self, filename: str, user_id: str) -> str:
+        """Fresh storage key for a user's upload, as ``upload_file_stream`` names them"""
+        file_extension = filename.split('.')[-1] if '.' in filename else 'bin'
+        return f"files/{user_id}/{uuid.uuid4()}.{file_extension}"
+
+    def presign_upload(self, key: str, content_type: str, size: int, expires_in: int) -> Dict[str, Any]:
+        """Let a client upload ``size`` bytes straight to S3 at ``key``.
+
+        Small files get one presigned PUT (``url``); larger ones a multipart
+        upload (``upload_id``) with one presigned URL per ``part_size`` part, to
+        be completed by ``complete_multipart_upload``.
+        """
+        bucket = settings.AWS_S3_BUCKET
+        # S3 allows at most 10000 parts of at least 5 MiB (except the last)
+        part_size = max(settings.S3_DIRECT_UPLOAD_PART_SIZE, 5 * 1024 * 1024, -(-size // 10000))
+        if size <= part_size:
+            url = self.s3_client.generate_presigned_url(
+                "put_object",
+                Params={"Bucket": bucket, "Key": key, "ContentType": content_type},
+                ExpiresIn=expires_in,
+            )
+            return {"key": key, "url": url, "headers": {"Content-Type": content_type}}
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=bucket, Key=key, ContentType=content_type
+        )["UploadId"]
+        part_urls = [
+            self.s3_client.generate_presigned_url(
+                "upload_part",
+                Params={"Bucket": bucket, "Key": key, "UploadId": upload_id, "PartNumber": number},
+                ExpiresIn=expires_in,
+            )
+            for number in range(1, -(-size // part_size) + 1)
+        ]
+        return {"key": key, "upload_id": upload_id, "part_size": part_size, "part_urls": part_urls}
+
+    def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict[str, Any]]) -> None:
+        """Assemble a client's multipart upload from its ``{"PartNumber", "ETag"}`` parts"""
+        self.s3_client.complete_multipart_upload(
+            Bucket=settings.AWS_S3_BUCKET,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])},
+        )
+
+    def start_chunked_upload(self, file_path: str, content_type: str) -> Optional[str]:
+        """Begin a resumable upload to ``file_path``: the S3 multipart UploadId, or None
+        for local storage (chunks are kept as part files until completed)"""
+        if self.storage_type == "s3" and self.s3_client:
+            return self.s3_client.create_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET, Key=self._s3_key(file_path), ContentType=content_type
+            )["UploadId"]
+        return None
+
+    def write_upload_part(
+        self, file_path: str, upload_id: Optional[str], part_number: int, stream: BinaryIO, size: int
+    ) -> Optional[str]:
+        """Store (or replace) one chunk of a resumable upload; returns the S3 part ETag"""
+        if self.storage_type == "s3" and self.s3_client:
+            return self.s3_client.upload_part(
+                Bucket=settings.AWS_S3_BUCKET,
+                Key=self._s3_key(file_path),
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=stream,
+                ContentLength=size,
+            )["ETag"]
+        chunk_dir = self._chunk_dir(file_path)
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=chunk_dir, prefix=".part-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                shutil.copyfileobj(stream, f, settings.UPLOAD_CHUNK_SIZE)
+            # A retried chunk replaces the earlier attempt atomically
+            os.replace(temp_path, chunk_dir / f"{part_number:05d}")
+        except BaseException:
+            self.discard_staged(temp_path)
+            raise
+        return None
+
+    def complete_chunked_upload(
+        self, file_path: str, upload_id: Optional[str], parts: List[Tuple[int, Optional[str]]]
+    ) -> Optional[str]:
+        """Assemble the ``(part_number, etag)`` chunks into ``file_path``. Returns the
+        SHA-256 of the content for local storage (S3 does not compute one: None)."""
+        if self.storage_type == "s3" and self.s3_client:
+            self.complete_multipart_upload(
+                file_path, upload_id, [{"PartNumber": number, "ETag": etag} for number, etag in parts]
+            )
+            return None
+        chunk_dir = self._chunk_dir(file_path)
+        target = self._local_path(file_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        digest = _Digest(None)
+        try:
+            with open(target, 'wb') as out:
+                for number, _ in sorted(parts):
+                    with open(chunk_dir / f"{number:05d}", 'rb') as f:
+                        while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+                            digest.update(chunk)
+                            out.write(chunk)
+        except BaseException:
+            target.unlink(missing_ok=True)
+            raise
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+        return digest.sha256.hexdigest()
+
+    def abort_chunked_upload(self, file_path: str, upload_id: Optional[str]) -> None:
+        """Drop the chunks of an abandoned resumable upload"""
+        if self.storage_type == "s3" and self.s3_client:
+            try:
+                self.s3_client.abort_multipart_upload(
+                    Bucket=settings.AWS_S3_BUCKET, Key=self._s3_key(file_path), UploadId=upload_id
+                )
+            except Exception as e:
+                print(f"Error aborting multipart upload: {e}")
+            return
+        shutil.rmtree(self._chunk_dir(file_path), ignore_errors=True)
+
+    def stored_size(self, file_path: str) -> Optional[int]:
+        """Size of a stored object, or None if it does not exist"""
+        if self.storage_type == "s3" and self.s3_client:
+            try:
+                head = self.s3_client.head_object(Bucket=settings.AWS_S3_BUCKET, Key=self._s3_key(file_path))
+            except Exception:
+                return None
+            return head["ContentLength"]
+        full_path = self._local_path(file_path)
+        return full_path.stat().st_size if full_path.is_file() else None
+
+    def open_s3_object(
+        self, file_path: str, start: Optional[int] = None, end: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """Open an S3 object (or the inclusive byte range ``start``-``end``) and return
+        an iterator over its chunks. The request is made here, so a missing object
+        raises before any response is started."""
+        params = {"Bucket": settings.AWS_S3_BUCKET, "Key": self._s3_key(file_path)}
+        if start is not None:
+            params["Range"] = f"bytes={start}-{end}"
+        body = self.s3_client.get_object(**params)["Body"]
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from body.iter_chunks(chunk_size or settings.DOWNLOAD_CHUNK_SIZE)
+            finally:
+                body.close()
+
+        return chunks()
+
+    def open_decoded(
+        self, file_path: str, encoding: str, start: Optional[int] = None, end: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[bytes]:
+        """Like ``open_s3_object`` for content stored compressed with ``encoding``, from
+        either backend: chunks of the original bytes (or of their range ``start``-``end``),
+        decompressed as they are read."""
+        chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+        if self.storage_type == "s3" and self.s3_client:
+            stored = self.open_s3_object(file_path, chunk_size=chunk_size)
+        else:
+            f = open(self._local_path(file_path), "rb")
+
+            def read_local() -> Iterator[bytes]:
+                with f:
+                    yield from iter(lambda: f.read(chunk_size), b"")
+
+            stored = read_local()
+        chunks = decompress_chunks(stored, encoding)
+        return slice_chunks(chunks, start, end) if start is not None else chunks
+
+    def read_file_bytes(
+        self, file_path: str, version: Optional[str] = None, encoding: Optional[str] = None
+    ) -> Optional[bytes]:
         """
         Read file content from storage and return raw bytes.
         Supports both local filesystem and S3 based on configuration.
+
+        S3 reads go through the node-local read cache, keyed by ``version`` (the
+        file's content checksum or last update) or, when that is unknown, the
+        object's current ETag. Content stored compressed with ``encoding`` is
+        returned decompressed (the cache keeps the compressed bytes).
         """
         try:
             if self.storage_type == "s3" and self.s3_client:
-                # Derive S3 key from URL/path
-                if file_path.startswith('http'):
-                    key = file_path.split(f"{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/")[1]
+                key = self._s3_key(file_path)
+                if not blob_cache.enabled:
+                    data = self._get_s3_bytes(key)
                 else:
-                    key = file_path
-                obj = self.s3_client.get_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
-                return obj["Body"].read()
+                    if version is None:
+                        head = self.s3_client.head_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
+                        version = f"etag:{head['ETag']}"
+                    data = blob_cache.get_or_load(key, version, lambda: self._get_s3_bytes(key))
+                return decompress_bytes(data, encoding) if encoding and data is not None else data
             else:
                 # Local filesystem
-                rel_path = file_path[9:] if file_path.startswith('/uploads/') else file_path
-                full_path = Path(settings.LOCAL_UPLOAD_DIR) / rel_path
+                full_path = self._local_path(file_path)
                 if not full_path.exists() or not full_path.is_file():
                     return None
+                if encoding:
+                    return b"".join(self.open_decoded(file_path, encoding))
                 return full_path.read_bytes()
         except Exception as e:
             print(f"Error reading file content: {e}")
             return None
+
+    def _get_s3_bytes(self, key: str) -> bytes:
+        obj = self.s3_client.get_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
+        return obj["Body"].read()
     
     def _upload_to_s3(self, file_content: bytes, filename: str, content_type: str, folder: str) -> Optional[str]:
         """Upload file to S3"""
@@ -184,15 +553,125 @@ class StorageService:
             print(f"Error uploading to local storage: {e}")
             return None
     
+    def _stream_to_s3(
+        self, stream: BinaryIO, filename: str, content_type: str, folder: str,
+        max_size: Optional[int], chunk_size: int, key: Optional[str] = None
+    ) -> Optional[StoredObject]:
+        """Stream file to S3: one put_object for small files, multipart upload otherwise"""
+        if key is None:
+            file_extension = filename.split('.')[-1] if '.' in filename else 'bin'
+            key = f"{folder}/{uuid.uuid4()}.{file_extension}"
+        # S3 parts must be at least 5 MiB, except the last one
+        chunk_size = max(chunk_size, 5 * 1024 * 1024)
+        digest = _Digest(max_size)
+        upload_id = None
+        try:
+            chunk = stream.read(chunk_size)
+            digest.update(chunk)
+            next_chunk = stream.read(chunk_size) if chunk else b""
+            if not next_chunk:
+                self.s3_client.put_object(
+                    Bucket=settings.AWS_S3_BUCKET,
+                    Key=key,
+                    Body=chunk,
+                    ContentType=content_type,
+                    ACL='public-read'
+                )
+                return StoredObject(key, digest.size, digest.sha256.hexdigest())
+
+            upload_id = self.s3_client.create_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET,
+                Key=key,
+                ContentType=content_type,
+                ACL='public-read'
+            )["UploadId"]
+            parts = []
+            while chunk:
+                part = self.s3_client.upload_part(
+                    Bucket=settings.AWS_S3_BUCKET,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=len(parts) + 1,
+                    Body=chunk,
+                )
+                parts.append({"PartNumber": len(parts) + 1, "ETag": part["ETag"]})
+                chunk, next_chunk = next_chunk, (stream.read(chunk_size) if next_chunk else b"")
+                digest.update(chunk)
+            self.s3_client.complete_multipart_upload(
+                Bucket=settings.AWS_S3_BUCKET,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+            return StoredObject(key, digest.size, digest.sha256.hexdigest())
+
+        except Exception as e:
+            if upload_id:
+                try:
+                    self.s3_client.abort_multipart_upload(
+                        Bucket=settings.AWS_S3_BUCKET, Key=key, UploadId=upload_id
+                    )
+                except Exception:
+                    pass
+            if isinstance(e, FileTooLargeError):
+                raise
+            print(f"Error uploading to S3: {e}")
+            return None
+
+    def _stream_to_local(
+        self, stream: BinaryIO, filename: str, subfolder: str,
+        max_size: Optional[int], chunk_size: int
+    ) -> Optional[StoredObject]:
+        """Stream file to the local filesystem"""
+        upload_dir = Path(settings.LOCAL_UPLOAD_DIR) / subfolder
+        file_extension = filename.split('.')[-1] if '.' in filename else 'bin'
+        unique_filename = f"{uuid.uuid4()}.{file_extension}"
+        file_path = upload_dir / unique_filename
+        digest = _Digest(max_size)
+        try:
+            upload_dir.mkdir(parents=True, exist_ok=True)
+            with open(file_path, 'wb') as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+            return StoredObject(f"{subfolder}/{unique_filename}", digest.size, digest.sha256.hexdigest())
+
+        except Exception as e:
+            try:
+                file_path.unlink()
+            except OSError:
+                pass
+            if isinstance(e, FileTooLargeError):
+                raise
+            print(f"Error uploading to local storage: {e}")
+            return None
+
+    @staticmethod
+    def _s3_key(file_path: str) -> str:
+        # Extract S3 key from URL or use path directly
+        if file_path.startswith('http'):
+            return file_path.split(f"{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/")[1]
+        return file_path
+
+    @staticmethod
+    def _chunk_dir(file_path: str) -> Path:
+        # Part files of a resumable upload, on the same filesystem as the result
+        return Path(settings.LOCAL_UPLOAD_DIR) / ".chunks" / Path(file_path).name
+
+    @staticmethod
+    def _local_path(file_path: str) -> Path:
+        # Handle both absolute and relative paths
+        if file_path.startswith('/uploads/'):
+            file_path = file_path[9:]  # Remove '/uploads/' prefix
+        return Path(settings.LOCAL_UPLOAD_DIR) / file_path
+
     def _delete_from_s3(self, file_path: str) -> bool:
         """Delete file from S3"""
         try:
-            # Extract S3 key from URL or use path directly
-            if file_path.startswith('http'):
-                # Extract key from URL
-                key = file_path.split(f"{settings.AWS_S3_BUCKET}.s3.{settings.AWS_REGION}.amazonaws.com/")[1]
-            else:
-                key = file_path
+            key = self._s3_key(file_path)
             
             self.s3_client.delete_object(
                 Bucket=settings.AWS_S3_BUCKET,
@@ -207,11 +686,7 @@ class StorageService:
     def _delete_from_local(self, file_path: str) -> bool:
         """Delete file from local filesystem"""
         try:
-            # Handle both absolute and relative paths
-            if file_path.startswith('/uploads/'):
-                file_path = file_path[9:]  # Remove '/uploads/' prefix
-            
-            full_path = Path(settings.LOCAL_UPLOAD_DIR) / file_path
+            full_path = self._local_path(file_path)
             
             if full_path.exists():
                 if full_path.is_file():
@@ -225,6 +700,40 @@ class StorageService:
             print(f"Error deleting from local storage: {e}")
             return False
 
+    def _delete_many_from_s3(self, file_paths: List[str]) -> List[str]:
+        deleted = []
+        for i in range(0, len(file_paths), _S3_DELETE_BATCH):
+            batch = file_paths[i:i + _S3_DELETE_BATCH]
+            keys = {self._s3_key(path): path for path in batch}
+            try:
+                resp = self.s3_client.delete_objects(
+                    Bucket=settings.AWS_S3_BUCKET,
+                    Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+                )
+            except Exception as e:
+                print(f"Error deleting from S3: {e}")
+                continue
+            # Quiet mode reports failures only; a missing key is not an error
+            failed = {err.get("Key") for err in resp.get("Errors", [])}
+            deleted.extend(path for key, path in keys.items() if key not in failed)
+        return deleted
+
+    def _unlink_local(self, file_path: str) -> bool:
+        try:
+            self._local_path(file_path).unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error deleting from local storage: {e}")
+            return False
+        return True
+
+    def _delete_many_from_local(self, file_paths: List[str]) -> List[str]:
+        workers = max(1, min(settings.BLOB_GC_CONCURRENCY, len(file_paths)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(self._unlink_local, file_paths)
+            return [path for path, ok in zip(file_paths, results) if ok]
+
 
 # Global storage service instance
 storage_service = StorageService()
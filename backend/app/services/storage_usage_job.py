@@ -0,0 +1,40 @@
+"""
+Reconciliation of the per-user storage counters (user_storage_usage) and the
+per-folder rollups (files.total_size / total_files).
+
+FileService keeps both current on every create/delete; this job rebuilds them
+from the files table to repair drift from writes that bypassed it. Run it from cron (``python -m app.services.storage_usage_job``) or in one
+API worker by setting STORAGE_USAGE_RECONCILE_SECONDS.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database import session_scope
+from app.services.file_service import FileService
+
+logger = logging.getLogger("storage_usage")
+
+
+def reconcile_storage_usage(user_id: Optional[str] = None) -> int:
+    with session_scope() as db:
+        file_service = FileService(db)
+        file_service.rebuild_folder_rollups(user_id)
+        return file_service.rebuild_storage_usage(user_id)
+
+
+async def reconcile_periodically(interval: Optional[float] = None) -> None:
+    interval = interval or settings.STORAGE_USAGE_RECONCILE_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            users = await asyncio.to_thread(reconcile_storage_usage)
+            logger.info(f"Reconciled storage usage of {users} users")
+        except Exception as e:
+            logger.warning(f"Storage usage reconciliation failed: {e}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Reconciled storage usage of {reconcile_storage_usage()} users")
@@ -0,0 +1,182 @@
+"""
+Resumable chunked uploads.
+
+A session announces the file; the client then PUTs ``chunk_size`` chunks at
+their offsets, in any order, in parallel and as often as needed (a chunk
+sent again replaces the earlier attempt), asks for the status to resume
+after a dropped connection, and completes the session once every chunk is
+in. Chunks go straight to an S3 multipart upload or to local part files, so
+no request ever holds more than one chunk.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import uuid
+
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.file import File
+from app.models.upload_session import UploadSession, UploadSessionPart
+from app.schemas.file import FileCreate
+from app.services.file_service import FileService, _dialect_insert, normalize_folder_path
+from app.services.storage_service import storage_service
+
+# S3 multipart limits: parts of at least 5 MiB (except the last), at most 10000 of them
+_MIN_PART_SIZE = 5 * 1024 * 1024
+_MAX_PARTS = 10000
+
+
+class UploadSessionService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create(
+        self, user_id: str, filename: str, size: int, content_type: Optional[str], folder_path: str = "/"
+    ) -> UploadSession:
+        chunk_size = settings.RESUMABLE_UPLOAD_CHUNK_SIZE
+        if storage_service.storage_type == "s3":
+            chunk_size = max(chunk_size, _MIN_PART_SIZE)
+        chunk_size = max(chunk_size, -(-size // _MAX_PARTS), 1)
+        file_path = storage_service.user_upload_key(filename, user_id)
+        upload_id = storage_service.start_chunked_upload(file_path, content_type or "application/octet-stream")
+        session = UploadSession(
+            id=uuid.uuid4(),
+            user_id=uuid.UUID(user_id),
+            original_filename=filename,
+            mime_type=content_type,
+            folder_path=normalize_folder_path(folder_path),
+            file_path=file_path,
+            size=size,
+            chunk_size=chunk_size,
+            storage_upload_id=upload_id,
+        )
+        self.db.add(session)
+        self.db.commit()
+        return session
+
+    def get(self, session_id: str, user_id: str) -> Optional[UploadSession]:
+        try:
+            session_uuid, user_uuid = uuid.UUID(str(session_id)), uuid.UUID(str(user_id))
+        except ValueError:
+            return None
+        session = self.db.get(UploadSession, session_uuid)
+        return session if session is not None and session.user_id == user_uuid else None
+
+    @staticmethod
+    def part_for_offset(session: UploadSession, offset: int) -> Tuple[int, int]:
+        """``(part_number, length)`` of the chunk starting at ``offset``; ValueError if no chunk starts there."""
+        if offset < 0 or offset >= max(session.size, 1) or offset % session.chunk_size:
+            raise ValueError(f"Chunks start at multiples of {session.chunk_size} below {session.size}")
+        return offset // session.chunk_size + 1, min(session.chunk_size, session.size - offset)
+
+    def record_part(self, session: UploadSession, part_number: int, size: int, etag: Optional[str]) -> None:
+        insert = _dialect_insert(self.db)
+        stmt = insert(UploadSessionPart).values(
+            session_id=session.id, part_number=part_number, size=size, etag=etag
+        )
+        self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UploadSessionPart.session_id, UploadSessionPart.part_number],
+                set_={"size": stmt.excluded.size, "etag": stmt.excluded.etag},
+            )
+        )
+        self.db.commit()
+
+    def _parts(self, session: UploadSession) -> List[UploadSessionPart]:
+        return (
+            self.db.query(UploadSessionPart)
+            .filter(UploadSessionPart.session_id == session.id)
+            .order_by(UploadSessionPart.part_number)
+            .all()
+        )
+
+    def status(self, session: UploadSession) -> Dict[str, Any]:
+        received = {part.part_number for part in self._parts(session)}
+        total = max(1, -(-session.size // session.chunk_size))
+        missing = [number for number in range(1, total + 1) if number not in received]
+        # Bytes received without a gap from the start: where a sequential client resumes
+        offset = session.size if not missing else (missing[0] - 1) * session.chunk_size
+        return {
+            "id": str(session.id),
+            "filename": session.original_filename,
+            "size": session.size,
+            "chunk_size": session.chunk_size,
+            "offset": offset,
+            "received_bytes": sum(
+                min(session.chunk_size, session.size - (n - 1) * session.chunk_size) for n in received
+            ),
+            "missing_parts": missing,
+            "complete": not missing,
+        }
+
+    def complete(self, session: UploadSession) -> File:
+        """Assemble the chunks and create the files row (and its folders) in one transaction.
+
+        Raises ValueError while chunks are missing. Once the chunks are
+        assembled they are gone, so if the row cannot be created the session
+        is dropped along with the blob and the client has to start over.
+        """
+        parts = self._parts(session)
+        total = max(1, -(-session.size // session.chunk_size))
+        if [part.part_number for part in parts] != list(range(1, total + 1)):
+            raise ValueError("Upload is missing chunks")
+        checksum = storage_service.complete_chunked_upload(
+            session.file_path, session.storage_upload_id, [(part.part_number, part.etag) for part in parts]
+        )
+        user_id = str(session.user_id)
+        target_folder = session.folder_path
+        file_service = FileService(self.db)
+        try:
+            file_service.ensure_folder_hierarchies(user_id, [target_folder], commit=False)
+            (created,) = file_service.create_files(
+                [
+                    FileCreate(
+                        filename=session.file_path.rsplit("/", 1)[-1],
+                        original_filename=session.original_filename,
+                        file_path=session.file_path,
+                        file_size=session.size,
+                        checksum=checksum,
+                        mime_type=session.mime_type,
+                        folder_path=target_folder,
+                        user_id=user_id,
+                        is_folder=False,
+                    )
+                ],
+                commit=False,
+            )
+            self._delete(session)
+            file_service.commit_keep_loaded()
+        except Exception:
+            self.db.rollback()
+            storage_service.delete_file(session.file_path)
+            self._delete(session)
+            self.db.commit()
+            raise
+        return created
+
+    def abort(self, session: UploadSession) -> None:
+        storage_service.abort_chunked_upload(session.file_path, session.storage_upload_id)
+        self._delete(session)
+        self.db.commit()
+
+    def _delete(self, session: UploadSession) -> None:
+        # Parts explicitly too: SQLite does not enforce the cascade by default
+        self.db.execute(delete(UploadSessionPart).where(UploadSessionPart.session_id == session.id))
+        self.db.execute(delete(UploadSession).where(UploadSession.id == session.id))
+
+    def expire_stale(self, max_age_hours: Optional[int] = None) -> int:
+        """Abort sessions older than ``RESUMABLE_UPLOAD_EXPIRE_HOURS``; returns how many."""
+        hours = max_age_hours if max_age_hours is not None else settings.RESUMABLE_UPLOAD_EXPIRE_HOURS
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
+        stale = self.db.query(UploadSession).filter(UploadSession.created_at < cutoff).all()
+        for session in stale:
+            self.abort(session)
+        return len(stale)
+
+    def bytes_reserved(self, user_id: str) -> int:
+        """Size of the user's open sessions, counted against the storage quota."""
+        total = self.db.query(func.sum(UploadSession.size)).filter(
+            UploadSession.user_id == uuid.UUID(user_id)
+        ).scalar()
+        return total or 0
@@ -1,11 +1,14 @@
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash, verify_password
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
+from datetime import datetime
 import os
 import random
 from app.core.config import settings
+from app.utils.cursor import decode_cursor, encode_cursor
 import uuid
 
 class UserService:
@@ -103,4 +106,32 @@ class UserService:
         return user
 
     def get_users(self, skip: int = 0, limit: int = 100) -> List[User]:
-        return self.db.query(User).offset(skip).limit(limit).all()
+        return self.db.query(User).order_by(User.created_at, User.id).offset(skip).limit(limit).all()
+
+    def get_users_page(self, limit: int = 100, cursor: Optional[str] = None) -> Tuple[List[User], Optional[str]]:
+        """One page of users in signup order, keyset-paginated on (created_at, id).
+
+        Returns the page and the cursor of the next one (``None`` on the last
+        page). Raises ``ValueError`` for a malformed cursor.
+        """
+        query = self.db.query(User)
+        after = decode_cursor(cursor, 2)
+        if after is not None:
+            try:
+                last_created = datetime.fromisoformat(after[0])
+                last_id = uuid.UUID(str(after[1]))
+            except (TypeError, ValueError) as e:
+                raise ValueError("Invalid cursor") from e
+            query = query.filter(
+                or_(
+                    User.created_at > last_created,
+                    and_(User.created_at == last_created, User.id > last_id),
+                )
+            )
+        users = query.order_by(User.created_at, User.id).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor([users[-1].created_at.isoformat(), str(users[-1].id)])
+        return users, next_cursor
@@ -0,0 +1,101 @@
+"""
+Streaming compression of stored file content ("gzip", or "zstd" when zstandard is installed).
+"""
+import zlib
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - gzip is always available
+    zstandard = None
+
+# MIME types worth compressing at rest besides text/*
+_COMPRESSIBLE_TYPES = ("application/vnd.ms-excel", "application/json", "application/xml")
+
+# gzip container for zlib's streaming (de)compressor
+_GZIP_WBITS = 31
+
+
+def available_codec(name: Optional[str]) -> Optional[str]:
+    """The configured codec if it can be used here, else None (store uncompressed)."""
+    if name == "gzip" or (name == "zstd" and zstandard is not None):
+        return name
+    return None
+
+
+def is_compressible(mime_type: Optional[str]) -> bool:
+    return bool(mime_type) and (mime_type.startswith("text/") or mime_type in _COMPRESSIBLE_TYPES)
+
+
+def compressor(codec: str):
+    """Object with ``compress(bytes)`` and ``flush()``, producing one ``codec`` frame."""
+    if codec == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, _GZIP_WBITS)
+    if codec == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    raise ValueError(f"Unsupported content encoding: {codec}")
+
+
+def decompressor(codec: str):
+    """Object with ``decompress(bytes)`` undoing ``compressor(codec)`` chunk by chunk."""
+    if codec == "gzip":
+        return zlib.decompressobj(_GZIP_WBITS)
+    if codec == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unsupported content encoding: {codec}")
+
+
+class CompressingReader:
+    """File-like view of ``stream`` compressed with ``codec``.
+
+    ``read(n)`` returns exactly ``n`` bytes until the end, so callers that need
+    fixed part sizes (S3 multipart) can read from it like from the upload.
+    ``on_raw`` sees every uncompressed chunk (size and checksum of the original).
+    """
+
+    def __init__(self, stream: BinaryIO, codec: str, on_raw, chunk_size: int):
+        self.stream = stream
+        self.on_raw = on_raw
+        self.chunk_size = chunk_size
+        self._compressor = compressor(codec)
+        self._buffer = bytearray()
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            chunk = self.stream.read(self.chunk_size)
+            if chunk:
+                self.on_raw(chunk)
+                self._buffer += self._compressor.compress(chunk)
+            else:
+                self._buffer += self._compressor.flush()
+                self._eof = True
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
+def decompress_chunks(chunks: Iterable[bytes], codec: str) -> Iterator[bytes]:
+    d = decompressor(codec)
+    for chunk in chunks:
+        data = d.decompress(chunk)
+        if data:
+            yield data
+
+
+def decompress_bytes(data: bytes, codec: str) -> bytes:
+    return b"".join(decompress_chunks((data,), codec))
+
+
+def slice_chunks(chunks: Iterable[bytes], start: int, end: int) -> Iterator[bytes]:
+    """The inclusive byte range ``start``-``end`` of a chunk stream."""
+    offset = 0
+    for chunk in chunks:
+        chunk_end = offset + len(chunk)
+        if chunk_end > start:
+            yield chunk[max(0, start - offset):end + 1 - offset]
+        offset = chunk_end
+        if offset > end:
+            break
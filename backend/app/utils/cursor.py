@@ -0,0 +1,26 @@
+"""
+Opaque keyset-pagination cursors
+"""
+import base64
+import json
+from typing import Any, List, Optional
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Serialize the sort key of the last row of a page into a URL-safe token."""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: Optional[str], size: int) -> Optional[List[Any]]:
+    """Inverse of ``encode_cursor``; ``None`` for no cursor, ``ValueError`` if malformed."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
@@ -0,0 +1,68 @@
+"""
+Conditional-request and byte-range helpers for download endpoints
+"""
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+
+
+class RangeNotSatisfiable(ValueError):
+    """The requested range lies outside the representation."""
+
+
+def http_date(value: datetime) -> str:
+    return format_datetime(value, usegmt=True) if value.tzinfo else format_datetime(value)
+
+
+def _etag_list(header: str):
+    return [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether a GET with these request headers should get 304 (RFC 9110 section 13.2.2)."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag.removeprefix("W/") in _etag_list(if_none_match)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def parse_byte_range(
+    headers: Mapping[str, str], size: int, etag: str, last_modified: Optional[datetime]
+) -> Optional[Tuple[int, int]]:
+    """Inclusive ``(start, end)`` of a single ``Range: bytes=...`` request, or None for the full body.
+
+    Multiple ranges, other units and a failed ``If-Range`` validator fall back
+    to the full body. Raises RangeNotSatisfiable when no byte can be served.
+    """
+    header = headers.get("range")
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    if_range = headers.get("if-range")
+    if if_range:
+        if if_range.startswith(('"', "W/")):
+            # Only a strong validator may select a range
+            if if_range.startswith("W/") or etag.startswith("W/") or if_range != etag:
+                return None
+        elif last_modified is None or if_range != http_date(last_modified):
+            return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable(header)
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
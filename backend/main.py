@@ -1,17 +1,49 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
 from app.api.api_v1.api import api_router
 from app.core.database import Base, engine
+from app.core.processing import processing_service
+from app.core.readiness import readiness
+from app.services.storage_usage_job import reconcile_periodically
+from app.services.blob_gc import collect_periodically
+from app.services.blob_cache import blob_cache
+from contextlib import asynccontextmanager
+import asyncio
 from pathlib import Path
 import shutil
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Prime config, ETX login, ES catalog, DB pool and pandas in the background;
+    # /ready reports 503 until the required steps are done
+    warmup = asyncio.create_task(readiness.warm_up()) if settings.WARMUP_ON_STARTUP else None
+    reconciler = (
+        asyncio.create_task(reconcile_periodically())
+        if settings.STORAGE_USAGE_RECONCILE_SECONDS > 0
+        else None
+    )
+    blob_collector = (
+        asyncio.create_task(collect_periodically())
+        if settings.BLOB_GC_INTERVAL_SECONDS > 0
+        else None
+    )
+    yield
+    for task in (warmup, reconciler, blob_collector):
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    # Close pooled ETX HTTP connections
+    await processing_service.aclose()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description="ETX Processor API",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set up CORS
@@ -21,6 +53,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Include API router
@@ -70,4 +103,13 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    report = {"status": "healthy"}
+    if settings.STORAGE_TYPE == "s3" and blob_cache.enabled:
+        report["s3_read_cache"] = blob_cache.stats()
+    return report
+
+@app.get("/ready")
+async def readiness_check():
+    """Per-dependency warm-up state; 503 until the app can serve steady first requests"""
+    code = status.HTTP_200_OK if readiness.is_ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(status_code=code, content=readiness.report())
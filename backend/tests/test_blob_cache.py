@@ -0,0 +1,60 @@
+import os
+
+from app.core.config import settings
+from app.services import storage_service as storage_module
+from app.services.blob_cache import BlobCache
+from app.services.storage_service import StorageService
+
+
+def s3_storage(monkeypatch, cache, s3, objects):
+    monkeypatch.setattr(storage_module, "blob_cache", cache)
+    s3.objects.update(objects)
+    storage = StorageService()
+    storage.storage_type = "s3"
+    storage.s3_client = s3
+    return storage
+
+
+def test_repeat_reads_hit_the_cache(tmp_path, fake_s3, monkeypatch):
+    cache = BlobCache(str(tmp_path / "cache"), max_bytes=1000)
+    storage = s3_storage(monkeypatch, cache, fake_s3, {"files/a.csv": b"a,b\n1,2\n"})
+
+    assert storage.read_file_bytes("files/a.csv", "v1") == b"a,b\n1,2\n"
+    assert storage.read_file_bytes("files/a.csv", "v1") == b"a,b\n1,2\n"
+    assert storage.s3_client.gets == 1
+
+    # A new version of the row is a miss; so is an unknown version whose ETag changed
+    storage.s3_client.objects["files/a.csv"] = b"x\n"
+    assert storage.read_file_bytes("files/a.csv", "v2") == b"x\n"
+    assert storage.read_file_bytes("files/a.csv") == b"x\n"
+    assert storage.read_file_bytes("files/a.csv") == b"x\n"
+    assert storage.s3_client.gets == 3
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (2, 3, 0.4)
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = BlobCache(str(tmp_path), max_bytes=25)
+    cache.put("a", "1", b"a" * 10)
+    cache.put("b", "1", b"b" * 10)
+    os.utime(cache._path_for("a", "1"), (1, 1))
+    os.utime(cache._path_for("b", "1"), (2, 2))
+    assert cache.get("a", "1") == b"a" * 10  # now the most recently used
+
+    cache.put("c", "1", b"c" * 10)
+    assert cache.get("b", "1") is None
+    assert cache.get("a", "1") is not None and cache.get("c", "1") is not None
+    assert (cache.evictions, cache.evicted_bytes) == (1, 10)
+
+    cache.put("huge", "1", b"h" * 26)  # larger than the whole cache: not stored
+    assert cache.get("huge", "1") is None
+
+
+def test_disabled_cache_reads_straight_from_s3(tmp_path, fake_s3, monkeypatch):
+    monkeypatch.setattr(settings, "S3_READ_CACHE_MAX_BYTES", 0)
+    cache = BlobCache(str(tmp_path))
+    storage = s3_storage(monkeypatch, cache, fake_s3, {"k": b"data"})
+    assert storage.read_file_bytes("k", "v") == b"data"
+    assert storage.read_file_bytes("k", "v") == b"data"
+    assert storage.s3_client.gets == 2 and not os.listdir(tmp_path)
@@ -0,0 +1,91 @@
+import pytest
+
+from app.core.config import settings
+from app.models.blob import Blob
+from app.models.blob_deletion import BlobDeletion
+from app.models.file import File
+from app.services import blob_gc
+from app.services.file_service import FileService
+from app.services.storage_service import StorageService, blob_path
+
+
+@pytest.fixture
+def dedup_storage(tmp_path, patch_session_scope, monkeypatch):
+    from app.api.api_v1.endpoints import files
+
+    monkeypatch.setattr(settings, "LOCAL_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "STORAGE_DEDUP", True)
+    storage = StorageService()
+    monkeypatch.setattr(files, "storage_service", storage)
+    monkeypatch.setattr(blob_gc, "storage_service", storage)
+    patch_session_scope(blob_gc)
+    return storage
+
+
+def upload(client, *files):
+    resp = client.post("/files/upload", files=[("files", (name, data, "text/csv")) for name, data in files])
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def blob_files(tmp_path):
+    return [p for p in (tmp_path / "blobs").rglob("*") if p.is_file()]
+
+
+def ref_counts(db_session):
+    db_session.expire_all()
+    return {b.checksum: b.ref_count for b in db_session.query(Blob)}
+
+
+def test_identical_uploads_share_one_blob(dedup_storage, files_client, db_session, tmp_path):
+    first = upload(files_client, ("jan.csv", b"a,b\n1,2\n"), ("copy.csv", b"a,b\n1,2\n"))
+    second = upload(files_client, ("jan-again.csv", b"a,b\n1,2\n"), ("feb.csv", b"a,b\n3,4\n"))
+
+    rows = first + second
+    assert rows[0]["file_path"] == blob_path(rows[0]["checksum"])
+    assert len({r["file_path"] for r in rows}) == 2
+    assert len(blob_files(tmp_path)) == 2
+    assert sorted(ref_counts(db_session).values()) == [1, 3]
+    assert not list((tmp_path / ".staging").iterdir())
+    # Usage still counts every file
+    usage = FileService(db_session).get_storage_usage(str(rows[0]["user_id"]))
+    assert usage["file_count"] == 4
+
+
+def test_blob_is_collected_after_last_reference(dedup_storage, files_client, db_session, tmp_path):
+    rows = upload(files_client, ("a.csv", b"same"), ("b.csv", b"same"))
+    service = FileService(db_session)
+    user_id = rows[0]["user_id"]
+
+    service.delete_file(rows[0]["id"], user_id)
+    assert db_session.query(BlobDeletion).count() == 0
+    service.delete_file(rows[1]["id"], user_id)
+    assert [p for (p,) in db_session.query(BlobDeletion.file_path)] == [rows[0]["file_path"]]
+
+    assert blob_gc.collect_deleted_blobs() == 1
+    assert blob_files(tmp_path) == []
+    assert ref_counts(db_session) == {}
+
+
+def test_reupload_before_collection_keeps_the_blob(dedup_storage, files_client, db_session, tmp_path):
+    (row,) = upload(files_client, ("a.csv", b"monthly"))
+    FileService(db_session).delete_file(row["id"], row["user_id"])
+    (again,) = upload(files_client, ("a.csv", b"monthly"))
+
+    assert blob_gc.collect_deleted_blobs() == 0
+    assert db_session.query(BlobDeletion).count() == 0
+    assert len(blob_files(tmp_path)) == 1
+    assert ref_counts(db_session) == {again["checksum"]: 1}
+
+
+def test_folder_delete_releases_shared_blobs(dedup_storage, files_client, db_session, tmp_path):
+    rows = upload(files_client, ("a.csv", b"x"), ("b.csv", b"x"), ("c.csv", b"y"))
+    db_session.query(File).filter(File.is_folder == False).update({"folder_path": "/d", "parent_path": "/d"})
+    service = FileService(db_session)
+    service.ensure_folder_hierarchy(rows[0]["user_id"], "/d")
+    folder = db_session.query(File).filter(File.is_folder == True, File.folder_path == "/d").one()
+
+    service.delete_file(str(folder.id), rows[0]["user_id"])
+    assert sorted(p for (p,) in db_session.query(BlobDeletion.file_path)) == sorted({r["file_path"] for r in rows})
+    assert blob_gc.collect_deleted_blobs() == 2
+    assert blob_files(tmp_path) == []
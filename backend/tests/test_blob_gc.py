@@ -0,0 +1,81 @@
+import pytest
+
+from app.core.config import settings
+from app.models.blob_deletion import BlobDeletion
+from app.models.file import File
+from app.schemas.file import FileCreate
+from app.services import blob_gc
+from app.services.file_service import FileService
+from app.services.storage_service import StorageService
+
+
+@pytest.fixture
+def local_storage(tmp_path, patch_session_scope, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_UPLOAD_DIR", str(tmp_path))
+    storage = StorageService()
+    monkeypatch.setattr(blob_gc, "storage_service", storage)
+    patch_session_scope(blob_gc)
+    return storage
+
+
+def seed_tree(service, user, tmp_path, count):
+    service.ensure_folder_hierarchies(str(user.id), ["/a/b", "/ab"])
+    data = []
+    for i in range(count):
+        name = f"blob{i}.csv"
+        (tmp_path / name).write_bytes(b"x" * i)
+        data.append(
+            FileCreate(
+                filename=name,
+                original_filename=name,
+                file_path=name,
+                file_size=i,
+                mime_type="text/csv",
+                folder_path=["/a", "/a/b", "/ab"][i % 3],
+                user_id=str(user.id),
+            )
+        )
+    service.create_files(data)
+
+
+def test_folder_delete_is_set_based_and_queues_blobs(local_storage, db_session, user, tmp_path):
+    service = FileService(db_session)
+    seed_tree(service, user, tmp_path, 30)
+    folder = db_session.query(File).filter(File.folder_path == "/a", File.is_folder == True).one()
+
+    assert service.delete_file(str(folder.id), str(user.id))
+    remaining = db_session.query(File.folder_path).all()
+    assert {path for (path,) in remaining} == {"/ab"}
+    queued = {path for (path,) in db_session.query(BlobDeletion.file_path)}
+    assert queued == {f"blob{i}.csv" for i in range(30) if i % 3 != 2}
+    usage = service.get_storage_usage(str(user.id))
+    assert (usage["file_count"], usage["total_size"]) == (10, sum(range(2, 30, 3)))
+    # Blobs stay until the collector runs
+    assert len(list(tmp_path.glob("blob*"))) == 30
+
+    assert blob_gc.collect_deleted_blobs(batch_size=7) == 20
+    assert sorted(p.name for p in tmp_path.glob("blob*")) == sorted(f"blob{i}.csv" for i in range(2, 30, 3))
+    assert db_session.query(BlobDeletion).count() == 0
+
+
+def test_file_delete_queues_its_blob(local_storage, db_session, user, tmp_path):
+    service = FileService(db_session)
+    seed_tree(service, user, tmp_path, 3)
+    one = db_session.query(File).filter(File.original_filename == "blob1.csv").one()
+
+    service.delete_file(str(one.id), str(user.id))
+    assert [path for (path,) in db_session.query(BlobDeletion.file_path)] == ["blob1.csv"]
+    assert blob_gc.collect_deleted_blobs() == 1
+    assert not (tmp_path / "blob1.csv").exists()
+
+
+def test_s3_deletes_in_batches_of_1000_and_keeps_failures(fake_s3):
+    fake_s3.failing.add("k5")
+    storage = StorageService()
+    storage.storage_type = "s3"
+    storage.s3_client = fake_s3
+    paths = [f"k{i}" for i in range(2500)]
+
+    deleted = storage.delete_files(paths)
+    assert [len(b) for b in storage.s3_client.batches] == [1000, 1000, 500]
+    assert set(deleted) == set(paths) - {"k5"}
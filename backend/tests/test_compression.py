@@ -0,0 +1,79 @@
+import hashlib
+import io
+import uuid
+
+import pytest
+
+from app.core.config import settings
+from app.models.file import File
+from app.services.file_service import FileService
+from app.services.storage_service import StorageService
+from app.utils.compression import CompressingReader, decompress_bytes, slice_chunks
+
+CSV = b"".join(b"%d,name %d,%d.5\n" % (i, i % 7, i * 3) for i in range(5000))
+
+
+def test_compressing_reader_returns_full_reads():
+    seen = []
+    reader = CompressingReader(io.BytesIO(CSV), "gzip", seen.append, chunk_size=1000)
+    parts = []
+    while part := reader.read(512):
+        parts.append(part)
+    assert all(len(part) == 512 for part in parts[:-1])
+    assert decompress_bytes(b"".join(parts), "gzip") == CSV
+    assert b"".join(seen) == CSV
+
+
+def test_slice_chunks():
+    chunks = [b"abc", b"def", b"ghi"]
+    assert b"".join(slice_chunks(chunks, 2, 6)) == b"cdefg"
+    assert b"".join(slice_chunks(chunks, 8, 8)) == b"i"
+
+
+@pytest.fixture
+def compressed_upload(files_client, db_session, user, tmp_path, monkeypatch):
+    from app.api.api_v1.endpoints import files
+
+    monkeypatch.setattr(settings, "LOCAL_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "STORAGE_COMPRESSION", "gzip")
+    monkeypatch.setattr(files, "storage_service", StorageService())
+    response = files_client.post(
+        "/files/upload",
+        files=[("files", ("data.csv", CSV, "text/csv")), ("files", ("img.png", b"\x89PNG....", "image/png"))],
+    )
+    assert response.status_code == 200
+    return {f["original_filename"]: f for f in response.json()}
+
+
+def test_text_uploads_are_stored_compressed(compressed_upload, db_session, user, tmp_path):
+    csv_id = compressed_upload["data.csv"]["id"]
+    csv_row = db_session.get(File, uuid.UUID(csv_id))
+    assert csv_row.content_encoding == "gzip"
+    assert csv_row.file_size == len(CSV)
+    assert csv_row.checksum == hashlib.sha256(CSV).hexdigest()
+    stored = (tmp_path / csv_row.file_path).read_bytes()
+    assert stored[:2] == b"\x1f\x8b" and len(stored) < len(CSV) // 3
+
+    png_row = db_session.get(File, uuid.UUID(compressed_upload["img.png"]["id"]))
+    assert png_row.content_encoding is None
+
+    assert FileService(db_session).get_file_content(csv_id, str(user.id)) == CSV
+
+
+def test_download_decompresses_with_ranges(compressed_upload, files_client):
+    url = f"/files/{compressed_upload['data.csv']['id']}/content"
+    full = files_client.get(url)
+    assert full.status_code == 200 and full.content == CSV
+    assert full.headers["content-length"] == str(len(CSV))
+
+    part = files_client.get(url, headers={"Range": "bytes=70000-70099"})
+    assert part.status_code == 206 and part.content == CSV[70000:70100]
+
+
+def test_size_limit_applies_to_original_bytes(tmp_path, monkeypatch):
+    from app.services.storage_service import FileTooLargeError
+    monkeypatch.setattr(settings, "LOCAL_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "STORAGE_COMPRESSION", "gzip")
+    with pytest.raises(FileTooLargeError):
+        StorageService().upload_file_stream(io.BytesIO(CSV), "a.csv", "text/csv", "u", max_size=len(CSV) - 1)
+    assert not [p for p in tmp_path.rglob("*") if p.is_file()]
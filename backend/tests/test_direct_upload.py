@@ -0,0 +1,87 @@
+import pytest
+
+from app.core.config import settings
+from app.models.file import File
+from app.services.storage_service import StorageService
+
+
+@pytest.fixture
+def s3(files_client, fake_s3, monkeypatch):
+    from app.api.api_v1.endpoints import files
+
+    storage = StorageService()
+    storage.storage_type = "s3"
+    storage.s3_client = fake_s3
+    monkeypatch.setattr(files, "storage_service", storage)
+    monkeypatch.setattr(settings, "S3_DIRECT_UPLOAD_PART_SIZE", 5 * 1024 * 1024)
+    return storage.s3_client
+
+
+def test_presign_then_finalize(files_client, s3, db_session, user):
+    big = b"x" * (11 * 1024 * 1024)
+    targets = files_client.post("/files/uploads/presign", json={
+        "folder_path": "/in",
+        "files": [
+            {"filename": "a.csv", "size": 3, "content_type": "text/csv", "relative_path": "batch/a.csv"},
+            {"filename": "big.bin", "size": len(big)},
+        ],
+    }).json()
+    small, multi = targets
+    assert small["url"].startswith("https://s3.example/files/") and small["headers"] == {"Content-Type": "text/csv"}
+    assert multi["upload_id"] and len(multi["part_urls"]) == 3
+
+    s3.objects[small["key"]] = b"1,2"
+    size = multi["part_size"]
+    parts = [
+        {
+            "part_number": n,
+            "etag": s3.upload_part(
+                Bucket="b", Key=multi["key"], UploadId=multi["upload_id"], PartNumber=n,
+                Body=big[(n - 1) * size:n * size],
+            )["ETag"],
+        }
+        for n in (1, 2, 3)
+    ]
+    body = {
+        "folder_path": "/in",
+        "files": [
+            {"key": small["key"], "filename": "a.csv", "size": 3, "content_type": "text/csv", "relative_path": "batch/a.csv"},
+            {"key": multi["key"], "filename": "big.bin", "size": len(big), "upload_id": multi["upload_id"], "parts": parts},
+        ],
+    }
+    response = files_client.post("/files/uploads/finalize", json=body)
+    assert response.status_code == 200
+    assert {(f["original_filename"], f["folder_path"]) for f in response.json()} == {
+        ("a.csv", "/in/batch"), ("big.bin", "/in"),
+    }
+    assert s3.objects[multi["key"]] == big
+    assert db_session.query(File).filter(File.is_folder == True).count() == 2  # /in and /in/batch
+
+    assert files_client.post("/files/uploads/finalize", json=body).status_code == 409
+
+
+def test_finalize_rejects_foreign_missing_or_short_objects(files_client, s3, user):
+    def finalize(key, size=3):
+        return files_client.post("/files/uploads/finalize", json={"files": [{"key": key, "filename": "a", "size": size}]})
+
+    own = f"files/{user.id}/x.csv"
+    assert finalize("files/someone-else/x.csv").status_code == 400
+    assert finalize(f"files/{user.id}/../x.csv").status_code == 400
+    assert finalize(own).status_code == 400  # never uploaded
+    s3.objects[own] = b"12"
+    assert finalize(own).status_code == 400  # size differs from the announced one
+    assert finalize(own, size=2).status_code == 200
+
+
+def test_presign_checks_limits_and_storage(files_client, s3, monkeypatch):
+    monkeypatch.setattr(settings, "USER_STORAGE_QUOTA_BYTES", 10)
+    assert files_client.post(
+        "/files/uploads/presign", json={"files": [{"filename": "a", "size": 11}]}
+    ).status_code == 413
+
+    from app.api.api_v1.endpoints import files
+
+    monkeypatch.setattr(files.storage_service, "storage_type", "local")
+    assert files_client.post(
+        "/files/uploads/presign", json={"files": [{"filename": "a", "size": 1}]}
+    ).status_code == 400
@@ -0,0 +1,90 @@
+import pytest
+
+from app.core.config import settings
+from app.schemas.file import FileCreate
+from app.services.file_service import FileService
+from app.services.storage_service import StorageService
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def stored_file(tmp_path, db_session, user, monkeypatch):
+    from app.api.api_v1.endpoints import files
+
+    monkeypatch.setattr(settings, "LOCAL_UPLOAD_DIR", str(tmp_path))
+    storage = StorageService()
+    monkeypatch.setattr(files, "storage_service", storage)
+    (tmp_path / "data.bin").write_bytes(CONTENT)
+    row = FileService(db_session).create_file(
+        FileCreate(
+            filename="data.bin",
+            original_filename="report ü.bin",
+            file_path="data.bin",
+            file_size=len(CONTENT),
+            checksum="abc123",
+            mime_type="application/octet-stream",
+            folder_path="/",
+            user_id=str(user.id),
+        )
+    )
+    return storage, f"/files/{row.id}/content"
+
+
+def test_local_full_range_and_conditional(files_client, stored_file):
+    _, url = stored_file
+    full = files_client.get(url)
+    assert full.status_code == 200
+    assert full.content == CONTENT
+    assert full.headers["etag"] == '"abc123"'
+    assert full.headers["content-disposition"].endswith("filename*=utf-8''report%20%C3%BC.bin")
+
+    part = files_client.get(url, headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.content == CONTENT[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+    assert files_client.get(url, headers={"If-None-Match": '"abc123"'}).status_code == 304
+    stale = files_client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200 and stale.content == CONTENT
+
+
+def test_s3_streams_ranges_without_presigning(files_client, stored_file, fake_s3, monkeypatch):
+    storage, url = stored_file
+    storage.storage_type = "s3"
+    storage.s3_client = fake_s3
+    fake_s3.objects["data.bin"] = CONTENT
+    monkeypatch.setattr(settings, "S3_PRESIGNED_DOWNLOADS", False)
+    monkeypatch.setattr(settings, "DOWNLOAD_CHUNK_SIZE", 1000)
+
+    full = files_client.get(url)
+    assert full.status_code == 200 and full.content == CONTENT
+
+    tail = files_client.get(url, headers={"Range": "bytes=-24"})
+    assert tail.status_code == 206
+    assert tail.content == CONTENT[-24:]
+    assert storage.s3_client.ranges == [None, f"bytes={len(CONTENT) - 24}-{len(CONTENT) - 1}"]
+
+    beyond = files_client.get(url, headers={"Range": f"bytes={len(CONTENT)}-"})
+    assert beyond.status_code == 416
+    assert beyond.headers["content-range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_s3_redirects_to_presigned_url(files_client, stored_file, fake_s3, monkeypatch):
+    storage, url = stored_file
+    storage.storage_type = "s3"
+    storage.s3_client = fake_s3
+    fake_s3.objects["data.bin"] = CONTENT
+    monkeypatch.setattr(settings, "S3_PRESIGN_EXPIRES_SECONDS", 60)
+
+    resp = files_client.get(url, follow_redirects=False)
+    assert resp.status_code == 307
+    assert resp.headers["location"] == "https://s3.example/data.bin?op=get_object&expires=60"
+    assert storage.s3_client.ranges == []
+
+
+def test_folders_have_no_content(files_client, db_session, user):
+    from app.schemas.file import FolderCreate
+
+    folder = FileService(db_session).create_folder(str(user.id), FolderCreate(folder_name="docs"))
+    assert files_client.get(f"/files/{folder.id}/content").status_code == 404
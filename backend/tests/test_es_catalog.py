@@ -0,0 +1,137 @@
+import asyncio
+import os
+
+import pytest
+
+from app.core.es_catalog import EsCatalog, EsCatalogStore, ensure_private_dir, publish_catalog
+
+
+def make_catalog(tmp_path, rows):
+    path = str(tmp_path / "catalog" / "es.bin")
+    publish_catalog(path, rows)
+    return EsCatalog(path)
+
+
+def test_full_name_and_suffix_match(tmp_path):
+    catalog = make_catalog(tmp_path, [("Tenant / Org A / ES 1", "id1")])
+    assert catalog.find_es_id("Tenant / Org A / ES 1") == "id1"
+    assert catalog.find_es_id("Org A / ES 1") == "id1"
+    assert catalog.find_es_id("ES 1") == "id1"
+
+
+def test_first_matching_row_wins(tmp_path):
+    catalog = make_catalog(
+        tmp_path, [("A / Org / ES", "first"), ("B / Org / ES", "second")]
+    )
+    assert catalog.find_es_id("Org / ES") == "first"
+    assert catalog.find_es_id("B / Org / ES") == "second"
+
+
+def test_suffix_match_beats_earlier_prefix_substring(tmp_path):
+    # str.contains would have returned "ES 10" for "Org / ES 1"
+    catalog = make_catalog(
+        tmp_path, [("T / Org / ES 10", "id10"), ("T / Org / ES 1", "id1")]
+    )
+    assert catalog.find_es_id("Org / ES 1") == "id1"
+    assert catalog.find_es_id("Org / ES 10") == "id10"
+
+
+def test_substring_fallback_returns_first_containing_row(tmp_path):
+    catalog = make_catalog(
+        tmp_path,
+        [("T / Org A / ES 1", "a1"), ("X / Org B / ES 2 / sub", "b2"), ("Y / Org B / ES 3", "b3")],
+    )
+    assert catalog.find_es_id("Org B") == "b2"
+    assert catalog.find_es_id("Org A / E") == "a1"
+    assert catalog.find_es_id("ES 3") == "b3"
+
+
+def test_substring_fallback_does_not_span_rows(tmp_path):
+    catalog = make_catalog(tmp_path, [("abc", "1"), ("def", "2")])
+    assert catalog.find_es_id("cd") is None
+    assert catalog.find_es_id("de") == "2"
+
+
+def test_missing_and_empty_names(tmp_path):
+    catalog = make_catalog(tmp_path, [("T / Org / ES", "id")])
+    assert catalog.find_es_id("Other / ES") is None
+    assert catalog.find_es_id("") is None
+
+
+def test_empty_catalog(tmp_path):
+    catalog = make_catalog(tmp_path, [])
+    assert len(catalog) == 0
+    assert catalog.find_es_id("anything") is None
+
+
+def test_unicode_names(tmp_path):
+    catalog = make_catalog(tmp_path, [("Ünï / Zürich", "uz")])
+    assert catalog.find_es_id("Zürich") == "uz"
+    assert catalog.find_es_id("Ünï") == "uz"
+    assert catalog.name(0) == "Ünï / Zürich"
+
+
+def test_many_rows_all_resolvable(tmp_path):
+    rows = [(f"T / Org {i % 37} / ES {i}", str(i)) for i in range(5000)]
+    catalog = make_catalog(tmp_path, rows)
+    assert len(catalog) == 5000
+    for i in range(5000):
+        assert catalog.find_es_id(f"Org {i % 37} / ES {i}") == str(i)
+
+
+def test_corrupt_file_is_rejected(tmp_path):
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"not a catalog at all, just some bytes")
+    with pytest.raises(ValueError):
+        EsCatalog(str(path))
+
+
+def test_attach_swaps_to_republished_snapshot(tmp_path):
+    store = EsCatalogStore(str(tmp_path / "store"))
+    assert store.attach("src") is None
+
+    publish_catalog(store.path_for("src"), [("T / Org / ES", "old")])
+    first = store.attach("src")
+    assert store.attach("src") is first
+
+    publish_catalog(store.path_for("src"), [("T / Org / ES", "new")])
+    second = store.attach("src")
+    assert second is not first
+    assert second.find_es_id("Org / ES") == "new"
+    # readers holding the previous mapping keep a consistent view
+    assert first.find_es_id("Org / ES") == "old"
+
+
+def test_get_refreshes_only_when_stale(tmp_path):
+    store = EsCatalogStore(str(tmp_path / "store"))
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return [("T / Org / ES", f"v{len(calls)}")]
+
+    async def run():
+        a = await store.get("src", loader, max_age=60)
+        b = await store.get("src", loader, max_age=60)
+        c = await store.get("src", loader, max_age=0)
+        return a, b, c
+
+    a, b, c = asyncio.run(run())
+    assert a is b
+    assert len(calls) == 2
+    assert c.find_es_id("Org / ES") == "v2"
+
+
+def test_private_dir_is_created_owner_only(tmp_path):
+    directory = tmp_path / "private"
+    ensure_private_dir(str(directory))
+    assert os.stat(directory).st_mode & 0o077 == 0
+
+
+def test_world_writable_dir_is_refused(tmp_path):
+    directory = tmp_path / "shared"
+    directory.mkdir()
+    os.chmod(directory, 0o777)
+    store = EsCatalogStore(str(directory))
+    with pytest.raises(PermissionError):
+        store.attach("src")
@@ -0,0 +1,144 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core import etx_client
+from app.core.etx_client import ETXClient, ETXError
+
+CONFIG = {
+    "HTTPURI": "http://etx.test",
+    "WSURI": "ws://etx.test",
+    "API_KEY": "key",
+    "email": "bot@example.com",
+    "password": "secret",
+}
+
+
+class FakeWebSocket:
+    """Replies to each command with ``{"ok": <n>}``, or never when ``hang`` is set."""
+
+    def __init__(self, url):
+        self.url = url
+        self.sent = []
+        self.closed = False
+        self.hang = False
+
+    async def send(self, text):
+        self.sent.append(text)
+
+    async def recv(self):
+        if self.hang:
+            await asyncio.Event().wait()
+        return json.dumps({"ok": len(self.sent)})
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def sockets(monkeypatch):
+    opened = []
+
+    async def connect(url, **kwargs):
+        opened.append(FakeWebSocket(url))
+        return opened[-1]
+
+    monkeypatch.setattr(etx_client, "ws_connect", connect)
+    return opened
+
+
+def make_client(calls):
+    def handler(request):
+        calls.append(request)
+        if request.url.path == "/fid-auth":
+            return httpx.Response(200, json={"login": {"fid": f"f{len(calls)}"}})
+        return httpx.Response(200, json={"path": request.url.path, "key": request.headers["DTX-DS-KEY"]})
+
+    return ETXClient(CONFIG, ws_timeout=0.05, transport=httpx.MockTransport(handler))
+
+
+def test_login_and_requests_share_the_pooled_client(sockets):
+    calls = []
+
+    async def flow():
+        async with make_client(calls) as client:
+            async with client.session(set_org=False) as ws:
+                assert await ws.send({"GetOrgs": {}}) == {"ok": 1}
+            response = await client.request("POST", "PublishBARData", data=b"x")
+            assert response.json() == {"path": "/ctx/v1/PublishBARData", "key": "key"}
+            async with client.session(set_org=False):
+                pass
+            return client
+
+    client = asyncio.run(flow())
+    assert [c.url.path for c in calls] == ["/fid-auth", "/ctx/v1/PublishBARData", "/fid-auth"]
+    assert json.loads(calls[0].content) == {"login": {"email": "bot@example.com", "password": "secret"}}
+    assert [s.url for s in sockets] == ["ws://etx.test/fid-f1", "ws://etx.test/fid-f3"]
+    assert all(s.closed for s in sockets) and client._active == 0
+
+
+def test_processing_service_reuses_client_per_config():
+    from app.core.processing import ProcessingService
+
+    service = ProcessingService()
+    first = service.etx_client(CONFIG)
+    assert service.etx_client(dict(CONFIG)) is first
+    replaced = service.etx_client({**CONFIG, "API_KEY": "rotated"})
+    assert replaced is not first and first._http.is_closed  # no loop running: closed right away
+
+
+def test_timeout_aborts_the_session(sockets):
+    async def flow():
+        async with make_client([]) as client:
+            async with client.session(set_org=False) as ws:
+                sockets[0].hang = True
+                with pytest.raises(ETXError, match="timed out"):
+                    await ws.send({"GetOrgs": {}})
+                assert sockets[0].closed
+                with pytest.raises(ETXError, match="closed"):
+                    await ws.send({"GetOrgs": {}})
+
+    asyncio.run(flow())
+
+
+def test_cancel_aborts_the_session(sockets):
+    async def flow():
+        async with make_client([]) as client:
+            async with client.session(set_org=False, timeout=10) as ws:
+                sockets[0].hang = True
+                task = asyncio.create_task(ws.send({"GetOrgs": {}}))
+                await asyncio.sleep(0.01)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                assert sockets[0].closed
+                with pytest.raises(ETXError):
+                    await ws.send({"GetOrgs": {}})
+
+    asyncio.run(flow())
+
+
+def test_aclose_when_idle_waits_for_in_flight_flows(sockets):
+    async def flow():
+        client = make_client([])
+        release = asyncio.Event()
+
+        async def running_flow():
+            async with client.session(set_org=False) as ws:
+                await release.wait()
+                return await ws.send({"GetOrgs": {}})
+
+        running = asyncio.create_task(running_flow())
+        await asyncio.sleep(0.01)
+        closing = asyncio.create_task(client.aclose_when_idle(poll_interval=0.01))
+        await asyncio.sleep(0.05)
+        assert not closing.done() and not client._http.is_closed
+
+        release.set()
+        assert await running == {"ok": 1}
+        await asyncio.wait_for(closing, 1)
+        assert client._http.is_closed
+
+    asyncio.run(flow())
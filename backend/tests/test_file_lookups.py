@@ -0,0 +1,48 @@
+import uuid
+
+from sqlalchemy import event
+
+from app.services.file_service import FileService
+
+
+def count_selects(session):
+    statements = []
+    event.listen(
+        session.get_bind(), "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement)
+        if statement.lstrip().upper().startswith("SELECT") else None,
+    )
+    return statements
+
+
+def test_file_is_fetched_once_per_service(db_session, user, make_file):
+    file_id = str(FileService(db_session).create_file(make_file("a.csv")).id)
+    user_id = str(user.id)
+    db_session.expire_all()
+    selects = count_selects(db_session)
+
+    service = FileService(db_session)
+    assert service.get_file_path(file_id, user_id) == "files/a.csv"
+    assert service.get_file_name_and_extension(file_id, user_id) == ("a.csv", ".csv")
+    assert service.snapshot_file(file_id, user_id).folder_path == "/"
+    assert len(selects) == 1
+
+    assert service.get_file_by_id(file_id, str(uuid.uuid4())) is None  # other users still get nothing
+
+
+def test_get_files_by_ids_batches(db_session, user, make_file, monkeypatch):
+    from app.services import file_service as module
+
+    monkeypatch.setattr(module, "_BATCH_SIZE", 2)
+    ids = [str(f.id) for f in FileService(db_session).create_files([make_file(f"{i}.csv") for i in range(5)])]
+    user_id = str(user.id)
+    db_session.expire_all()
+    selects = count_selects(db_session)
+
+    service = FileService(db_session)
+    found = service.get_files_by_ids(ids + [str(uuid.uuid4()), "not-a-uuid"], user_id)
+    assert sorted(found) == sorted(ids)
+    assert len(selects) == 3
+    assert service.snapshot_files(ids[:2], user_id)[ids[0]].original_filename == "0.csv"
+    assert len(selects) == 3
+    assert service.get_files_by_ids(ids, str(uuid.uuid4())) == {}
@@ -0,0 +1,33 @@
+def test_search_pages_with_cursor(files_client, add_file):
+    for name in ["report-3.csv", "Report-1.csv", "other.csv", "report-2.csv", "notes.txt"]:
+        add_file(name)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "REPORT", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        resp = files_client.get("/files/search", params=params)
+        assert len(resp.json()) <= 2
+        seen += [i["original_filename"] for i in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert sorted(seen) == ["Report-1.csv", "report-2.csv", "report-3.csv"]
+    assert len(seen) == len(set(seen))
+
+
+def test_search_treats_wildcards_literally(files_client, add_file):
+    add_file("100%_done.csv")
+    add_file("100 done.csv")
+
+    resp = files_client.get("/files/search", params={"q": "100%_"})
+    assert [i["original_filename"] for i in resp.json()] == ["100%_done.csv"]
+    assert "X-Next-Cursor" not in resp.headers
+
+
+def test_search_rejects_bad_cursor(files_client):
+    resp = files_client.get("/files/search", params={"q": "x", "cursor": "not-a-cursor"})
+    assert resp.status_code == 400
@@ -0,0 +1,49 @@
+from app.schemas.file import FolderCreate
+from app.services.file_service import FileService
+from app.services.file_tree_cache import FileTreeCache, etag_matches, tree_etag
+
+
+def test_etag_matching():
+    etag = tree_etag("u", 3)
+    assert etag_matches(etag, etag)
+    assert etag_matches('"other", ' + etag[2:], etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(tree_etag("u", 4), etag)
+
+
+def test_cache_is_versioned_and_bounded():
+    cache = FileTreeCache(max_entries=2)
+    cache.put("a", 1, b"a1")
+    assert cache.get("a", 1) == b"a1"
+    assert cache.get("a", 2) is None  # stale version is dropped
+    cache.put("a", 2, b"a2")
+    cache.put("a", 1, b"late")  # an older build never replaces a newer one
+    assert cache.get("a", 2) == b"a2"
+    cache.put("b", 1, b"b1")
+    cache.put("c", 1, b"c1")
+    assert cache.get("a", 2) is None  # least recently used evicted
+    assert cache.get("c", 1) == b"c1"
+
+
+def test_tree_endpoint_etag_and_invalidation(files_client, db_session, user):
+    first = files_client.get("/files/tree")
+    assert first.status_code == 200
+    assert first.json() == []
+    etag = first.headers["etag"]
+
+    assert files_client.get("/files/tree", headers={"If-None-Match": etag}).status_code == 304
+
+    FileService(db_session).create_folder(str(user.id), FolderCreate(folder_name="docs"))
+    second = files_client.get("/files/tree", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["etag"] != etag
+    assert [n["name"] for n in second.json()] == ["docs"]
+
+    FileService(db_session).ensure_folder_hierarchy(str(user.id), "/docs/2024")
+    third = files_client.get("/files/tree")
+    assert third.json()[0]["children"][0]["name"] == "2024"
+
+    folder_id = third.json()[0]["id"]
+    assert FileService(db_session).delete_file(folder_id, str(user.id))
+    assert files_client.get("/files/tree").json() == []
@@ -0,0 +1,70 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+from pydantic import TypeAdapter
+
+from app.models.file import File
+from app.schemas.file import FileTreeNode
+from app.services import file_service as fs
+from app.services.file_service import FileService
+
+adapter = TypeAdapter(list[FileTreeNode])
+
+
+def seed(db_session, user):
+    def row(name, folder_path, is_folder, size=0):
+        db_session.add(
+            File(
+                id=uuid.uuid4(),
+                user_id=user.id,
+                filename=name,
+                original_filename=name,
+                file_path=folder_path if is_folder else f"uploads/{name}",
+                file_size=size,
+                mime_type=None if is_folder else "text/csv",
+                folder_path=folder_path,
+                is_folder=is_folder,
+                uploaded_at=datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc),
+            )
+        )
+
+    row("docs", "/docs", True)
+    row("2024", "/docs/2024", True)
+    row("Zeta", "/zeta", True)
+    row("lost", "/missing/lost", True)  # parent folder row does not exist
+    row("b.csv", "/docs", False, 3)
+    row("A.csv", "/docs", False, 4)
+    row("y.csv", "/docs/2024", False, 5)
+    row("root.csv", "/", False, 6)
+    row("orphan.csv", "/gone", False, 7)
+    db_session.commit()
+
+
+def test_fast_tree_matches_pydantic_tree(db_session, user):
+    seed(db_session, user)
+    service = FileService(db_session)
+
+    slow = adapter.dump_json(service.get_file_tree(str(user.id)))
+    fast = service.get_file_tree_json(str(user.id))
+    assert json.loads(fast) == json.loads(slow)
+    assert [n["name"] for n in json.loads(fast)] == ["root.csv", "docs", "lost", "Zeta", "orphan.csv"]
+
+
+def test_stdlib_fallback_matches_orjson(db_session, user, monkeypatch):
+    seed(db_session, user)
+    service = FileService(db_session)
+    with_orjson = service.get_file_tree_json(str(user.id))
+    monkeypatch.setattr(fs, "orjson", None)
+    assert service.get_file_tree_json(str(user.id)) == with_orjson
+
+
+def test_tree_endpoint_fast_flag(files_client, db_session, user):
+    seed(db_session, user)
+    slow = files_client.get("/files/tree", params={"fast": "false"})
+    from app.services.file_tree_cache import file_tree_cache
+
+    file_tree_cache.clear()
+    fast = files_client.get("/files/tree", params={"fast": "true"})
+    assert fast.json() == slow.json()
+    assert fast.headers["etag"] == slow.headers["etag"]
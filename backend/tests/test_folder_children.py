@@ -0,0 +1,57 @@
+from app.schemas.file import FolderCreate
+from app.services.file_service import FileService, normalize_folder_path, parent_folder_path
+
+
+def test_path_helpers():
+    assert normalize_folder_path("docs/2024/") == "/docs/2024"
+    assert normalize_folder_path("") == "/"
+    assert parent_folder_path("/docs/2024") == "/docs"
+    assert parent_folder_path("/docs") == "/"
+
+
+def test_children_are_one_level_sorted_with_counts(files_client, db_session, user, add_file):
+    service = FileService(db_session)
+    service.ensure_folder_hierarchy(str(user.id), "/b/inner")
+    service.create_folder(str(user.id), FolderCreate(folder_name="A"))
+    add_file("z.csv")
+    add_file("B1.csv", 5, "/b")
+    add_file("b2.csv", 7, "/b")
+    add_file("deep.csv", 10, "/b/inner")
+
+    root = files_client.get("/files/children").json()
+    assert [(i["name"], i["type"]) for i in root] == [
+        ("A", "folder"),
+        ("b", "folder"),
+        ("z.csv", "file"),
+    ]
+    b = root[1]
+    # size and file_count roll up the whole subtree
+    assert (b["size"], b["file_count"]) == (22, 3)
+    assert root[2]["file_count"] is None
+
+    level = files_client.get("/files/children", params={"path": "/b/"}).json()
+    assert [i["name"] for i in level] == ["inner", "B1.csv", "b2.csv"]
+
+
+def test_children_pages_with_cursor(files_client, db_session, user, add_file):
+    FileService(db_session).ensure_folder_hierarchies(str(user.id), ["/d0", "/d1"])
+    for i in range(5):
+        add_file(f"f{i}.csv")
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        resp = files_client.get("/files/children", params=params)
+        assert len(resp.json()) <= 2
+        seen += [i["name"] for i in resp.json()]
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == ["d0", "d1", "f0.csv", "f1.csv", "f2.csv", "f3.csv", "f4.csv"]
+
+
+def test_children_rejects_bad_cursor(files_client):
+    assert files_client.get("/files/children", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,66 @@
+import uuid
+
+from sqlalchemy import event
+
+from app.models.file import File
+from app.schemas.file import FolderCreate
+from app.services.file_service import FileService
+
+
+def folder_paths(db_session, user):
+    return sorted(
+        path for (path,) in db_session.query(File.folder_path).filter(
+            File.user_id == user.id, File.is_folder == True
+        )
+    )
+
+
+def count_statements(db_session):
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *a: statements.append(a[2]))
+    return statements
+
+
+def test_creates_all_ancestors_in_constant_statements(db_session, user):
+    service = FileService(db_session)
+    user_id = str(user.id)
+    statements = count_statements(db_session)
+    targets = [f"/root/a{i}/b{j}" for i in range(20) for j in range(10)] * 3 + ["/", "", "/root/"]
+
+    created = service.ensure_folder_hierarchies(user_id, targets)
+
+    assert created == 1 + 20 + 200
+    # one SELECT, one INSERT, one version bump (commit is not a cursor statement)
+    assert len(statements) == 3
+    assert folder_paths(db_session, user)[:3] == ["/root", "/root/a0", "/root/a0/b0"]
+    parents = dict(db_session.query(File.folder_path, File.parent_path).filter(File.is_folder == True))
+    assert parents["/root"] == "/" and parents["/root/a3/b4"] == "/root/a3"
+
+
+def test_existing_folders_are_not_duplicated(db_session, user):
+    service = FileService(db_session)
+    service.create_folder(str(user.id), FolderCreate(folder_name="root"))
+    assert service.ensure_folder_hierarchies(str(user.id), ["/root/x"]) == 1
+    assert service.ensure_folder_hierarchies(str(user.id), ["/root/x", "root/x/"]) == 0
+    assert folder_paths(db_session, user) == ["/root", "/root/x"]
+
+
+def test_concurrent_creation_is_ignored(db_session, user):
+    service = FileService(db_session)
+    # Another request created the folder after our SELECT: the insert must not fail
+    row = {
+        "id": None, "user_id": user.id, "filename": "x", "original_filename": "x",
+        "file_path": "/x", "file_size": 0, "mime_type": None, "folder_path": "/x",
+        "is_folder": True, "parent_id": None, "parent_path": "/",
+    }
+    for _ in range(2):
+        db_session.execute(service._insert_folders_if_absent([dict(row, id=uuid.uuid4())]))
+    db_session.commit()
+    assert folder_paths(db_session, user) == ["/x"]
+
+
+def test_create_folder_returns_existing(db_session, user):
+    service = FileService(db_session)
+    first = service.create_folder(str(user.id), FolderCreate(folder_name="docs"))
+    second = service.create_folder(str(user.id), FolderCreate(folder_name="docs"))
+    assert first.id == second.id
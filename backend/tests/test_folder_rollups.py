@@ -0,0 +1,85 @@
+import json
+
+from app.models.file import File
+from app.services.file_service import FileService, folder_ancestors
+
+
+def rollups(db_session):
+    db_session.expire_all()
+    return {
+        path: (size, count)
+        for path, size, count in db_session.query(File.folder_path, File.total_size, File.total_files)
+        .filter(File.is_folder == True)
+    }
+
+
+def seed(db_session, user, make_file):
+    service = FileService(db_session)
+    service.ensure_folder_hierarchies(str(user.id), ["/a/b/c", "/a/d"])
+    service.create_files([
+        make_file("1.csv", 1, "/a"),
+        make_file("2.csv", 10, "/a/b"),
+        make_file("3.csv", 100, "/a/b/c"),
+        make_file("4.csv", 1000, "/a/d"),
+        make_file("5.csv", 5, "/"),
+    ])
+    service.create_file(make_file("6.csv", 10000, "/a/b/c/"))
+    return service
+
+
+def test_folder_ancestors():
+    assert folder_ancestors("/a/b/c/") == ["/a/b/c", "/a/b", "/a"]
+    assert folder_ancestors("/") == []
+
+
+def test_creates_roll_up_to_every_ancestor(db_session, user, make_file):
+    seed(db_session, user, make_file)
+    assert rollups(db_session) == {
+        "/a": (11111, 5),
+        "/a/b": (10110, 3),
+        "/a/b/c": (10100, 2),
+        "/a/d": (1000, 1),
+    }
+
+
+def test_deletes_roll_back_out(db_session, user, make_file):
+    service = seed(db_session, user, make_file)
+    three = db_session.query(File).filter(File.original_filename == "3.csv").one()
+    service.delete_file(str(three.id), str(user.id))
+    assert rollups(db_session)["/a"] == (11011, 4)
+
+    folder_b = db_session.query(File).filter(File.folder_path == "/a/b", File.is_folder == True).one()
+    service.delete_file(str(folder_b.id), str(user.id))
+    assert rollups(db_session) == {"/a": (1001, 2), "/a/d": (1000, 1)}
+
+
+def test_folder_delete_spares_siblings_sharing_the_prefix(db_session, user, make_file):
+    service = seed(db_session, user, make_file)
+    service.ensure_folder_hierarchies(str(user.id), ["/ab"])
+    service.create_file(make_file("7.csv", 7, "/ab"))
+
+    folder_a = db_session.query(File).filter(File.folder_path == "/a", File.is_folder == True).one()
+    service.delete_file(str(folder_a.id), str(user.id))
+    left = {f.original_filename for f in db_session.query(File)}
+    assert left == {"ab", "5.csv", "7.csv"}
+    assert rollups(db_session) == {"/ab": (7, 1)}
+
+
+def test_rebuild_matches_incremental(db_session, user, make_file):
+    service = seed(db_session, user, make_file)
+    expected = rollups(db_session)
+    db_session.query(File).filter(File.is_folder == True).update({"total_size": 7, "total_files": 7})
+    db_session.commit()
+    assert service.rebuild_folder_rollups(str(user.id)) == 4
+    assert rollups(db_session) == expected
+
+
+def test_tree_and_fast_tree_report_rollups(db_session, user, make_file):
+    service = seed(db_session, user, make_file)
+    db_session.expire_all()
+    tree = [n.model_dump(mode="json") for n in service.get_file_tree(str(user.id))]
+    fast = json.loads(service.get_file_tree_json(str(user.id)))
+    assert fast == tree
+    a = next(n for n in fast if n["name"] == "a")
+    assert (a["size"], a["file_count"]) == (11111, 5)
+    assert next(n for n in fast if n["name"] == "5.csv")["file_count"] is None
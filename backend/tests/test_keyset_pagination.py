@@ -0,0 +1,75 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.user import User
+from app.schemas.file import FileCreate, FolderCreate
+from app.services.file_service import FileService
+
+
+def collect(client, url, params):
+    names, cursor = [], None
+    while True:
+        resp = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert resp.status_code == 200
+        names.append([row.get("original_filename") or row.get("username") for row in resp.json()])
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            return names
+
+
+def test_folder_listing_pages_folders_first(files_client, db_session, user):
+    service = FileService(db_session)
+    for name in ["c.csv", "a.csv", "b.csv", "a.csv"]:
+        service.create_file(
+            FileCreate(
+                filename=name,
+                original_filename=name,
+                file_path=f"uploads/{uuid.uuid4()}",
+                file_size=1,
+                folder_path="/",
+                user_id=str(user.id),
+            )
+        )
+    service.create_folder(str(user.id), FolderCreate(folder_name="z"))
+    pages = collect(files_client, "/files/list", {"folder_path": "/", "limit": 2})
+    # Folder rows carry their own path in folder_path, so "/" lists only the files
+    assert pages == [["a.csv", "a.csv"], ["b.csv", "c.csv"]]
+    everything = [f.original_filename for f in service.get_all_user_files(str(user.id))]
+    assert everything == ["z", "a.csv", "a.csv", "b.csv", "c.csv"]
+
+
+def test_folder_listing_rejects_bad_cursor(files_client):
+    assert files_client.get("/files/list", params={"cursor": "bm9wZQ"}).status_code == 400
+
+
+def test_users_keyset_pages(db_session, user):
+    from app.api.api_v1.endpoints import users
+    from app.core.database import get_db
+
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(4):
+        db_session.add(
+            User(
+                id=uuid.uuid4(),
+                username=f"u{i}",
+                email=f"u{i}@example.com",
+                password="x",
+                created_at=start + timedelta(days=i // 2),  # two users per timestamp
+            )
+        )
+    user.created_at = start + timedelta(days=10)
+    db_session.commit()
+
+    app = FastAPI()
+    app.include_router(users.router, prefix="/users")
+    app.dependency_overrides[get_db] = lambda: db_session
+    with TestClient(app) as client:
+        pages = collect(client, "/users/", {"limit": 2})
+        legacy = client.get("/users/", params={"skip": 2, "limit": 2}).json()
+
+    assert [sorted(p[:2]) for p in pages[:2]] == [["u0", "u1"], ["u2", "u3"]]
+    assert pages[2] == ["alice"]
+    assert [u["username"] for u in legacy] == pages[1]
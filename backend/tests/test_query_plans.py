@@ -0,0 +1,95 @@
+"""The hot FileService queries must be index searches, not table scans.
+
+Runs on SQLite (EXPLAIN QUERY PLAN) with the same index definitions the
+PostgreSQL migrations create.
+"""
+import uuid
+
+from sqlalchemy import event, text
+
+from app.schemas.file import FileCreate
+from app.services.file_service import FileService
+
+
+def query_plans(db_session, call):
+    """Plan lines of every SELECT and DELETE on files issued by ``call()``."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "DELETE")) and "FROM files" in statement:
+            statements.append((statement, parameters))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert statements
+    return [
+        [row[-1] for row in db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+        for sql, params in statements
+    ]
+
+
+def seed(service, user):
+    # Other users' rows make user_id selective for the planner statistics
+    owners = [str(user.id)] + [str(uuid.uuid4()) for _ in range(9)]
+    service.ensure_folder_hierarchy(str(user.id), "/a/b")
+    service.create_files(
+        [
+            FileCreate(
+                filename=f"f{i}.csv",
+                original_filename=f"f{i}.csv",
+                file_path=f"uploads/f{i}.csv",
+                file_size=1,
+                folder_path=["/", "/a", "/a/b"][i % 3],
+                user_id=owners[i % len(owners)],
+            )
+            for i in range(300)
+        ]
+    )
+    service.db.execute(text("ANALYZE"))
+
+
+def test_folder_listing_uses_listing_index_in_order(db_session, user):
+    service = FileService(db_session)
+    seed(service, user)
+
+    (plan,) = query_plans(db_session, lambda: service.get_user_files_page(str(user.id), "/a", limit=5))
+    assert any("USING INDEX ix_files_user_folder_listing (user_id=? AND folder_path=?)" in line for line in plan)
+    assert not any("TEMP B-TREE" in line for line in plan)  # no sort step
+
+
+def test_folder_children_use_parent_listing_index_in_order(db_session, user):
+    service = FileService(db_session)
+    seed(service, user)
+
+    (plan,) = query_plans(db_session, lambda: service.get_folder_children(str(user.id), "/a", limit=5))
+    assert any("USING INDEX ix_files_user_parent_listing (user_id=? AND parent_path=?)" in line for line in plan)
+    assert not any("TEMP B-TREE" in line for line in plan)  # no sort step
+
+
+def test_subtree_delete_searches_by_user_and_path(db_session, user):
+    service = FileService(db_session)
+    seed(service, user)
+
+    # PostgreSQL serves the LIKE prefix through text_pattern_ops; SQLite needs case-sensitive LIKE
+    db_session.execute(text("PRAGMA case_sensitive_like = ON"))
+    plans = query_plans(db_session, lambda: service._delete_folder_contents("/a", str(user.id)))
+    for plan in plans:
+        assert not any(line.startswith("SCAN files") for line in plan), plan
+        assert any("ix_files_user_folder_listing (user_id=? AND folder_path" in line for line in plan), plan
+    db_session.rollback()
+
+
+def test_folder_lookup_uses_folder_index(db_session, user):
+    service = FileService(db_session)
+    seed(service, user)
+
+    plans = query_plans(db_session, lambda: service.ensure_folder_hierarchies(str(user.id), ["/a/b/c"]))
+    assert any(
+        any("USING INDEX uq_files_user_folder" in line or "USING COVERING INDEX uq_files_user_folder" in line for line in plan)
+        for plan in plans
+    ), plans
+    db_session.rollback()
@@ -0,0 +1,92 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.readiness import FAILED, READY, Readiness
+
+
+async def ok():
+    return None
+
+
+async def boom():
+    raise RuntimeError("unreachable")
+
+
+def test_run_records_status_and_latency():
+    r = Readiness()
+    r.register("a")
+    r.register("b")
+    assert asyncio.run(r.run("a", ok)) is True
+    assert asyncio.run(r.run("b", boom)) is False
+    assert r.checks["a"]["status"] == READY
+    assert isinstance(r.checks["a"]["latency_ms"], int)
+    assert r.checks["b"]["status"] == FAILED
+    assert r.checks["b"]["error"] == "unreachable"
+
+
+def test_ready_without_warmup(monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_ON_STARTUP", False)
+    assert Readiness().is_ready
+
+
+def test_ready_waits_for_required_steps(monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_ON_STARTUP", True)
+    monkeypatch.setattr(settings, "WARMUP_REQUIRED", ["database"])
+    r = Readiness()
+    r.register("database")
+    r.register("etx_login")
+    assert not r.is_ready
+    assert r.report()["status"] == "warming_up"
+
+    asyncio.run(r.run("database", ok))
+    asyncio.run(r.run("etx_login", boom))
+    r.started_at, r.finished_at = 0.0, 0.5
+    # optional steps may fail without blocking traffic
+    assert r.is_ready
+    assert r.report()["warmup_ms"] == 500
+
+
+def test_failed_required_step_is_unavailable(monkeypatch):
+    monkeypatch.setattr(settings, "WARMUP_ON_STARTUP", True)
+    monkeypatch.setattr(settings, "WARMUP_REQUIRED", ["database"])
+    r = Readiness()
+    r.register("database")
+    asyncio.run(r.run("database", boom))
+    r.started_at, r.finished_at = 0.0, 0.1
+    assert not r.is_ready
+    assert r.report()["status"] == "unavailable"
+
+
+def test_failed_required_step_is_retried_until_ready(monkeypatch):
+    from app.core import readiness as readiness_module
+    from app.core.processing import processing_service
+
+    monkeypatch.setattr(settings, "WARMUP_ON_STARTUP", True)
+    monkeypatch.setattr(settings, "WARMUP_REQUIRED", ["database"])
+    monkeypatch.setattr(settings, "WARMUP_RETRY_INITIAL_SECONDS", 0.01)
+    attempts = []
+
+    def fill_pool(size):
+        attempts.append(size)
+        if len(attempts) < 3:
+            raise RuntimeError("connection refused")  # Postgres still starting
+
+    async def no_config():
+        raise RuntimeError("config API down")
+
+    monkeypatch.setattr(readiness_module, "_fill_db_pool", fill_pool)
+    monkeypatch.setattr(processing_service, "aload_config", no_config)
+
+    async def scenario():
+        r = Readiness()
+        task = asyncio.create_task(r.warm_up())
+        while r.finished_at is None:
+            await asyncio.sleep(0.001)
+        assert r.report()["status"] == "unavailable"
+        await asyncio.wait_for(task, 2)
+        return r
+
+    r = asyncio.run(scenario())
+    assert r.is_ready and len(attempts) == 3
+    assert r.checks["database"]["status"] == READY
+    assert r.checks["config"]["status"] == FAILED  # optional: not retried
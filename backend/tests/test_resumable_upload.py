@@ -0,0 +1,133 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.models.upload_session import UploadSession, UploadSessionPart
+from app.services.file_service import FileService
+from app.services.storage_service import StorageService
+from app.services.upload_session_service import UploadSessionService
+
+CONTENT = bytes(range(25))
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    from app.api.api_v1.endpoints import files
+    from app.services import upload_session_service
+
+    monkeypatch.setattr(settings, "LOCAL_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "RESUMABLE_UPLOAD_CHUNK_SIZE", 10)
+    storage = StorageService()
+    monkeypatch.setattr(files, "storage_service", storage)
+    monkeypatch.setattr(upload_session_service, "storage_service", storage)
+    return storage
+
+
+def start(client, **extra):
+    response = client.post("/files/uploads/resumable", json={
+        "filename": "export.bar", "size": len(CONTENT), "folder_path": "/bar", **extra,
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+def put(client, upload, offset, data):
+    return client.put(f"/files/uploads/resumable/{upload['id']}?offset={offset}", content=data)
+
+
+def test_chunks_in_any_order_then_complete(files_client, local_storage, db_session, tmp_path):
+    upload = start(files_client, relative_path="q3/export.bar")
+    assert (upload["chunk_size"], upload["missing_parts"]) == (10, [1, 2, 3])
+    url = f"/files/uploads/resumable/{upload['id']}"
+
+    status = put(files_client, upload, 20, CONTENT[20:]).json()
+    assert (status["offset"], status["received_bytes"], status["missing_parts"]) == (0, 5, [1, 2])
+    assert put(files_client, upload, 0, b"wrong size").status_code == 200  # resent below
+    assert put(files_client, upload, 0, CONTENT[:10]).status_code == 200
+    assert put(files_client, upload, 5, CONTENT[5:15]).status_code == 400  # not a chunk boundary
+    assert put(files_client, upload, 10, CONTENT[10:19]).status_code == 400  # short chunk
+    assert files_client.post(f"{url}/complete").status_code == 409
+    assert files_client.get(url).json()["offset"] == 10
+
+    assert put(files_client, upload, 10, CONTENT[10:20]).json()["complete"]
+    created = files_client.post(f"{url}/complete").json()
+    assert (created["folder_path"], created["file_size"]) == ("/bar/q3", len(CONTENT))
+    assert created["checksum"] == hashlib.sha256(CONTENT).hexdigest()
+    assert (tmp_path / created["file_path"]).read_bytes() == CONTENT
+    assert not any((tmp_path / ".chunks").iterdir())
+    assert files_client.get(url).status_code == 404
+    assert db_session.query(UploadSessionPart).count() == 0
+
+
+def test_failed_completion_drops_the_session(files_client, local_storage, db_session, tmp_path, monkeypatch):
+    upload = start(files_client)
+    for offset in (0, 10, 20):
+        put(files_client, upload, offset, CONTENT[offset:offset + 10])
+
+    def broken(self, files_data, commit=True):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(FileService, "create_files", broken)
+    url = f"/files/uploads/resumable/{upload['id']}"
+    assert files_client.post(f"{url}/complete").status_code == 500
+    # The chunks were consumed: the retry gets a clean 404 instead of another 500
+    assert files_client.post(f"{url}/complete").status_code == 404
+    assert db_session.query(UploadSession).count() == 0
+    assert db_session.query(UploadSessionPart).count() == 0
+    assert [p for p in tmp_path.rglob("*") if p.is_file()] == []
+
+
+def test_complete_maps_missing_chunks_to_409(files_client, local_storage, monkeypatch):
+    upload = start(files_client)
+    for offset in (0, 10, 20):
+        put(files_client, upload, offset, CONTENT[offset:offset + 10])
+
+    def racing(self, session):
+        raise ValueError("Upload is missing chunks")
+
+    monkeypatch.setattr(UploadSessionService, "complete", racing)
+    response = files_client.post(f"/files/uploads/resumable/{upload['id']}/complete")
+    assert response.status_code == 409
+
+
+def test_abort_and_expire(files_client, local_storage, db_session, user, tmp_path):
+    upload = start(files_client)
+    put(files_client, upload, 0, CONTENT[:10])
+    assert files_client.delete(f"/files/uploads/resumable/{upload['id']}").status_code == 200
+    assert not any((tmp_path / ".chunks").iterdir())
+
+    service = UploadSessionService(db_session)
+    stale = service.create(str(user.id), "old.bar", 3, None)
+    stale.created_at = datetime.now(timezone.utc) - timedelta(hours=settings.RESUMABLE_UPLOAD_EXPIRE_HOURS + 1)
+    service.create(str(user.id), "new.bar", 3, None)
+    db_session.commit()
+    assert service.expire_stale() == 1
+    assert [s.original_filename for s in db_session.query(UploadSession)] == ["new.bar"]
+
+
+def test_limits(files_client, local_storage, monkeypatch):
+    monkeypatch.setattr(settings, "RESUMABLE_UPLOAD_MAX_BYTES", 10)
+    assert files_client.post("/files/uploads/resumable", json={"filename": "a", "size": 11}).status_code == 400
+    monkeypatch.setattr(settings, "RESUMABLE_UPLOAD_MAX_BYTES", 100)
+    monkeypatch.setattr(settings, "USER_STORAGE_QUOTA_BYTES", 40)
+    start(files_client)
+    # The open session reserves its size against the quota
+    assert files_client.post("/files/uploads/resumable", json={"filename": "b", "size": 20}).status_code == 413
+
+
+def test_s3_chunks_become_multipart_parts(files_client, local_storage, fake_s3, monkeypatch):
+    local_storage.storage_type = "s3"
+    local_storage.s3_client = fake_s3
+    monkeypatch.setattr(settings, "RESUMABLE_UPLOAD_CHUNK_SIZE", 1)  # raised to the S3 minimum part size
+    data = b"ab" * (3 * 1024 * 1024)
+    upload = start(files_client, size=len(data))
+    assert upload["chunk_size"] == 5 * 1024 * 1024
+
+    size = upload["chunk_size"]
+    assert put(files_client, upload, size, data[size:]).status_code == 200
+    assert put(files_client, upload, 0, data[:size]).status_code == 200
+    created = files_client.post(f"/files/uploads/resumable/{upload['id']}/complete").json()
+    assert local_storage.s3_client.objects[created["file_path"]] == data
+    assert created["checksum"] is None
@@ -0,0 +1,87 @@
+import json
+import uuid
+
+import pytest
+
+from app.core.run_report import RunReport
+from app.schemas.processing import ProcessingRunResponse
+
+
+def test_stage_accumulates_across_entries():
+    report = RunReport(action="ingestbar", user_id=str(uuid.uuid4()))
+    for _ in range(3):
+        with report.stage("publish"):
+            pass
+    with report.stage("parse"):
+        pass
+    assert set(report.stages_ms) == {"publish", "parse"}
+    assert all(ms >= 0 for ms in report.stages_ms.values())
+
+
+def test_stage_records_time_when_body_raises():
+    report = RunReport(action="ingestbar", user_id=str(uuid.uuid4()))
+    with pytest.raises(ValueError):
+        with report.stage("read"):
+            raise ValueError("boom")
+    assert "read" in report.stages_ms
+
+
+def test_fail_distinguishes_early_exit_from_exception():
+    report = RunReport(action="ingestes", user_id=str(uuid.uuid4()))
+    report.fail("error")
+    assert (report.status, report.error) == ("error", None)
+
+    report.fail("error", TimeoutError())
+    assert report.status == "failed"
+    assert report.error == "TimeoutError"
+
+
+def test_finish_freezes_wall_time_and_rate():
+    report = RunReport(action="ingestbar", user_id=str(uuid.uuid4()), rows=0)
+    assert report.rows_per_second is None
+    report.rows = 1000
+    report.finish()
+    wall = report.wall_time_ms
+    report.finish()
+    assert report.wall_time_ms == wall
+    assert report.finished_at is not None
+    data = report.as_dict()
+    assert data["rows"] == 1000
+    assert data["finished_at"] == report.finished_at.isoformat()
+
+
+def test_to_model_round_trips_through_response_schema():
+    user_id = uuid.uuid4()
+    report = RunReport(action="ingestbar", user_id=str(user_id), tenant="t@etx", rows=10)
+    report.groups_published = 2
+    report.stages_ms = {"parse": 5, "publish": 40}
+    report.message = "x" * 400
+    report.finish()
+
+    model = report.to_model()
+    assert model.user_id == user_id
+    assert len(model.message) == 255
+    assert json.loads(model.stages) == {"parse": 5, "publish": 40}
+
+    model.id = uuid.uuid4()
+    response = ProcessingRunResponse.model_validate(model)
+    assert response.user_id == str(user_id)
+    assert response.stages == {"parse": 5, "publish": 40}
+    assert response.groups_published == 2
+
+
+@pytest.mark.parametrize(
+    "content, rows",
+    [
+        (b"a,b\n1,2\n3,4\n", 2),
+        (b"a,b\n1,2\n3,4", 2),
+        (b'a,b\n1,"two\nlines"\n3,4\n', 2),
+        (b"a,b\n\n1,2\n\n", 1),
+        (b"a,b\n", 0),
+        (b"", 0),
+    ],
+)
+def test_ingested_rows_are_counted_by_the_csv_parser(content, rows):
+    from app.core.processing import ProcessingService
+
+    assert ProcessingService.count_csv_rows(content) == rows
@@ -0,0 +1,60 @@
+import hashlib
+import io
+
+import pytest
+
+from app.core.config import settings
+from app.services.storage_service import FileTooLargeError, StorageService
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_UPLOAD_DIR", str(tmp_path))
+    return StorageService()
+
+
+@pytest.fixture
+def s3_storage(local_storage, fake_s3):
+    local_storage.storage_type = "s3"
+    local_storage.s3_client = fake_s3
+    return local_storage
+
+
+def test_local_stream_writes_chunks_and_digests(local_storage, tmp_path):
+    data = bytes(range(256)) * 1000
+    stored = local_storage.upload_file_stream(io.BytesIO(data), "a.csv", "text/csv", "u", chunk_size=4096)
+    assert stored.size == len(data)
+    assert stored.checksum == hashlib.sha256(data).hexdigest()
+    assert (tmp_path / stored.path).read_bytes() == data
+
+
+def test_local_stream_enforces_limit_and_cleans_up(local_storage, tmp_path):
+    with pytest.raises(FileTooLargeError):
+        local_storage.upload_file_stream(io.BytesIO(b"x" * 100), "a.csv", "text/csv", "u", max_size=99, chunk_size=10)
+    assert not [p for p in tmp_path.rglob("*") if p.is_file()]
+
+
+def test_s3_small_file_is_one_put(s3_storage):
+    stored = s3_storage.upload_file_stream(io.BytesIO(b"abc"), "a.csv", "text/csv", "u")
+    assert s3_storage.s3_client.calls == ["put_object"]
+    assert s3_storage.s3_client.objects[stored.path] == b"abc"
+    assert stored.size == 3 and stored.path.startswith("files/u/")
+
+
+def test_s3_large_file_uses_multipart(s3_storage):
+    part = 5 * 1024 * 1024
+    data = b"a" * part + b"b" * part + b"c" * 10
+    stored = s3_storage.upload_file_stream(io.BytesIO(data), "a.csv", "text/csv", "u", chunk_size=1024)
+    client = s3_storage.s3_client
+    assert client.calls == [
+        "create_multipart_upload", "upload_part", "upload_part", "upload_part", "complete_multipart_upload",
+    ]
+    assert client.objects[stored.path] == data
+    assert stored.checksum == hashlib.sha256(data).hexdigest()
+
+
+def test_s3_multipart_aborts_past_limit(s3_storage):
+    part = 5 * 1024 * 1024
+    with pytest.raises(FileTooLargeError):
+        s3_storage.upload_file_stream(io.BytesIO(b"a" * (2 * part + 1)), "a.csv", "text/csv", "u", max_size=2 * part)
+    assert s3_storage.s3_client.calls[-1] == "abort_multipart_upload"
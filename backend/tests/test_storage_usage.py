@@ -0,0 +1,88 @@
+from app.core.config import settings
+from app.models.file import File
+from app.models.storage_usage import UserStorageUsage
+from app.services.file_service import FileService, usage_delta
+
+
+def test_usage_delta_categories():
+    delta = usage_delta([
+        (False, 10, "image/png"),
+        (False, 20, "application/pdf"),
+        (False, 30, "application/vnd.ms-excel"),
+        (False, 40, None),
+        (True, 0, None),
+    ], sign=-1)
+    assert delta == {"total_size": -100, "file_count": -4, "images_count": -1, "pdf_count": -1, "csv_count": -1}
+
+
+def test_counters_follow_creates_and_deletes(db_session, user, make_file):
+    service = FileService(db_session)
+    service.create_files([
+        make_file("a.png", 100, "/pics", mime_type="image/png"),
+        make_file("b.csv", 50, "/pics"),
+        make_file("c.bin", 7, mime_type=None),
+    ])
+    service.create_file(make_file("d.pdf", 3, mime_type="application/pdf"))
+    service.ensure_folder_hierarchy(str(user.id), "/pics")
+
+    assert service.get_storage_usage(str(user.id)) == {
+        "total_size": 160,
+        "file_count": 4,
+        "by_type": {"images": 1, "pdf": 1, "csv": 1, "others": 1},
+    }
+
+    folder = db_session.query(File).filter(File.folder_path == "/pics", File.is_folder == True).one()
+    assert service.delete_file(str(folder.id), str(user.id))
+    usage = service.get_storage_usage(str(user.id))
+    assert (usage["total_size"], usage["file_count"]) == (10, 2)
+    assert service.get_storage_total_size(str(user.id)) == 10
+
+
+def test_rebuild_repairs_drift(db_session, user, make_file):
+    service = FileService(db_session)
+    service.create_file(make_file("a.csv", 5))
+    db_session.get(UserStorageUsage, user.id).total_size = 999
+    db_session.commit()
+
+    assert service.rebuild_storage_usage() == 1
+    assert service.get_storage_usage(str(user.id))["total_size"] == 5
+
+    db_session.query(File).delete()  # rows removed behind FileService's back
+    db_session.commit()
+    service.rebuild_storage_usage(str(user.id))
+    assert service.get_storage_usage(str(user.id))["file_count"] == 0
+
+
+def test_reconcile_invalidates_the_tree_etag(files_client, db_session, user, make_file, patch_session_scope):
+    from app.services import storage_usage_job
+
+    patch_session_scope(storage_usage_job)
+    service = FileService(db_session)
+    service.ensure_folder_hierarchy(str(user.id), "/docs")
+    service.create_file(make_file("a.csv", 5, "/docs"))
+    etag = files_client.get("/files/tree").headers["etag"]
+
+    storage_usage_job.reconcile_storage_usage()  # nothing drifted
+    assert files_client.get("/files/tree", headers={"If-None-Match": etag}).status_code == 304
+
+    db_session.query(File).filter(File.is_folder == True).update({"total_size": 7})
+    db_session.commit()
+    storage_usage_job.reconcile_storage_usage()
+    resp = files_client.get("/files/tree", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert resp.json()[0]["size"] == 5
+
+
+def test_upload_quota(files_client, db_session, user, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "USER_STORAGE_QUOTA_BYTES", 10)
+
+    def post(name, content):
+        return files_client.post("/files/upload", files=[("files", (name, content, "text/csv"))])
+
+    assert post("a.csv", b"12345678").status_code == 200
+    assert post("b.csv", b"123").status_code == 413
+    assert len([p for p in tmp_path.rglob("*") if p.is_file()]) == 1
+    assert post("c.csv", b"12").status_code == 200
+    assert post("d.csv", b"1").status_code == 413  # already at the quota
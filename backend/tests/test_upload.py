@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from app.api.api_v1.endpoints import files as files_endpoint
+from app.core.config import settings
+from app.models.file import File
+from app.services.file_service import FileService
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def stored_files(upload_dir):
+    return sorted(p.name for p in upload_dir.rglob("*") if p.is_file())
+
+
+def upload(client, names, relative_paths=None):
+    data = {"folder_path": "/"}
+    if relative_paths is not None:
+        data["relative_paths"] = json.dumps(relative_paths)
+    return client.post(
+        "/files/upload",
+        files=[("files", (name, f"content of {name}".encode(), "text/csv")) for name in names],
+        data=data,
+    )
+
+
+def test_upload_creates_records_and_folders_in_one_transaction(files_client, db_session, user, upload_dir):
+    names = [f"f{i}.csv" for i in range(5)]
+    response = upload(files_client, names, [f"batch/sub{i % 2}/{n}" for i, n in enumerate(names)])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [f["original_filename"] for f in body] == names  # input order
+    assert body[1]["folder_path"] == "/batch/sub1"
+    assert len(stored_files(upload_dir)) == 5
+    folders = sorted(p for (p,) in db_session.query(File.folder_path).filter(File.is_folder == True))
+    assert folders == ["/batch", "/batch/sub0", "/batch/sub1"]
+
+
+def test_failed_insert_rolls_back_and_removes_stored_files(files_client, db_session, user, upload_dir, monkeypatch):
+    def boom(self, files_data, commit=True):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(FileService, "create_files", boom)
+    response = upload(files_client, ["a.csv", "b.csv"], ["dir/a.csv", "dir/b.csv"])
+
+    assert response.status_code == 500
+    assert stored_files(upload_dir) == []
+    assert db_session.query(File).count() == 0  # folders rolled back too
+
+
+def test_oversized_file_aborts_whole_upload(files_client, db_session, user, upload_dir, monkeypatch):
+    monkeypatch.setattr(files_endpoint, "MAX_FILE_SIZE", len(b"content of a.csv"))
+    response = upload(files_client, ["a.csv", "bigger.csv"])
+
+    assert response.status_code == 400
+    assert stored_files(upload_dir) == []
+    assert db_session.query(File).count() == 0
+
+
+def test_create_files_returns_loaded_rows(db_session, user):
+    from app.schemas.file import FileCreate
+
+    service = FileService(db_session)
+    data = [
+        FileCreate(filename=f"s{i}", original_filename=f"n{i}.csv", file_path=f"files/s{i}",
+                   file_size=i, folder_path="/x", user_id=str(user.id))
+        for i in range(3)
+    ]
+    created = service.create_files(data)
+    assert [f.original_filename for f in created] == ["n0.csv", "n1.csv", "n2.csv"]
+    assert all(f.uploaded_at is not None and f.parent_path == "/x" for f in created)
+    assert created[0].children == []
+
+
+def test_storage_writes_run_concurrently_with_a_bound(files_client, user, upload_dir, monkeypatch):
+    import threading
+    import time
+
+    from app.services.storage_service import storage_service
+
+    monkeypatch.setattr(settings, "UPLOAD_CONCURRENCY", 3)
+    original = storage_service.upload_file_stream
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def slow_upload(*args, **kwargs):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        try:
+            return original(*args, **kwargs)
+        finally:
+            with lock:
+                running["now"] -= 1
+
+    monkeypatch.setattr(storage_service, "upload_file_stream", slow_upload)
+    response = upload(files_client, [f"f{i}.csv" for i in range(9)])
+
+    assert response.status_code == 200
+    assert [f["original_filename"] for f in response.json()] == [f"f{i}.csv" for i in range(9)]
+    assert running["max"] == 3
+
+
+def test_one_failed_write_removes_the_others(files_client, db_session, user, upload_dir, monkeypatch):
+    from app.services.storage_service import storage_service
+
+    original = storage_service.upload_file_stream
+
+    def flaky_upload(stream, filename, **kwargs):
+        if filename == "bad.csv":
+            return None
+        return original(stream, filename, **kwargs)
+
+    monkeypatch.setattr(storage_service, "upload_file_stream", flaky_upload)
+    response = upload(files_client, ["a.csv", "bad.csv", "c.csv", "d.csv"])
+
+    assert response.status_code == 500
+    assert stored_files(upload_dir) == []
+    assert db_session.query(File).count() == 0